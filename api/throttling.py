@@ -0,0 +1,255 @@
+"""
+Throttling para los endpoints costosos en CPU (login y registro con Argon2, subidas con Pillow).
+
+Cada clase limita por una clave distinta dentro del `throttle_scope` de la vista, con la tasa
+definida en `REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']` bajo `<scope>_<clave>`:
+
+    - `UserSlidingWindowThrottle`:  por usuario autenticado  (p. ej. 'upload_user').
+    - `IPSlidingWindowThrottle`:    por IP del cliente        (p. ej. 'login_ip').
+    - `ScopeSlidingWindowThrottle`: global para todo el scope (p. ej. 'login_global').
+
+Una clave sin tasa configurada no se limita. `ExpensiveEndpointThrottle` las evalúa en ese orden
+y se detiene en la primera que rechaza, devolviendo el cupo tomado por las anteriores: una IP
+que abusa del login no gasta el cupo global de los demás. La IP sale de `REMOTE_ADDR` y de
+`X-Forwarded-For` según `REST_FRAMEWORK['NUM_PROXIES']`. El recuento es una ventana deslizante aproximada
+(ventana actual más la anterior ponderada) con `cache.incr`, que es atómico en el cache
+compartido (`THROTTLE_CACHE`; en producción debe ser Redis o Memcached, LocMem es por proceso).
+
+Antes de tocar el cache se consulta un token bucket local al proceso con la misma tasa: si este
+proceso ya ha agotado el cupo, el total también lo ha hecho y se rechaza sin ir a la red.
+
+DRF comprueba los throttles en `initial()`, antes de que la vista lea `request.data`, así que
+una petición rechazada no llega a parsear su cuerpo multipart.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+DURATIONS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """Convierte '<n>/<periodo>' (s, min, hour, day...) en (peticiones, segundos)."""
+    if rate is None:
+        return None, None
+    num, period = rate.split('/')
+    return int(num), DURATIONS[period[0]]
+
+
+class LocalTokenBucket:
+    """
+    Token buckets locales al proceso, {clave: (tokens, última recarga, momento en que vuelve a
+    estar lleno)}. Un bucket lleno equivale a uno que no existe, así que como mucho cada
+    `purge_interval` segundos se eliminan: el dict no crece con cada IP vista.
+    """
+
+    def __init__(self, purge_interval=60):
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self.purge_interval = purge_interval
+        self._next_purge = 0
+
+    def consume(self, key, capacity, refill_per_second, now):
+        """
+        Consume un token si hay. Devuelve los segundos que faltan para el siguiente token
+        (0 si se ha podido consumir).
+        """
+        with self._lock:
+            if now >= self._next_purge:
+                self._purge(now)
+            tokens, updated_at, _ = self._buckets.get(key, (capacity, now, now))
+            tokens = min(capacity, tokens + (now - updated_at) * refill_per_second)
+            if tokens < 1:
+                self._store(key, tokens, capacity, refill_per_second, now)
+                return (1 - tokens) / refill_per_second
+            self._store(key, tokens - 1, capacity, refill_per_second, now)
+            return 0
+
+    def refund(self, key, capacity, refill_per_second, now):
+        """Devuelve el token de una petición que al final no se atendió."""
+        with self._lock:
+            if key in self._buckets:
+                tokens, updated_at, _ = self._buckets[key]
+                tokens = min(capacity, tokens + (now - updated_at) * refill_per_second + 1)
+                self._store(key, tokens, capacity, refill_per_second, now)
+
+    def _store(self, key, tokens, capacity, refill_per_second, now):
+        self._buckets[key] = (tokens, now, now + (capacity - tokens) / refill_per_second)
+
+    def _purge(self, now):
+        for key in [key for key, (_, _, full_at) in self._buckets.items() if full_at <= now]:
+            del self._buckets[key]
+        self._next_purge = now + self.purge_interval
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+local_buckets = LocalTokenBucket()
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    """
+    Base de los throttles por scope. Las subclases definen `key_by` e implementan `get_key_ident`.
+    """
+    key_by = None
+    cache_format = 'throttle:%(scope)s:%(key_by)s:%(ident)s:%(window)d'
+
+    def __init__(self):
+        self.wait_seconds = None
+        # Cupo tomado por la última petición admitida, para poder devolverlo con `release`.
+        self.acquired = None
+
+    def get_key_ident(self, request):
+        """Identificador a limitar, o None si esta clase no aplica a la petición."""
+        raise NotImplementedError
+
+    def get_cache(self):
+        return caches[getattr(settings, 'THROTTLE_CACHE', 'default')]
+
+    def allow_request(self, request, view):
+        scope = getattr(view, 'throttle_scope', None)
+        if not scope:
+            return True
+        num_requests, duration = parse_rate(api_settings.DEFAULT_THROTTLE_RATES.get(f"{scope}_{self.key_by}"))
+        if num_requests is None:
+            return True
+        ident = self.get_key_ident(request)
+        if ident is None:
+            return True
+
+        now = time.time()
+        bucket = ((scope, self.key_by, ident), num_requests, num_requests / duration)
+        # Camino rápido: si este proceso ya agotó el cupo, no hace falta preguntar al cache.
+        local_wait = local_buckets.consume(*bucket, now)
+        if local_wait:
+            self.wait_seconds = local_wait
+            return False
+
+        cache = self.get_cache()
+        window = int(now // duration)
+        key_values = {'scope': scope, 'key_by': self.key_by, 'ident': ident}
+        current_key = self.cache_format % {**key_values, 'window': window}
+        previous_key = self.cache_format % {**key_values, 'window': window - 1}
+        current = self.increment(cache, current_key, timeout=duration * 2)
+        previous = cache.get(previous_key, 0)
+        elapsed = (now % duration) / duration
+        if previous * (1 - elapsed) + current <= num_requests:
+            self.acquired = (bucket, current_key)
+            return True
+
+        # Las peticiones rechazadas no cuentan para el cupo.
+        self.decrement(cache, current_key)
+        local_buckets.refund(*bucket, now)
+        self.wait_seconds = duration * (1 - elapsed)
+        return False
+
+    def release(self):
+        """Devuelve el cupo tomado por la última petición admitida (rechazada después por otro throttle)."""
+        if self.acquired is None:
+            return
+        bucket, current_key = self.acquired
+        self.acquired = None
+        local_buckets.refund(*bucket, time.time())
+        self.decrement(self.get_cache(), current_key)
+
+    @staticmethod
+    def increment(cache, key, timeout):
+        """Suma uno al contador de la ventana; si el cache lo ha perdido (caducado o desalojado), empieza una nueva."""
+        cache.add(key, 0, timeout=timeout)
+        try:
+            return cache.incr(key)
+        except ValueError:
+            cache.add(key, 0, timeout=timeout)
+            return cache.incr(key)
+
+    @staticmethod
+    def decrement(cache, key):
+        """Resta uno al contador de la ventana, salvo que el cache ya lo haya perdido."""
+        try:
+            cache.decr(key)
+        except ValueError:
+            # La ventana ya caducó en el cache: no queda nada que devolver.
+            pass
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class UserSlidingWindowThrottle(SlidingWindowThrottle):
+    key_by = 'user'
+
+    def get_key_ident(self, request):
+        if request.user and request.user.is_authenticated:
+            return request.user.pk
+        return None
+
+
+class IPSlidingWindowThrottle(SlidingWindowThrottle):
+    key_by = 'ip'
+
+    def get_key_ident(self, request):
+        return self.get_ident(request)
+
+
+class ScopeSlidingWindowThrottle(SlidingWindowThrottle):
+    key_by = 'global'
+
+    def get_key_ident(self, request):
+        return 'all'
+
+
+class ExpensiveEndpointThrottle(BaseThrottle):
+    """
+    Evalúa `throttles` en orden, de la clave más estrecha a la global, y se detiene en la primera
+    que rechaza devolviendo el cupo ya tomado por las anteriores. DRF evalúa siempre todas sus
+    `throttle_classes`, así que con clases separadas una petición rechazada por IP contaría igual
+    en el límite global.
+    """
+    throttles = [UserSlidingWindowThrottle, IPSlidingWindowThrottle, ScopeSlidingWindowThrottle]
+
+    def __init__(self):
+        self.wait_seconds = None
+
+    def allow_request(self, request, view):
+        admitted = []
+        for throttle_class in self.throttles:
+            throttle = throttle_class()
+            if not throttle.allow_request(request, view):
+                for previous in admitted:
+                    previous.release()
+                self.wait_seconds = throttle.wait()
+                return False
+            admitted.append(throttle)
+        return True
+
+    def wait(self):
+        return self.wait_seconds
+
+
+# Combinación que se aplica a los endpoints costosos.
+EXPENSIVE_ENDPOINT_THROTTLES = [ExpensiveEndpointThrottle]
+
+
+class ExpensiveEndpointThrottleMixin:
+    """
+    Aplica `EXPENSIVE_ENDPOINT_THROTTLES` a una vista. Con `throttled_actions` se limita solo a esas
+    acciones del ViewSet (o métodos HTTP en minúsculas en un APIView); las demás no se limitan.
+    """
+    throttle_classes = EXPENSIVE_ENDPOINT_THROTTLES
+    throttled_actions = None
+
+    def get_throttles(self):
+        if self.throttled_actions is not None:
+            action = getattr(self, 'action', None) or self.request.method.lower()
+            if action not in self.throttled_actions:
+                return []
+        return super().get_throttles()
@@ -20,18 +20,23 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView, SpectacularRedocView
+from media.views.imageFileView import serve_image_file
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/recipes/', include('recipes.urls')),
     path('api/shopping/', include('shopping.urls')),
     path('api/measurements/', include('measurements.urls')),    
+    path('api/media/', include('media.urls')),
     path('api/', include('users.urls')),
 
     # API Documentation URLs for drf-spectacular:
     path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
     path('api/schema/swagger-ui/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
     path('api/schema/redoc/', SpectacularRedocView.as_view(url_name='schema'), name='redoc'),
+
+    # URL pública de las imágenes, estable con cualquier layout de MEDIA_IMG_STORAGE:
+    path(f"{settings.MEDIA_URL.strip('/')}/img/<int:user_id>/<str:name>", serve_image_file, name='image-file'),
 ]
 
 if settings.DEBUG:
@@ -10,6 +10,28 @@ from recipes.models.recipe import Recipe
 from recipes.models.recipeIngredient import RecipeIngredient
 from recipes.models.step import Step
 from media.models.image import Image
+from django.core.cache import cache
+from api.throttling import local_buckets
+from recipes.services.counters import recipe_views
+
+
+# --- Throttling ---
+@pytest.fixture(autouse=True)
+def reset_throttling():
+    """Vacía los contadores de throttling para que no se arrastren entre tests."""
+    cache.clear()
+    local_buckets.clear()
+    yield
+
+
+# --- Contadores en memoria ---
+@pytest.fixture(autouse=True)
+def buffered_counters(settings):
+    """Sin hilo de volcado en los tests: los contadores se vuelcan con `flush()` explícito."""
+    settings.RECIPE_COUNTER_FLUSH_INTERVAL = 0
+    recipe_views.clear()
+    yield
+    recipe_views.clear()
 
 
 # --- User Fixtures ---
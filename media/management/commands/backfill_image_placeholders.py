@@ -0,0 +1,58 @@
+# CF-backend/media/management/commands/backfill_image_placeholders.py
+from django.core.management.base import BaseCommand
+from media.models.image import Image
+from media.services.image_codec import describe_image
+from media.services.image_service import resolve_image_owners
+from media.services.storage import get_image_storage
+from media.signals import images_changed
+
+
+class Command(BaseCommand):
+    help = "Calcula width, height y placeholder de las imágenes existentes que aún no los tienen."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Imágenes procesadas por lote.')
+        parser.add_argument('--force', action='store_true', help='Recalcula también las imágenes que ya tienen placeholder.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        queryset = Image.objects.exclude(url__isnull=True).exclude(url='')
+        if not options['force']:
+            queryset = queryset.filter(placeholder__isnull=True)
+
+        storage = get_image_storage()
+        updated = missing = failed = 0
+        last_id = 0
+        while True:
+            batch = list(queryset.filter(id__gt=last_id).order_by('id')[:batch_size])
+            if not batch:
+                break
+            last_id = batch[-1].id
+            owners = resolve_image_owners(batch)
+
+            changed = []
+            for image in batch:
+                if image.id not in owners:
+                    missing += 1
+                    continue
+                try:
+                    metadata = describe_image(storage.open(image.url, owners[image.id], scan=True))
+                except FileNotFoundError:
+                    missing += 1
+                    continue
+                except Exception as e:
+                    failed += 1
+                    self.stderr.write(self.style.ERROR(f"Error al procesar la imagen {image.id} ({image.url}): {e}"))
+                    continue
+                for field, value in metadata.items():
+                    setattr(image, field, value)
+                changed.append(image)
+
+            Image.objects.bulk_update(changed, ['width', 'height', 'placeholder'])
+            images_changed.send(sender=Image, images=[(image.type, image.external_id) for image in changed])
+            updated += len(changed)
+            self.stdout.write(f"Lote hasta id {last_id}: {len(changed)} imágenes actualizadas.")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ backfill_image_placeholders completado: {updated} actualizadas, {missing} sin archivo, {failed} con error."
+        ))
@@ -0,0 +1,191 @@
+# CF-backend/media/management/commands/gc_media.py
+import json
+import os
+import shutil
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from media.models.image import Image
+from media.services.image_service import locate_image_file, resolve_image_owners
+from media.services.storage import get_image_storage
+from media.services.usage_service import UsageDelta
+
+
+class Command(BaseCommand):
+    help = (
+        "Recolecta la media huérfana: archivos en MEDIA_IMG_PATH sin fila en 'images' y filas de "
+        "'images' cuya receta, paso o usuario ya no existe. Usa --dry-run para solo generar el informe."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Solo informa, no borra ni mueve nada.')
+        parser.add_argument('--quarantine', metavar='DIR', help='Mueve los huérfanos a DIR en lugar de borrarlos.')
+        parser.add_argument('--only', choices=['files', 'rows'], help='Limita la pasada a archivos o a filas.')
+        parser.add_argument('--batch-size', type=int, default=500, help='Elementos comprobados por consulta.')
+        parser.add_argument('--sleep', type=float, default=0.0, help='Segundos de pausa entre lotes (throttling).')
+        parser.add_argument('--max-batches', type=int, default=None, help='Lotes de filas por ejecución (modo incremental).')
+        parser.add_argument('--start-after-id', type=int, default=0, help='Reanuda la pasada de filas tras este id.')
+        parser.add_argument(
+            '--min-age', type=int, default=3600,
+            help='Ignora archivos modificados hace menos de N segundos (subidas aún sin confirmar).',
+        )
+        parser.add_argument(
+            '--include-unlinked', action='store_true',
+            help='Recolecta también las filas sin external_id (por defecto se conservan: pueden ser subidas en curso).',
+        )
+        parser.add_argument(
+            '--unlinked-min-age', type=int, default=86400,
+            help='Con --include-unlinked, solo filas sin external_id creadas hace más de N segundos.',
+        )
+
+    def handle(self, *args, **options):
+        self.dry_run = options['dry_run']
+        self.quarantine = options['quarantine']
+        self.batch_size = options['batch_size']
+        self.sleep = options['sleep']
+        self.unlinked_cutoff = None
+        if options['include_unlinked']:
+            self.unlinked_cutoff = timezone.now() - timedelta(seconds=options['unlinked_min_age'])
+        if self.batch_size <= 0:
+            raise CommandError("--batch-size debe ser mayor que 0.")
+        if self.quarantine and not self.dry_run:
+            os.makedirs(self.quarantine, exist_ok=True)
+
+        self.stdout.write("Ejecutando gc_media" + (" (dry-run)..." if self.dry_run else "..."))
+        if options['only'] != 'files':
+            self.collect_rows(options['start_after_id'], options['max_batches'])
+        if options['only'] != 'rows':
+            self.collect_files(options['min_age'])
+        self.stdout.write(self.style.SUCCESS("✅ gc_media completado."))
+
+    # --- Filas sin entidad ---
+
+    def collect_rows(self, start_after_id, max_batches):
+        """
+        Recorre 'images' por rangos de id y elimina las filas cuya entidad (type, external_id) no existe.
+        Cada lote hace una consulta `id IN (...)` por tabla referenciada. Las filas sin external_id
+        no apuntan a ninguna entidad todavía y solo se tratan como huérfanas con --include-unlinked.
+        """
+        last_id = start_after_id
+        batches = orphans = unlinked = 0
+        while max_batches is None or batches < max_batches:
+            batch = list(Image.objects.filter(id__gt=last_id).order_by('id')[:self.batch_size])
+            if not batch:
+                last_id = None
+                break
+            last_id = batch[-1].id
+            batches += 1
+
+            owners = resolve_image_owners(batch)
+            orphan_rows = []
+            for image in batch:
+                if image.id in owners:
+                    continue
+                if image.external_id is None and not self.is_old_unlinked(image):
+                    unlinked += 1
+                    continue
+                orphan_rows.append(image)
+            for image in orphan_rows:
+                self.stdout.write(f"Fila huérfana: images.id={image.id} {image.type} external_id={image.external_id} url={image.url}")
+            if orphan_rows and not self.dry_run:
+                if self.quarantine:
+                    self.quarantine_rows(orphan_rows)
+                usage = UsageDelta()
+                with transaction.atomic():
+                    Image.objects.filter(id__in=[image.id for image in orphan_rows]).delete()
+                    for image in orphan_rows:
+                        usage.remove(image.owner_id, image.size_bytes)
+                    usage.apply()
+                for image in orphan_rows:
+                    path = locate_image_file(None, image.url) if image.url else None
+                    if path:
+                        self.discard_file(path)
+            orphans += len(orphan_rows)
+            self.throttle()
+
+        self.stdout.write(self.style.NOTICE(f"Filas huérfanas: {orphans} en {batches} lotes."))
+        if unlinked:
+            self.stdout.write(f"Filas sin external_id conservadas: {unlinked}.")
+        if last_id is not None:
+            self.stdout.write(self.style.WARNING(f"Pasada de filas incompleta, reanudar con --start-after-id {last_id}"))
+
+    def is_old_unlinked(self, image):
+        """Si una fila sin external_id se puede recolectar: solo con --include-unlinked y si es antigua."""
+        return self.unlinked_cutoff is not None and image.created_at < self.unlinked_cutoff
+
+    def quarantine_rows(self, rows):
+        with open(os.path.join(self.quarantine, 'images.jsonl'), 'a', encoding='utf-8') as dump:
+            for image in rows:
+                dump.write(json.dumps({
+                    'id': image.id,
+                    'name': image.name,
+                    'url': image.url,
+                    'type': image.type,
+                    'external_id': image.external_id,
+                    'created_at': image.created_at.isoformat(),
+                }) + "\n")
+
+    # --- Archivos sin fila ---
+
+    def iter_files(self, min_age):
+        """
+        Recorre los archivos del backend configurado en streaming, sin cargar el árbol completo en
+        memoria. El backend solo devuelve archivos de imagen (carpetas de usuario o del layout con
+        hash); los archivos de la raíz (banner, __init__.py) se ignoran.
+        """
+        cutoff = time.time() - min_age
+        for stored in get_image_storage().iter_files():
+            if stored.mtime < cutoff:
+                yield stored
+
+    def collect_files(self, min_age):
+        scanned = orphans = 0
+        batch = []
+        for entry in self.iter_files(min_age):
+            batch.append(entry)
+            if len(batch) >= self.batch_size:
+                orphans += self.collect_file_batch(batch)
+                scanned += len(batch)
+                batch = []
+                self.throttle()
+        if batch:
+            orphans += self.collect_file_batch(batch)
+            scanned += len(batch)
+        self.stdout.write(self.style.NOTICE(f"Archivos huérfanos: {orphans} de {scanned} revisados."))
+
+    def collect_file_batch(self, entries):
+        referenced = set(
+            Image.objects.filter(url__in=[entry.name for entry in entries]).values_list('url', flat=True)
+        )
+        orphans = [entry for entry in entries if entry.name not in referenced]
+        for entry in orphans:
+            self.stdout.write(f"Archivo huérfano: {entry.location}")
+            self.discard_file(entry.location)
+        return len(orphans)
+
+    # --- Utilidades ---
+
+    def discard_file(self, path):
+        if self.dry_run:
+            return
+        try:
+            if self.quarantine:
+                relative = os.path.relpath(path, settings.MEDIA_IMG_PATH)
+                if relative.startswith(os.pardir):
+                    # Archivo en otro volumen o backend: se conserva solo el nombre.
+                    relative = os.path.basename(path)
+                target = os.path.join(self.quarantine, relative)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                shutil.move(path, target)
+            else:
+                os.remove(path)
+        except OSError as e:
+            self.stderr.write(self.style.ERROR(f"Error al eliminar {path}: {e}"))
+
+    def throttle(self):
+        if self.sleep:
+            time.sleep(self.sleep)
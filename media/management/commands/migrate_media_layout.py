@@ -0,0 +1,99 @@
+# CF-backend/media/management/commands/migrate_media_layout.py
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from media.models.image import Image
+from media.services.image_service import resolve_image_owners
+from media.services.storage import FileSystemImageStorage, get_image_storage
+
+
+class Command(BaseCommand):
+    help = (
+        "Mueve los archivos de imagen desde el layout de origen (por defecto MEDIA_IMG_PATH/<user_id>/) "
+        "al backend configurado en MEDIA_IMG_STORAGE. Es reanudable y puede ejecutarse en caliente: "
+        "mientras dura, las lecturas buscan en ambas ubicaciones."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Solo informa, no copia ni borra nada.')
+        parser.add_argument('--from-layout', choices=['user', 'hashed'], default='user', help='Layout de origen.')
+        parser.add_argument('--from-root', action='append', dest='from_roots', help='Volumen de origen (repetible).')
+        parser.add_argument('--batch-size', type=int, default=500, help='Imágenes procesadas por lote.')
+        parser.add_argument('--sleep', type=float, default=0.0, help='Segundos de pausa entre lotes (throttling).')
+        parser.add_argument('--max-batches', type=int, default=None, help='Lotes por ejecución (modo incremental).')
+        parser.add_argument('--start-after-id', type=int, default=0, help='Reanuda la migración tras este id.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size <= 0:
+            raise CommandError("--batch-size debe ser mayor que 0.")
+        self.dry_run = options['dry_run']
+        self.source = FileSystemImageStorage(layout=options['from_layout'], roots=options['from_roots'])
+        self.target = get_image_storage()
+
+        self.stdout.write("Ejecutando migrate_media_layout" + (" (dry-run)..." if self.dry_run else "..."))
+        queryset = Image.objects.exclude(url__isnull=True).exclude(url='')
+        last_id = options['start_after_id']
+        batches = moved = skipped = missing = orphans = 0
+        while options['max_batches'] is None or batches < options['max_batches']:
+            batch = list(queryset.filter(id__gt=last_id).order_by('id')[:batch_size])
+            if not batch:
+                last_id = None
+                break
+            last_id = batch[-1].id
+            batches += 1
+
+            owners = resolve_image_owners(batch)
+            for image in batch:
+                if image.id not in owners:
+                    # Sin entidad no hay propietario; gc_media se encarga de estas filas.
+                    orphans += 1
+                    continue
+                result = self.migrate_file(image.url, owners.get(image.id))
+                if result == 'moved':
+                    moved += 1
+                elif result == 'skipped':
+                    skipped += 1
+                else:
+                    missing += 1
+                    self.stdout.write(f"Sin archivo: images.id={image.id} url={image.url}")
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ migrate_media_layout: {moved} movidos, {skipped} ya en destino, {missing} sin archivo, "
+            f"{orphans} huérfanas omitidas en {batches} lotes."
+        ))
+        if last_id is not None:
+            self.stdout.write(self.style.WARNING(f"Migración incompleta, reanudar con --start-after-id {last_id}"))
+
+    def migrate_file(self, name, user_id):
+        """
+        Copia el archivo al destino y solo entonces borra el original. El backend escribe en un
+        temporal y lo renombra con os.replace, así que un lector nunca ve un archivo a medias y
+        una interrupción deja, como mucho, una copia duplicada que la siguiente pasada resuelve.
+        """
+        if self.target.in_place(name, user_id):
+            if not self.dry_run:
+                self.remove_source(name, user_id)
+            return 'skipped'
+        source_path = self.source.locate(name, user_id, scan=True)
+        if source_path is None:
+            return 'missing'
+        if self.dry_run:
+            self.stdout.write(f"Se movería {source_path}")
+            return 'moved'
+        with open(source_path, 'rb') as stored:
+            self.target.save(name, stored.read(), user_id)
+        self.remove_source(name, user_id)
+        return 'moved'
+
+    def remove_source(self, name, user_id):
+        source_path = self.source.locate(name, user_id, scan=True)
+        target_path = self.target.locate(name, user_id, scan=True)
+        if source_path and source_path != target_path:
+            try:
+                os.remove(source_path)
+            except OSError as e:
+                self.stderr.write(self.style.ERROR(f"Error al eliminar {source_path}: {e}"))
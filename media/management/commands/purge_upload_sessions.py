@@ -0,0 +1,11 @@
+# CF-backend/media/management/commands/purge_upload_sessions.py
+from django.core.management.base import BaseCommand
+from media.services.upload_service import purge_expired_uploads
+
+
+class Command(BaseCommand):
+    help = "Elimina las sesiones de subida reanudable caducadas y sus archivos temporales."
+
+    def handle(self, *args, **options):
+        purged = purge_expired_uploads()
+        self.stdout.write(self.style.SUCCESS(f"✅ purge_upload_sessions completado: {purged} sesiones eliminadas."))
@@ -0,0 +1,96 @@
+# CF-backend/media/management/commands/reconcile_media_usage.py
+import os
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from media.models import Image, MediaUsage
+from media.services.image_service import resolve_image_owners
+from media.services.storage import get_image_storage
+
+
+class Command(BaseCommand):
+    help = (
+        "Rellena size_bytes y owner_id de las imágenes que no los tienen y corrige la deriva de los "
+        "contadores de media_usage recalculándolos desde la tabla 'images'."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Solo informa de las diferencias.')
+        parser.add_argument('--batch-size', type=int, default=500, help='Imágenes rellenadas por lote.')
+        parser.add_argument('--skip-backfill', action='store_true', help='Solo recalcula los contadores.')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] <= 0:
+            raise CommandError("--batch-size debe ser mayor que 0.")
+        self.dry_run = options['dry_run']
+        if not options['skip_backfill']:
+            self.backfill(options['batch_size'])
+        self.reconcile()
+
+    def backfill(self, batch_size):
+        """Recorre por rangos de id las filas sin tamaño o sin propietario y las completa."""
+        storage = get_image_storage()
+        queryset = Image.objects.filter(Q(size_bytes__isnull=True) | Q(owner_id__isnull=True)).exclude(url__isnull=True)
+        last_id = filled = missing = 0
+        while True:
+            batch = list(queryset.filter(id__gt=last_id).order_by('id')[:batch_size])
+            if not batch:
+                break
+            last_id = batch[-1].id
+            owners = resolve_image_owners([image for image in batch if image.owner_id is None])
+
+            changed = []
+            for image in batch:
+                if image.owner_id is None:
+                    image.owner_id = owners.get(image.id)
+                if image.size_bytes is None:
+                    location = storage.locate(image.url, image.owner_id, scan=True)
+                    if location is None:
+                        missing += 1
+                    else:
+                        image.size_bytes = os.path.getsize(location)
+                if image.owner_id is not None or image.size_bytes is not None:
+                    changed.append(image)
+            if not self.dry_run:
+                Image.objects.bulk_update(changed, ['owner_id', 'size_bytes'])
+            filled += len(changed)
+        self.stdout.write(self.style.NOTICE(f"Imágenes completadas: {filled}, sin archivo: {missing}."))
+
+    def reconcile(self):
+        expected = {
+            row['owner_id']: (row['bytes_used'] or 0, row['image_count'])
+            for row in Image.objects.exclude(owner_id__isnull=True).values('owner_id').annotate(
+                bytes_used=Sum('size_bytes'), image_count=Count('id')
+            )
+        }
+        current = {
+            usage.user_id_id: (usage.bytes_used, usage.image_count)
+            for usage in MediaUsage.objects.all()
+        }
+        CustomUser = apps.get_model(settings.AUTH_USER_MODEL)
+        existing_users = set(CustomUser.objects.filter(id__in=set(expected) | set(current)).values_list('id', flat=True))
+
+        drifted = 0
+        for user_id in sorted(existing_users):
+            if expected.get(user_id, (0, 0)) == current.get(user_id, (0, 0)):
+                continue
+            drifted += 1
+            self.stdout.write(
+                f"Usuario {user_id}: contador {current.get(user_id, (0, 0))}, real {expected.get(user_id, (0, 0))}"
+            )
+            if not self.dry_run:
+                self.fix_user(user_id)
+        self.stdout.write(self.style.SUCCESS(f"✅ reconcile_media_usage completado: {drifted} contadores con deriva."))
+
+    def fix_user(self, user_id):
+        """Recalcula el contador de un usuario con la fila bloqueada, para no perder deltas concurrentes."""
+        with transaction.atomic():
+            MediaUsage.objects.bulk_create([MediaUsage(user_id_id=user_id)], ignore_conflicts=True)
+            usage = MediaUsage.objects.select_for_update().get(user_id=user_id)
+            totals = Image.objects.filter(owner_id=user_id).aggregate(bytes_used=Sum('size_bytes'), image_count=Count('id'))
+            usage.bytes_used = totals['bytes_used'] or 0
+            usage.image_count = totals['image_count']
+            usage.save(update_fields=['bytes_used', 'image_count', 'updated_at'])
@@ -0,0 +1,35 @@
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def deduplicate_images(apps, schema_editor):
+    """
+    Elimina las filas duplicadas por (type, external_id) antes de crear el índice único.
+    Se conserva la fila más reciente (id mayor), que es la que referencia el último archivo subido.
+    """
+    Image = apps.get_model('media', 'Image')
+    duplicated = (
+        Image.objects.filter(external_id__isnull=False)
+        .values('type', 'external_id')
+        .annotate(keep_id=Max('id'), total=Count('id'))
+        .filter(total__gt=1)
+    )
+    for group in duplicated.iterator():
+        Image.objects.filter(
+            type=group['type'], external_id=group['external_id']
+        ).exclude(id=group['keep_id']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('media', '0002_alter_image_external_id_alter_image_url'),
+    ]
+
+    operations = [
+        migrations.RunPython(deduplicate_images, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='image',
+            constraint=models.UniqueConstraint(fields=('type', 'external_id'), name='images_type_external_id_uniq'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-19 04:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('media', '0004_image_placeholder'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='image',
+            name='url',
+            field=models.CharField(blank=True, db_index=True, max_length=100, null=True),
+        ),
+    ]
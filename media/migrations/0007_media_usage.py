@@ -0,0 +1,43 @@
+# Generated by Django 5.2.3 on 2026-10-19 04:50
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('media', '0006_upload_session'),
+        ('users', '0003_alter_customuser_biography'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaUsage',
+            fields=[
+                ('user_id', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('bytes_used', models.BigIntegerField(default=0)),
+                ('image_count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'media_usage',
+            },
+        ),
+        migrations.AddField(
+            model_name='image',
+            name='original_size_bytes',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='image',
+            name='owner_id',
+            field=models.BigIntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='image',
+            name='size_bytes',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -1 +1,3 @@
-from .image import Image
\ No newline at end of file
+from .image import Image
+from .upload_session import UploadSession
+from .media_usage import MediaUsage
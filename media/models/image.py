@@ -11,6 +11,12 @@ class Image(models.Model):
         `processing_status (Choice)`: Incica el status de procesamiento de la imagen y los valores que admite son [UPLOADED, PROCESSING, COMPLETED, FAILED].
         `type (Choice)`: Incica el tipo de tabla a la que tiene que esta asociada la imagen y los valores que admite son [USER, RECIPE, STEP].
         `external_id (AutoField)`: Id de la tabla externa a la que hace referencia la imagen.
+        `width (int)`: Ancho en píxeles de la imagen almacenada.
+        `height (int)`: Alto en píxeles de la imagen almacenada.
+        `placeholder (str)`: Placeholder de baja calidad (data URI WebP en base64) para pintar antes de cargar la imagen.
+        `size_bytes (int)`: Bytes que ocupa el archivo WebP almacenado (única variante en disco; el placeholder va en la fila).
+        `original_size_bytes (int)`: Bytes del archivo original subido, antes de convertirlo.
+        `owner_id (int)`: Usuario al que se le contabiliza el archivo (el que lo subió y en cuya carpeta se guarda).
         `created_at (DateTimeField)`: Fecha y hora de creación del registro, se establece automáticamente al crear el objeto.  
     Author:  
     {Jose Barreiro}
@@ -29,13 +35,19 @@ class Image(models.Model):
         max_length=15,
         choices=ImageType.choices
     )
-    url = models.CharField(max_length=100, null=True, blank=True)
+    url = models.CharField(max_length=100, null=True, blank=True, db_index=True)
     processing_status = models.CharField(
         max_length=15,
         choices=ImageStatus.choices,
         default="uploaded"
     )
     external_id = models.BigIntegerField(null=True, blank=True)
+    width = models.PositiveIntegerField(null=True, blank=True)
+    height = models.PositiveIntegerField(null=True, blank=True)
+    placeholder = models.TextField(null=True, blank=True)
+    size_bytes = models.BigIntegerField(null=True, blank=True)
+    original_size_bytes = models.BigIntegerField(null=True, blank=True)
+    owner_id = models.BigIntegerField(null=True, blank=True, db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -44,5 +56,9 @@ class Image(models.Model):
         Esta clase define el nombre de la tabla en la base de datos.  
         Args:  
             db_table (str): Nombre de la tabla en la base de datos, en este caso 'images'.
+            constraints (list): Índice único compuesto sobre (type, external_id), cada entidad tiene una sola imagen.
         """
-        db_table = 'images'
\ No newline at end of file
+        db_table = 'images'
+        constraints = [
+            models.UniqueConstraint(fields=['type', 'external_id'], name='images_type_external_id_uniq'),
+        ]
\ No newline at end of file
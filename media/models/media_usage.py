@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.db import models
+
+
+class MediaUsage(models.Model):
+    """Modelo de MediaUsage, contador incremental del espacio de imágenes que ocupa cada usuario.
+
+    Se actualiza en la misma transacción que crea, reemplaza o borra la fila `Image`
+    (ver `media.services.usage_service`), y `manage.py reconcile_media_usage` corrige la deriva.
+
+    Args:
+        models (Model): Clase base de Django para modelos.
+    Attributes:
+        `user_id (OneToOneField)`: Usuario propietario, es la clave primaria.
+        `bytes_used (int)`: Bytes almacenados de todas sus imágenes.
+        `image_count (int)`: Número de imágenes almacenadas.
+        `updated_at (DateTimeField)`: Fecha y hora de la última actualización del contador.
+    """
+    user_id = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True)
+    bytes_used = models.BigIntegerField(default=0)
+    image_count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        """
+        Meta clase para definir metadatos del modelo MediaUsage.
+        Args:
+            db_table (str): Nombre de la tabla en la base de datos, en este caso 'media_usage'.
+        """
+        db_table = 'media_usage'
@@ -0,0 +1,54 @@
+import uuid
+
+from django.conf import settings
+from django.db import models
+
+from .image import Image
+
+
+class UploadSession(models.Model):
+    """Modelo de UploadSession, representa una subida de imagen reanudable por trozos.
+
+    Args:
+        models (Model): Clase base de Django para modelos.
+    Attributes:
+        `id (UUIDField)`: Identificador de la sesión, no adivinable porque forma parte de la URL de subida.
+        `user_id (ForeignKey)`: Usuario que inicia la subida.
+        `filename (str)`: Nombre original del archivo, se usa para validar la extensión.
+        `type (Choice)`: Tipo de entidad a la que se asociará la imagen [USER, RECIPE, STEP].
+        `external_id (int)`: Id de la entidad a la que se asociará la imagen.
+        `total_size (int)`: Tamaño total del archivo en bytes, declarado al crear la sesión.
+        `received_bytes (int)`: Bytes contiguos recibidos desde el inicio; es el offset desde el que reanudar.
+        `status (Choice)`: Estado de la sesión [PENDING, COMPLETED, ABORTED].
+        `expires_at (DateTimeField)`: A partir de esta fecha la sesión y su archivo temporal se pueden purgar.
+        `created_at (DateTimeField)`: Fecha y hora de creación del registro.
+        `updated_at (DateTimeField)`: Fecha y hora del último trozo recibido.
+    """
+    class UploadStatus(models.TextChoices):
+        PENDING = 'PENDING', 'Pending'
+        COMPLETED = 'COMPLETED', 'Completed'
+        ABORTED = 'ABORTED', 'Aborted'
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user_id = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    filename = models.CharField(max_length=255)
+    type = models.CharField(max_length=15, choices=Image.ImageType.choices)
+    external_id = models.BigIntegerField()
+    total_size = models.BigIntegerField()
+    received_bytes = models.BigIntegerField(default=0)
+    status = models.CharField(max_length=15, choices=UploadStatus.choices, default=UploadStatus.PENDING)
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        """
+        Meta clase para definir metadatos del modelo UploadSession.
+        Args:
+            db_table (str): Nombre de la tabla en la base de datos, en este caso 'upload_sessions'.
+            indexes (list): Índice sobre (status, expires_at) para purgar las sesiones caducadas.
+        """
+        db_table = 'upload_sessions'
+        indexes = [
+            models.Index(fields=['status', 'expires_at'], name='upload_sessions_expiry_idx'),
+        ]
@@ -1,3 +1,4 @@
 from .image_serializer import ImageListSerializer
 from .image_serializer import ImageAdminSerializer
-from .image_serializer import ImageWriteSerializer
\ No newline at end of file
+from .image_serializer import ImageWriteSerializer
+from .upload_serializer import UploadSessionSerializer
@@ -25,6 +25,12 @@ class ImageAdminSerializer(serializers.ModelSerializer):
             'processing_status',
             'processing_status_display',
             'external_id',
+            'width',
+            'height',
+            'placeholder',
+            'size_bytes',
+            'original_size_bytes',
+            'owner_id',
             'created_at',
         ]
         read_only_fields = fields
@@ -48,7 +54,8 @@ class ImageWriteSerializer(serializers.ModelSerializer):
 
 """ ------------------------------------------------------------------------------
  Serializer de lectura simplificado para vistas en lista (por ejemplo, tarjetas).
- Muestra solo los campos mínimos necesarios para representar una imagen.
+ Muestra solo los campos mínimos necesarios para representar una imagen, junto con
+ sus dimensiones y el placeholder para poder pintarla antes de descargarla.
  Ideal para vistas tipo "galería" o listados con rendimiento optimizado.
  ------------------------------------------------------------------------------"""
 class ImageListSerializer(serializers.ModelSerializer):
@@ -59,6 +66,9 @@ class ImageListSerializer(serializers.ModelSerializer):
             'url',
             'type',
             'external_id',
-            'processing_status'
+            'processing_status',
+            'width',
+            'height',
+            'placeholder'
         ]
         read_only_fields = fields
@@ -0,0 +1,54 @@
+from django.conf import settings
+from django.forms import ValidationError
+from rest_framework import serializers
+from rest_framework.exceptions import PermissionDenied
+from media.models.upload_session import UploadSession
+from media.services.image_service import forbidden_image_targets, validate_extension
+
+""" ------------------------------------------------------------------------------
+ Serializer de las sesiones de subida reanudable.
+ Al crear solo se indican el archivo, la entidad destino y el tamaño total; el
+ offset (`received_bytes`) y el estado los gestiona el servidor.
+ ------------------------------------------------------------------------------"""
+class UploadSessionSerializer(serializers.ModelSerializer):
+    external_id = serializers.IntegerField(required=False)
+
+    class Meta:
+        model = UploadSession
+        fields = [
+            'id',
+            'filename',
+            'type',
+            'external_id',
+            'total_size',
+            'received_bytes',
+            'status',
+            'expires_at',
+        ]
+        read_only_fields = ['id', 'received_bytes', 'status', 'expires_at']
+
+    def validate_filename(self, value):
+        try:
+            validate_extension(value)
+        except ValidationError as e:
+            raise serializers.ValidationError(e.messages[0])
+        return value
+
+    def validate_total_size(self, value):
+        if value <= 0:
+            raise serializers.ValidationError("El tamaño debe ser mayor que 0.")
+        if value > settings.MEDIA_UPLOAD_MAX_BYTES:
+            raise serializers.ValidationError(f"El archivo supera el máximo de {settings.MEDIA_UPLOAD_MAX_BYTES} bytes.")
+        return value
+
+    def validate(self, attrs):
+        user = self.context['request'].user
+        # La imagen de perfil siempre pertenece al usuario que sube, como en UserImageUpdateView.
+        if attrs.get('type') == 'USER':
+            attrs['external_id'] = user.id
+        elif attrs.get('external_id') is None:
+            raise serializers.ValidationError({'external_id': "Este campo es obligatorio."})
+        # La receta o el paso deben ser del usuario: se comprueba antes de recibir ningún byte.
+        elif forbidden_image_targets(user, [(attrs['type'], attrs['external_id'])]):
+            raise PermissionDenied(f"No puedes subir imágenes a: {attrs['type']} {attrs['external_id']}")
+        return attrs
@@ -0,0 +1,66 @@
+"""
+Codificación de imágenes a WebP sin dependencias de Django.
+
+Este módulo se ejecuta dentro de los procesos del pool de imágenes (ver `image_service`),
+por lo que solo debe importar Pillow y la librería estándar.
+"""
+import base64
+import io
+
+from PIL import Image as PILImage
+
+# Lado máximo (px) y calidad del placeholder LQIP que se incrusta en las respuestas.
+PLACEHOLDER_SIZE = 16
+PLACEHOLDER_QUALITY = 30
+
+
+def build_placeholder(image):
+    """
+    Genera un placeholder de baja calidad (LQIP) como data URI WebP en base64.
+
+    Args:
+        image (PIL.Image.Image): Imagen ya decodificada.
+
+    Returns:
+        str: Data URI de unos pocos cientos de bytes, listo para usar como `src`.
+    """
+    thumbnail = image.copy()
+    thumbnail.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE))
+    output = io.BytesIO()
+    thumbnail.save(output, format="WEBP", quality=PLACEHOLDER_QUALITY)
+    return "data:image/webp;base64," + base64.b64encode(output.getvalue()).decode('ascii')
+
+
+def describe_image(data):
+    """
+    Calcula ancho, alto y placeholder de una imagen ya almacenada, sin volver a codificarla.
+
+    Returns:
+        dict: Claves `width`, `height` y `placeholder`.
+    """
+    image = PILImage.open(io.BytesIO(data))
+    return {'width': image.width, 'height': image.height, 'placeholder': build_placeholder(image)}
+
+
+def encode_image(data):
+    """
+    Decodifica los bytes de una imagen, los vuelve a codificar como WebP y calcula sus metadatos.
+
+    Args:
+        data (bytes): Contenido original del archivo subido.
+
+    Returns:
+        dict: `data` (bytes WebP), `width`, `height` y `placeholder`.
+    """
+    image = PILImage.open(io.BytesIO(data))
+    # Convierte a RGB si no lo está, ya que WebP típicamente no soporta RGBA para guardar
+    if image.mode == 'RGBA':
+        image = image.convert('RGB')
+    output = io.BytesIO()
+    image.save(output, format="WEBP")
+    return {
+        'data': output.getvalue(),
+        'width': image.width,
+        'height': image.height,
+        'placeholder': build_placeholder(image),
+    }
@@ -1,8 +1,15 @@
-import os
-import uuid
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from django.apps import apps
 from django.conf import settings
-from PIL import Image as PILImage
+from django.db import connection, transaction
+from django.db.models import Q
 from media.models import Image
+from media.services.image_codec import encode_image
+from media.services.storage import get_image_storage
+from media.services.usage_service import MediaQuotaExceeded, UsageDelta, check_quota
+from media.signals import images_changed
 from django.forms import ValidationError
 
 import logging
@@ -19,39 +26,294 @@ def validate_extension(filename):
         raise ValidationError(f"Formato de imagen no permitido: .{ext}")
 
 
+def validate_image_file(image_file):
+    """
+    Valida un archivo subido antes de decodificarlo: extensión permitida y tamaño máximo de subida
+    (`MEDIA_UPLOAD_MAX_BYTES`). Lanza ValidationError.
+    """
+    validate_extension(image_file.name)
+    if image_file.size > settings.MEDIA_UPLOAD_MAX_BYTES:
+        raise ValidationError(f"El archivo supera el máximo de {settings.MEDIA_UPLOAD_MAX_BYTES} bytes.")
+
+
+def locate_image_file(user_id, filename):
+    """
+    Devuelve la ruta en disco de `filename`, o None si no existe.
+
+    Delega en el backend de `MEDIA_IMG_STORAGE`: primero la ubicación del layout configurado,
+    después la carpeta histórica MEDIA_IMG_PATH/<user_id>/ y, por último, el resto de carpetas
+    de usuario (por ejemplo, si el archivo lo subió un admin editando una receta ajena).
+    """
+    return get_image_storage().locate(filename, user_id, scan=True)
+
+
 def remove_image_file(user_id, filename):
     if not filename:
         logger.warning("No se proporcionó nombre de archivo para remove_image_file, omitiendo.")
         return
-    # Asumiendo que 'filename' es solo el nombre único del archivo, y la ruta se construye
-    # con 'MEDIA_IMG_PATH / user_id / filename'
-    path = os.path.join(settings.MEDIA_IMG_PATH, str(user_id), filename)
-    if os.path.exists(path):
-        try:
-            os.remove(path)
-        except OSError as e:
-            logger.error(f"Error al eliminar archivo {path}: {e}", exc_info=True)
+    # 'filename' es solo el nombre único del archivo; el backend resuelve dónde está guardado.
+    # Siempre es un nombre leído de 'images' o recién generado, así que puede buscarse en las
+    # carpetas de todos los usuarios.
+    try:
+        get_image_storage().delete(filename, user_id, scan=True)
+    except OSError as e:
+        logger.error(f"Error al eliminar archivo {filename}: {e}", exc_info=True)
+
+
+def entity_owners(targets):
+    """
+    Obtiene el usuario propietario de las entidades a las que apuntan unas imágenes, con una
+    consulta por tipo: USER es el propio usuario, RECIPE el autor de la receta y STEP el autor de
+    la receta del paso.
+
+    Args:
+        targets (iterable): Pares (type, external_id).
+
+    Returns:
+        dict: {(type, external_id): user_id} solo para las entidades que existen.
+    """
+    external_ids = {image_type: set() for image_type in Image.ImageType.values}
+    for image_type, external_id in targets:
+        if external_id is not None and image_type in external_ids:
+            external_ids[image_type].add(external_id)
+
+    owners = {}
+    if external_ids[Image.ImageType.USER]:
+        CustomUser = apps.get_model(settings.AUTH_USER_MODEL)
+        for user_id in CustomUser.objects.filter(id__in=external_ids[Image.ImageType.USER]).values_list('id', flat=True):
+            owners[(Image.ImageType.USER.value, user_id)] = user_id
+    if external_ids[Image.ImageType.RECIPE]:
+        Recipe = apps.get_model(settings.AUTH_RECIPE_MODEL)
+        for recipe_id, user_id in Recipe.objects.filter(id__in=external_ids[Image.ImageType.RECIPE]).values_list('id', 'user_id'):
+            owners[(Image.ImageType.RECIPE.value, recipe_id)] = user_id
+    if external_ids[Image.ImageType.STEP]:
+        Step = apps.get_model(settings.AUTH_STEP_MODEL)
+        for step_id, user_id in Step.objects.filter(id__in=external_ids[Image.ImageType.STEP]).values_list('id', 'recipe__user_id'):
+            owners[(Image.ImageType.STEP.value, step_id)] = user_id
+    return owners
+
+
+def resolve_image_owners(images):
+    """
+    Obtiene el usuario propietario (carpeta en disco) de cada imagen. Las imágenes se enlazan por
+    (type, external_id) y no guardan el usuario, así que se resuelve a través de la entidad
+    (ver `entity_owners`).
+
+    Returns:
+        dict: {image.id: user_id} solo para las imágenes cuya entidad existe.
+    """
+    owners = entity_owners((image.type, image.external_id) for image in images)
+    resolved = {}
+    for image in images:
+        user_id = owners.get((image.type, image.external_id))
+        if user_id is not None:
+            resolved[image.id] = user_id
+    return resolved
+
+
+def forbidden_image_targets(user, targets):
+    """
+    Pares (type, external_id) en los que `user` no puede escribir imágenes: la entidad no existe o
+    es de otro usuario. El staff puede escribir en cualquier entidad existente.
+    """
+    owners = entity_owners(targets)
+    return [
+        (image_type, external_id)
+        for image_type, external_id in targets
+        if (image_type, external_id) not in owners
+        or not (user.is_staff or owners[(image_type, external_id)] == user.id)
+    ]
+
+
+def write_image_bytes(data, user_id):
+    """
+    Guarda los bytes WebP ya codificados con un nombre <uuid>.webp en el backend configurado.
+
+    Returns:
+        str: Nombre del archivo generado.
+    """
+    storage = get_image_storage()
+    new_filename = storage.generate_name()
+    storage.save(new_filename, data, user_id)
+    return new_filename
 
 
 def save_file_to_disk(image_file, user_id):
+    """
+    Codifica el archivo subido a WebP y lo escribe en la carpeta del usuario.
+
+    Returns:
+        tuple: (str, dict) nombre del archivo y metadatos (`width`, `height`, `placeholder`,
+        `size_bytes`, `original_size_bytes` y `owner_id`).
+    """
     try:
-        folder = os.path.join(settings.MEDIA_IMG_PATH, str(user_id))
-        os.makedirs(folder, exist_ok=True)
-
-        new_filename = f"{uuid.uuid4()}.webp"
-        full_path = os.path.join(folder, new_filename)
-
-        image = PILImage.open(image_file)
-        # Convierte a RGB si no lo está, ya que WebP típicamente no soporta RGBA para guardar
-        if image.mode == 'RGBA':
-            image = image.convert('RGB')
-        image.save(full_path, format="WEBP")
-        return new_filename
+        encoded = encode_image(image_file.read())
+        data = encoded.pop('data')
+        encoded.update(size_bytes=len(data), original_size_bytes=image_file.size, owner_id=user_id)
+        return write_image_bytes(data, user_id), encoded
     except Exception as e:
         logger.error(f"Error en save_file_to_disk para {image_file.name}: {e}", exc_info=True)
         raise # Vuelve a lanzar la excepción para que sea capturada por el try-except principal
 
 
+class StaleImageRows(Exception):
+    """Otra transacción insertó o reemplazó alguna de las filas entre la lectura y el upsert."""
+
+
+def save_image_rows(images, update_fields):
+    """
+    Inserta o reemplaza filas `Image` por su clave (type, external_id) y devuelve las que había.
+
+    En PostgreSQL es una sola sentencia `INSERT ... ON CONFLICT (type, external_id) DO UPDATE ...
+    RETURNING` cuyo CTE lee las filas anteriores, así que el archivo y el tamaño devueltos son los que
+    se reemplazan de verdad. Si otra transacción inserta o reemplaza la misma clave después de esa
+    lectura, la fila no se actualiza (`StaleImageRows`) y se repite una vez en una transacción nueva:
+    la segunda lectura ya ve la fila y su tamaño no se cuenta dos veces.
+
+    Args:
+        images (list[Image]): Filas nuevas (sin pk); al volver, todas tienen la pk guardada.
+        update_fields (list[str]): Campos que se sobrescriben en las filas existentes.
+
+    Returns:
+        dict: {(type, external_id): {'id', 'url', 'size_bytes', 'owner_id'}} de las filas reemplazadas.
+    """
+    for image in images:
+        image.external_id = int(image.external_id)
+    upsert = _upsert_image_rows_returning if connection.vendor == 'postgresql' else _upsert_image_rows
+    for attempt in range(2):
+        for image in images:
+            image.pk = None
+        try:
+            with transaction.atomic():
+                return upsert(images, update_fields)
+        except StaleImageRows:
+            if attempt:
+                raise
+
+
+def _upsert_image_rows_returning(images, update_fields):
+    """
+    Upsert de PostgreSQL en una sentencia. `previous` lee las filas existentes con la instantánea
+    de la sentencia y `DO UPDATE` solo reemplaza la misma versión de la fila (`ctid`): si otra
+    transacción la ha cambiado o insertado después, no se devuelve y se lanza `StaleImageRows`.
+    """
+    quote = connection.ops.quote_name
+    table = quote(Image._meta.db_table)
+    fields = [field for field in Image._meta.concrete_fields if not field.primary_key]
+    updated = [Image._meta.get_field(name).column for name in update_fields]
+    sql = f"""
+        WITH previous AS (
+            SELECT ctid AS version, id, type, external_id, url, size_bytes, owner_id
+            FROM {table}
+            WHERE (type, external_id) IN ({', '.join(['(%s, %s)'] * len(images))})
+        ), saved AS (
+            INSERT INTO {table} AS existing ({', '.join(quote(field.column) for field in fields)})
+            VALUES {', '.join([f"({', '.join(['%s'] * len(fields))})"] * len(images))}
+            ON CONFLICT (type, external_id) DO UPDATE
+            SET {', '.join(f'{quote(column)} = EXCLUDED.{quote(column)}' for column in updated)}
+            WHERE EXISTS (SELECT 1 FROM previous WHERE previous.version = existing.ctid)
+            RETURNING id, type, external_id
+        )
+        SELECT saved.id, saved.type, saved.external_id, previous.id, previous.url, previous.size_bytes, previous.owner_id
+        FROM saved LEFT JOIN previous ON previous.id = saved.id
+    """
+    params = [value for image in images for value in (image.type, image.external_id)]
+    params += [field.get_db_prep_save(field.pre_save(image, True), connection) for image in images for field in fields]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+    if len(rows) != len(images):
+        raise StaleImageRows()
+
+    saved = {}
+    previous = {}
+    for pk, image_type, external_id, previous_id, url, size_bytes, owner_id in rows:
+        saved[(image_type, external_id)] = pk
+        if previous_id is not None:
+            previous[(image_type, external_id)] = {
+                'id': previous_id, 'type': image_type, 'external_id': external_id,
+                'url': url, 'size_bytes': size_bytes, 'owner_id': owner_id,
+            }
+    for image in images:
+        image.pk = saved[(image.type, image.external_id)]
+    return previous
+
+
+def _upsert_image_rows(images, update_fields):
+    """
+    Upsert para el resto de bases de datos (SQLite en los tests): lectura de las filas anteriores y
+    `bulk_create` con `update_conflicts`. SQLite serializa las escrituras, así que otra transacción
+    no puede reemplazar la fila entre las dos sentencias sin que una de ellas falle.
+    """
+    lookup = Q()
+    for image in images:
+        lookup |= Q(type=image.type, external_id=image.external_id)
+    previous = {
+        (row['type'], row['external_id']): row
+        for row in Image.objects.filter(lookup).values('id', 'type', 'external_id', 'url', 'size_bytes', 'owner_id')
+    }
+    Image.objects.bulk_create(
+        images,
+        update_conflicts=True,
+        unique_fields=['type', 'external_id'],
+        update_fields=update_fields,
+    )
+    return previous
+
+
+def upsert_image(external_id, image_type, filename, processing_status=Image.ImageStatus.COMPLETED, **metadata):
+    """
+    Inserta o reemplaza la imagen asociada a (type, external_id) con `save_image_rows`.
+    `metadata` admite los campos calculados al procesar la imagen (`width`, `height`, `placeholder`,
+    `size_bytes`, `original_size_bytes`, `owner_id`). El contador de uso de los propietarios
+    afectados se actualiza en la misma transacción.
+
+    Returns:
+        tuple: (Image, str | None) la imagen guardada y el nombre del archivo que reemplaza, si existía.
+    """
+    image_obj = Image(
+        name=filename,
+        url=filename,
+        external_id=external_id,
+        type=image_type,
+        processing_status=processing_status,
+        **metadata,
+    )
+    usage = UsageDelta()
+    with transaction.atomic():
+        previous = save_image_rows([image_obj], ['name', 'url', 'processing_status', *metadata])
+        previous = previous.get((image_obj.type, image_obj.external_id))
+        images_changed.send(sender=Image, images=[(image_type, image_obj.external_id)])
+        if previous:
+            usage.remove(previous['owner_id'], previous['size_bytes'])
+        usage.add(image_obj.owner_id, image_obj.size_bytes)
+        usage.apply()
+    return image_obj, previous['url'] if previous else None
+
+
+def delete_image(image_obj, user_id):
+    """
+    Borra la fila de la imagen, descuenta su tamaño del uso del propietario y elimina el archivo.
+    """
+    usage = UsageDelta()
+    with transaction.atomic():
+        image_obj.delete()
+        usage.remove(image_obj.owner_id, image_obj.size_bytes)
+        usage.apply()
+    remove_image_file(user_id, image_obj.url)
+
+
+def images_by_external_id(image_type, external_ids):
+    """
+    Devuelve {external_id: Image} de las imágenes del tipo dado en una sola consulta, para
+    serializar listas sin una consulta por fila.
+    """
+    external_ids = [external_id for external_id in set(external_ids) if external_id is not None]
+    if not external_ids:
+        return {}
+    return {image.external_id: image for image in Image.objects.filter(type=image_type, external_id__in=external_ids)}
+
+
 def update_image_for_instance(image_file, user_id, external_id, image_type):
     """
     Actualiza el archivo de una imagen ya existente. Si no existe, la crea.
@@ -60,33 +322,244 @@ def update_image_for_instance(image_file, user_id, external_id, image_type):
         logger.warning("No se proporcionó image_file a update_image_for_instance. Retornando None.")
         return None
 
+    # Antes de decodificar: si se supera la cuota no se gasta CPU en la imagen.
+    check_quota(user_id)
     try:
         validate_extension(image_file.name)
-        new_filename = save_file_to_disk(image_file, user_id)
-
+        new_filename, metadata = save_file_to_disk(image_file, user_id)
         try:
-            image_obj = Image.objects.get(external_id=external_id, type=image_type)
-            # Borra archivo anterior
-            remove_image_file(user_id, image_obj.url)
-            # Actualiza campos
-            image_obj.name = new_filename
-            image_obj.url = new_filename # URL debería ser la ruta relativa/nombre de archivo
-            image_obj.processing_status = Image.ImageStatus.COMPLETED # Usar la constante
-            image_obj.save()
-            return image_obj
-        except Image.DoesNotExist:
-            new_image_obj = Image.objects.create(
-                name=new_filename,
-                url=new_filename, # URL debería ser la ruta relativa/nombre de archivo
-                external_id=external_id,
-                type=image_type,
-                processing_status=Image.ImageStatus.COMPLETED # Usar la constante
-            )
-            return new_image_obj
+            image_obj, previous_url = upsert_image(external_id, image_type, new_filename, **metadata)
+        except Exception:
+            remove_image_file(user_id, new_filename)
+            raise
+        # Borra archivo anterior cuando se confirme la transacción (la de la vista, si la hay)
+        if previous_url and previous_url != new_filename:
+            transaction.on_commit(partial(remove_image_file, user_id, previous_url))
+        return image_obj
 
     except ValidationError as e:
         logger.error(f"Error de validación en update_image_for_instance: {e}", exc_info=True)
         raise # Vuelve a lanzar para asegurar que se propague a DRF
+    except MediaQuotaExceeded:
+        raise
     except Exception as e:
         logger.error(f"Error general en update_image_for_instance para archivo {image_file.name}: {e}", exc_info=True)
-        return None
\ No newline at end of file
+        return None
+
+
+_image_pool = None
+
+
+def get_image_pool():
+    """
+    Devuelve el pool de procesos compartido para codificar imágenes, creándolo la primera vez.
+    Su tamaño está acotado por `MEDIA_IMAGE_WORKERS`; con 1 o menos no se crea pool
+    y la codificación se hace en el propio proceso.
+    """
+    global _image_pool
+    workers = getattr(settings, 'MEDIA_IMAGE_WORKERS', 1)
+    if workers <= 1:
+        return None
+    if _image_pool is None:
+        # 'spawn' evita heredar conexiones a BD e hilos del worker de Django.
+        _image_pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+    return _image_pool
+
+
+def validate_image_batch(items):
+    """
+    Valida un lote de imágenes antes de decodificar ninguna.
+
+    Args:
+        items (list[dict]): Elementos con las claves `file`, `external_id` y `type`.
+
+    Returns:
+        list[str | None]: Un mensaje de error por elemento, o None si es válido.
+    """
+    errors = []
+    seen = set()
+    for item in items:
+        image_file = item.get('file')
+        error = None
+        if not image_file:
+            error = "Falta el archivo de imagen."
+        elif item.get('type') not in Image.ImageType.values:
+            error = f"Tipo de imagen no válido: {item.get('type')}"
+        else:
+            try:
+                validate_image_file(image_file)
+                item['external_id'] = int(item.get('external_id'))
+            except ValidationError as e:
+                error = e.messages[0]
+            except (TypeError, ValueError):
+                error = "El campo 'id' debe ser un entero."
+        if error is None:
+            key = (item['type'], item['external_id'])
+            if key in seen:
+                error = "Imagen duplicada para el mismo id y type en el lote."
+            seen.add(key)
+        errors.append(error)
+    return errors
+
+
+def encode_image_files(files, user_id):
+    """
+    Codifica a WebP un lote de archivos ya validados, en paralelo en el pool de procesos, y los
+    escribe en el backend. No toca la base de datos: se llama antes de abrir la transacción que
+    guarda las filas (`save_encoded_images`).
+
+    Args:
+        files (list[UploadedFile]): Archivos subidos.
+        user_id (int): Usuario propietario de la carpeta donde se escriben los archivos.
+
+    Returns:
+        list[tuple | None]: Por archivo, en el mismo orden, (nombre, metadatos) como
+        `save_file_to_disk`, o None si no se pudo codificar.
+    """
+    payloads = [image_file.read() for image_file in files]
+    pool = get_image_pool() if len(files) > 1 else None
+    if pool is not None:
+        futures = [pool.submit(encode_image, data) for data in payloads]
+    written = []
+    for position, image_file in enumerate(files):
+        try:
+            encoded = futures[position].result() if pool is not None else encode_image(payloads[position])
+        except Exception as e:
+            logger.error(f"Error al codificar {image_file.name}: {e}", exc_info=True)
+            written.append(None)
+            continue
+        data = encoded.pop('data')
+        encoded.update(size_bytes=len(data), original_size_bytes=image_file.size, owner_id=user_id)
+        written.append((write_image_bytes(data, user_id), encoded))
+    return written
+
+
+def encode_uploaded_images(files, user_id):
+    """
+    Valida y codifica las imágenes de una petición fuera de cualquier transacción, para que las
+    vistas solo inserten las filas dentro de la suya (`save_encoded_images`).
+
+    Args:
+        files (dict): {clave: archivo subido}.
+        user_id (int): Usuario propietario de la carpeta donde se escriben los archivos.
+
+    Returns:
+        tuple: (dict, dict) los archivos escritos {clave: (nombre, metadatos)} y los errores
+        {nombre del archivo: mensaje}. Si hay errores no queda ningún archivo escrito.
+    """
+    errors = {}
+    for image_file in files.values():
+        try:
+            validate_image_file(image_file)
+        except ValidationError as e:
+            errors[image_file.name] = e.messages[0]
+    if errors or not files:
+        return {}, errors
+
+    check_quota(user_id)
+    written = dict(zip(files, encode_image_files(list(files.values()), user_id)))
+    errors = {files[key].name: "No se pudo procesar la imagen." for key, entry in written.items() if entry is None}
+    if errors:
+        discard_encoded_images(written.values(), user_id)
+        return {}, errors
+    return written, {}
+
+
+def discard_encoded_images(written, user_id):
+    """Borra los archivos de `encode_image_files` que no han llegado a guardarse en una fila."""
+    for entry in written:
+        if entry is not None:
+            remove_image_file(user_id, entry[0])
+
+
+def save_encoded_images(entries, user_id, processing_status=Image.ImageStatus.COMPLETED):
+    """
+    Guarda en una transacción las filas `Image` de archivos ya escritos por `encode_image_files` y
+    actualiza el uso de los propietarios. Si falla, borra esos archivos. Los archivos reemplazados
+    se borran tras el commit: si la transacción de fuera se deshace, las filas vuelven a apuntar a ellos.
+
+    Args:
+        entries (list[tuple]): Tuplas (type, external_id, (nombre, metadatos)).
+        user_id (int): Usuario propietario de la carpeta de los archivos.
+        processing_status (str): Estado con el que se guardan las imágenes.
+
+    Returns:
+        list[Image]: Las imágenes guardadas, en el mismo orden.
+    """
+    usage = UsageDelta()
+    try:
+        with transaction.atomic():
+            images = [
+                Image(
+                    name=filename,
+                    url=filename,
+                    external_id=external_id,
+                    type=image_type,
+                    processing_status=processing_status,
+                    **metadata,
+                )
+                for image_type, external_id, (filename, metadata) in entries
+            ]
+            previous = save_image_rows(images, [
+                'name', 'url', 'processing_status', 'width', 'height', 'placeholder',
+                'size_bytes', 'original_size_bytes', 'owner_id',
+            ])
+            images_changed.send(sender=Image, images=[(image_obj.type, image_obj.external_id) for image_obj in images])
+            for image_obj in images:
+                replaced = previous.get((image_obj.type, image_obj.external_id))
+                if replaced:
+                    usage.remove(replaced['owner_id'], replaced['size_bytes'])
+                usage.add(image_obj.owner_id, image_obj.size_bytes)
+            usage.apply()
+    except Exception:
+        discard_encoded_images([written for _, _, written in entries], user_id)
+        raise
+
+    for image_obj in images:
+        previous_url = previous.get((image_obj.type, image_obj.external_id), {}).get('url')
+        if previous_url and previous_url != image_obj.url:
+            transaction.on_commit(partial(remove_image_file, user_id, previous_url))
+    return images
+
+
+def process_image_batch(items, user_id, processing_status=Image.ImageStatus.COMPLETED):
+    """
+    Procesa un lote de imágenes: valida todas por adelantado, las codifica a WebP en paralelo
+    en el pool de procesos y guarda todas las filas `Image` en una única transacción.
+
+    Args:
+        items (list[dict]): Elementos con las claves `file`, `external_id` y `type`.
+        user_id (int): Usuario propietario de la carpeta donde se escriben los archivos.
+        processing_status (str): Estado con el que se guardan las imágenes.
+
+    Returns:
+        list[dict]: Un resultado por elemento, en el mismo orden, con `index`, `external_id`,
+        `type`, `image` (Image o None) y `error` (str o None).
+    """
+    errors = validate_image_batch(items)
+    results = [
+        {'index': index, 'external_id': item.get('external_id'), 'type': item.get('type'), 'image': None, 'error': error}
+        for index, (item, error) in enumerate(zip(items, errors))
+    ]
+    valid = [index for index, error in enumerate(errors) if error is None]
+    if not valid:
+        return results
+
+    check_quota(user_id)
+    written = {}
+    for index, entry in zip(valid, encode_image_files([items[index]['file'] for index in valid], user_id)):
+        if entry is None:
+            results[index]['error'] = "No se pudo procesar la imagen."
+        else:
+            written[index] = entry
+    if not written:
+        return results
+
+    images = save_encoded_images(
+        [(items[index]['type'], items[index]['external_id'], entry) for index, entry in written.items()],
+        user_id,
+        processing_status,
+    )
+    for index, image_obj in zip(written, images):
+        results[index]['image'] = image_obj
+    return results
@@ -0,0 +1,380 @@
+"""
+Almacenamiento de los archivos de imagen.
+
+Abstrae dónde viven físicamente los archivos WebP para que el resto del servicio de imágenes
+solo trabaje con el nombre (`Image.url`) y el usuario propietario. Se configura con el setting
+`MEDIA_IMG_STORAGE`:
+
+    MEDIA_IMG_STORAGE = {
+        'BACKEND': 'media.services.storage.FileSystemImageStorage',
+        'OPTIONS': {'layout': 'hashed', 'roots': ['/mnt/media-a/img', '/mnt/media-b/img']},
+    }
+
+Layouts disponibles para el sistema de archivos:
+    - `user`: MEDIA_IMG_PATH/<user_id>/<nombre> (layout histórico, por defecto).
+    - `hashed`: <volumen>/<ab>/<cd>/<nombre>, con dos niveles derivados del hash del nombre para
+      que ningún directorio crezca sin límite. El volumen se elige por hashing consistente, de
+      modo que añadir uno nuevo solo reubica una fracción de los archivos.
+
+Mientras dura la migración de layout (`manage.py migrate_media_layout`), las lecturas y borrados
+buscan primero en la ubicación nueva y después en la histórica, así que puede hacerse en caliente.
+La URL pública no depende del layout: sigue siendo MEDIA_URL/img/<user_id>/<nombre> y la sirve
+`media.views.imageFileView.serve_image_file` localizando el archivo a través del backend.
+"""
+import bisect
+import hashlib
+import os
+import re
+import uuid
+from collections import namedtuple
+from urllib.parse import quote, unquote
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import Storage
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+StoredFile = namedtuple('StoredFile', ['name', 'location', 'mtime', 'size'])
+
+# Nombres que genera `ImageStorage.generate_name`.
+IMAGE_NAME_RE = re.compile(r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\.webp$')
+
+
+def is_image_name(name):
+    """Si `name` tiene la forma <uuid>.webp de los archivos de imagen."""
+    return bool(IMAGE_NAME_RE.match(name))
+
+
+def _hash(value):
+    return hashlib.md5(value.encode('utf-8')).hexdigest()
+
+
+class ConsistentHashRing:
+    """
+    Anillo de hashing consistente con nodos virtuales para repartir nombres entre volúmenes.
+
+    Args:
+        nodes (list[str]): Volúmenes (rutas raíz) disponibles.
+        replicas (int): Nodos virtuales por volumen, suavizan el reparto.
+    """
+
+    def __init__(self, nodes, replicas=64):
+        self._ring = sorted((int(_hash(f"{node}#{i}"), 16), node) for node in nodes for i in range(replicas))
+        self._keys = [key for key, _ in self._ring]
+
+    def get(self, name):
+        position = bisect.bisect(self._keys, int(_hash(name), 16)) % len(self._ring)
+        return self._ring[position][1]
+
+
+class UserFolderLayout:
+    """Layout histórico: <raíz>/<user_id>/<nombre>."""
+    key = 'user'
+
+    def relative_path(self, name, user_id):
+        return os.path.join(str(user_id), name)
+
+
+class HashedLayout:
+    """Layout con reparto en dos niveles: <raíz>/<ab>/<cd>/<nombre>."""
+    key = 'hashed'
+
+    def relative_path(self, name, user_id=None):
+        digest = _hash(name)
+        return os.path.join(digest[:2], digest[2:4], name)
+
+
+LAYOUTS = {layout.key: layout for layout in (UserFolderLayout, HashedLayout)}
+
+
+class ImageStorage:
+    """
+    Interfaz común de los backends de almacenamiento de imágenes.
+
+    `user_id` es el propietario del archivo; los backends que no lo necesitan lo ignoran.
+    """
+
+    def save(self, name, data, user_id):
+        raise NotImplementedError
+
+    def open(self, name, user_id=None, scan=False):
+        raise NotImplementedError
+
+    def delete(self, name, user_id=None, scan=False):
+        raise NotImplementedError
+
+    def locate(self, name, user_id=None, scan=False):
+        """
+        Devuelve la ubicación (ruta local) del archivo, o None si no existe. Con `scan`, los
+        backends que lo necesitan buscan además en todas las carpetas de usuario; es una
+        comprobación por usuario, así que solo la usan los comandos y los borrados de nombres
+        leídos de la base de datos, nunca nombres recibidos en una petición.
+        """
+        raise NotImplementedError
+
+    def relative_location(self, location):
+        """Ruta de `location` relativa a la raíz pública del backend (ver `ImageFileStorage.url`)."""
+        raise NotImplementedError
+
+    def exists(self, name, user_id=None, scan=False):
+        return self.locate(name, user_id, scan) is not None
+
+    def in_place(self, name, user_id=None):
+        """Indica si el archivo está ya en su ubicación definitiva, sin contar las de respaldo."""
+        return self.exists(name, user_id)
+
+    def iter_files(self):
+        """Recorre todos los archivos almacenados como `StoredFile`, sin cargarlos en memoria."""
+        raise NotImplementedError
+
+    def generate_name(self):
+        return f"{uuid.uuid4()}.webp"
+
+    @staticmethod
+    def _write_atomic(path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, 'wb') as output:
+            output.write(data)
+        os.replace(tmp_path, path)
+
+
+class FileSystemImageStorage(ImageStorage):
+    """
+    Backend en sistema de archivos local con uno o varios volúmenes.
+
+    Args:
+        layout (str): `user` o `hashed`.
+        roots (list[str], optional): Volúmenes raíz; por defecto [MEDIA_IMG_PATH].
+    """
+
+    def __init__(self, layout='user', roots=None):
+        self.layout = LAYOUTS[layout]()
+        self.roots = [str(root) for root in (roots or [settings.MEDIA_IMG_PATH])]
+        self.legacy_root = str(settings.MEDIA_IMG_PATH)
+        self.ring = ConsistentHashRing(self.roots)
+
+    def path(self, name, user_id):
+        """Ruta donde debe vivir `name` según el layout y el volumen configurados."""
+        return os.path.join(self.ring.get(name), self.layout.relative_path(name, user_id))
+
+    def save(self, name, data, user_id):
+        path = self.path(name, user_id)
+        self._write_atomic(path, data)
+        return path
+
+    def in_place(self, name, user_id=None):
+        return os.path.exists(self.path(name, user_id))
+
+    def open(self, name, user_id=None, scan=False):
+        path = self.locate(name, user_id, scan)
+        if path is None:
+            raise FileNotFoundError(name)
+        with open(path, 'rb') as stored:
+            return stored.read()
+
+    def delete(self, name, user_id=None, scan=False):
+        path = self.locate(name, user_id, scan)
+        if path:
+            os.remove(path)
+        return path
+
+    def locate(self, name, user_id=None, scan=False):
+        candidates = []
+        if user_id is not None or isinstance(self.layout, HashedLayout):
+            candidates.append(self.path(name, user_id))
+        if user_id is not None:
+            # Ubicación histórica, para leer archivos aún no migrados.
+            candidates.append(os.path.join(self.legacy_root, str(user_id), name))
+        for path in candidates:
+            if os.path.isfile(path):
+                return path
+        return self._scan_user_folders(name, user_id) if scan else None
+
+    def relative_location(self, location):
+        for root in dict.fromkeys([*self.roots, self.legacy_root]):
+            if os.path.commonpath([root, location]) == root:
+                return os.path.relpath(location, root)
+        raise ValueError(f"{location} no está en ningún volumen de imágenes.")
+
+    def _scan_user_folders(self, name, user_id):
+        """
+        Busca `name` en las carpetas de usuario de cada volumen. Cubre archivos escritos con
+        otro `user_id` (por ejemplo, un admin editando una receta ajena); los nombres son UUID,
+        así que no hay ambigüedad.
+        """
+        for root in dict.fromkeys([self.legacy_root, *self.roots]):
+            try:
+                entries = os.scandir(root)
+            except FileNotFoundError:
+                continue
+            with entries:
+                for entry in entries:
+                    if entry.is_dir() and entry.name.isdigit() and entry.name != str(user_id):
+                        path = os.path.join(entry.path, name)
+                        if os.path.isfile(path):
+                            return path
+        return None
+
+    def iter_files(self):
+        """
+        Recorre con os.scandir las carpetas de usuario (<raíz>/<id>/) y las del layout con hash
+        (<raíz>/<ab>/<cd>/). Los archivos sueltos en la raíz (banner, __init__.py) se ignoran.
+        """
+        for root in dict.fromkeys([self.legacy_root, *self.roots]):
+            try:
+                top_entries = os.scandir(root)
+            except FileNotFoundError:
+                continue
+            with top_entries:
+                for top in top_entries:
+                    if not top.is_dir():
+                        continue
+                    if top.name.isdigit():
+                        yield from self._iter_dir(top.path)
+                    elif len(top.name) == 2 and _is_hex(top.name):
+                        with os.scandir(top.path) as second_entries:
+                            for second in second_entries:
+                                if second.is_dir() and len(second.name) == 2 and _is_hex(second.name):
+                                    yield from self._iter_dir(second.path)
+
+    @staticmethod
+    def _iter_dir(path):
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_file() and not entry.name.endswith('.tmp'):
+                    stat = entry.stat()
+                    yield StoredFile(entry.name, entry.path, stat.st_mtime, stat.st_size)
+
+
+class LocalObjectStore(ImageStorage):
+    """
+    Sustituto local de un almacenamiento de objetos (tipo S3) para desarrollo y tests.
+
+    Guarda cada objeto como un archivo plano bajo `root` cuyo nombre es la clave codificada,
+    sin jerarquía de directorios, y solo ofrece operaciones por clave (put/get/delete/list).
+
+    Args:
+        root (str): Directorio donde se guardan los objetos.
+        prefix (str): Prefijo de las claves, equivalente al "bucket path".
+    """
+
+    def __init__(self, root, prefix='img/'):
+        self.root = str(root)
+        self.prefix = prefix
+
+    def _object_path(self, name):
+        return os.path.join(self.root, quote(self.prefix + name, safe=''))
+
+    def save(self, name, data, user_id=None):
+        path = self._object_path(name)
+        self._write_atomic(path, data)
+        return path
+
+    def open(self, name, user_id=None, scan=False):
+        with open(self._object_path(name), 'rb') as stored:
+            return stored.read()
+
+    def delete(self, name, user_id=None, scan=False):
+        path = self.locate(name)
+        if path:
+            os.remove(path)
+        return path
+
+    def locate(self, name, user_id=None, scan=False):
+        path = self._object_path(name)
+        return path if os.path.isfile(path) else None
+
+    def relative_location(self, location):
+        return unquote(os.path.basename(location))[len(self.prefix):]
+
+    def iter_files(self):
+        try:
+            entries = os.scandir(self.root)
+        except FileNotFoundError:
+            return
+        with entries:
+            for entry in entries:
+                key = unquote(entry.name)
+                if entry.is_file() and key.startswith(self.prefix) and not entry.name.endswith('.tmp'):
+                    stat = entry.stat()
+                    yield StoredFile(key[len(self.prefix):], entry.path, stat.st_mtime, stat.st_size)
+
+
+def _is_hex(value):
+    return all(char in '0123456789abcdef' for char in value)
+
+
+class ImageFileStorage(Storage):
+    """
+    Adaptador compatible con `django.core.files.storage.Storage` sobre el backend configurado.
+
+    Los nombres son los de `Image.url`; como el adaptador no conoce el usuario propietario,
+    solo es apropiado para layouts que no dependen de él (`hashed` o el almacén de objetos)
+    o para lecturas, que recurren a la búsqueda en las carpetas de usuario. `url` no busca:
+    parte de la ruta del archivo relativa a su volumen y de `base_url` (MEDIA_URL/img/ por
+    defecto, donde se publican los volúmenes).
+    """
+
+    def __init__(self, backend=None, base_url=None):
+        self.backend = backend or get_image_storage()
+        self.base_url = base_url or f"{settings.MEDIA_URL}img/"
+
+    def _open(self, name, mode='rb'):
+        return ContentFile(self.backend.open(name, scan=True), name=name)
+
+    def _save(self, name, content):
+        name = os.path.basename(name)
+        self.backend.save(name, content.read(), None)
+        return name
+
+    def delete(self, name):
+        self.backend.delete(name)
+
+    def exists(self, name):
+        return self.backend.exists(name, scan=True)
+
+    def size(self, name):
+        location = self.backend.locate(name, scan=True)
+        if location is None:
+            raise FileNotFoundError(name)
+        return os.path.getsize(location)
+
+    def path(self, name):
+        location = self.backend.locate(name, scan=True)
+        if location is None:
+            raise FileNotFoundError(name)
+        return location
+
+    def url(self, name):
+        location = self.backend.locate(name)
+        if location is None:
+            return None
+        return self.base_url + self.backend.relative_location(location).replace(os.sep, '/')
+
+
+def build_image_storage(config=None):
+    """Construye el backend a partir de un dict con las claves `BACKEND` y `OPTIONS`."""
+    config = config or getattr(settings, 'MEDIA_IMG_STORAGE', None) or {}
+    backend = import_string(config.get('BACKEND', 'media.services.storage.FileSystemImageStorage'))
+    return backend(**config.get('OPTIONS', {}))
+
+
+_image_storage = None
+
+
+def get_image_storage():
+    """Devuelve el backend configurado en `MEDIA_IMG_STORAGE`, creado una vez por proceso."""
+    global _image_storage
+    if _image_storage is None:
+        _image_storage = build_image_storage()
+    return _image_storage
+
+
+@receiver(setting_changed)
+def _reset_image_storage(*, setting, **kwargs):
+    global _image_storage
+    if setting in ('MEDIA_IMG_STORAGE', 'MEDIA_IMG_PATH', 'MEDIA_ROOT'):
+        _image_storage = None
@@ -0,0 +1,202 @@
+"""
+Subidas de imagen reanudables por trozos.
+
+Protocolo:
+    1. POST crea una `UploadSession` con el tamaño total declarado.
+    2. Cada PUT envía un rango de bytes (cabecera `Content-Range: bytes <inicio>-<fin>/<total>`)
+       que se escribe con os.pwrite en su posición del archivo temporal. Un cliente que pierde
+       la conexión consulta el offset (HEAD/GET) y continúa desde ahí.
+    3. Al finalizar, el archivo temporal se entrega al pipeline de imágenes.
+
+Así un cliente lento solo ocupa un worker durante cada trozo, no durante toda la subida.
+"""
+import logging
+import os
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+from media.models import UploadSession
+from media.services.image_service import remove_image_file, save_file_to_disk, upsert_image
+from media.services.usage_service import check_quota
+
+logger = logging.getLogger(__name__)
+
+CONTENT_RANGE_RE = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+# Tamaño de los bloques en que se copia el cuerpo de la petición al archivo temporal.
+COPY_BLOCK_SIZE = 64 * 1024
+
+
+class UploadRangeError(Exception):
+    """El rango enviado no encaja con el estado de la sesión (hueco, fuera de límites o mal formado)."""
+
+
+class UploadStateError(Exception):
+    """La sesión no admite la operación (ya finalizada, abortada o incompleta)."""
+
+
+def upload_temp_path(session):
+    return os.path.join(settings.MEDIA_UPLOAD_TMP_PATH, f"{session.pk}.part")
+
+
+def create_upload_session(user, filename, type, external_id, total_size):
+    """
+    Crea la sesión y reserva su archivo temporal con el tamaño declarado. Si el usuario ya agotó
+    su cuota se rechaza aquí, antes de recibir ningún byte.
+    """
+    check_quota(user.id)
+    session = UploadSession.objects.create(
+        user_id=user,
+        filename=filename,
+        type=type,
+        external_id=external_id,
+        total_size=total_size,
+        expires_at=timezone.now() + timedelta(seconds=settings.MEDIA_UPLOAD_SESSION_TTL),
+    )
+    os.makedirs(settings.MEDIA_UPLOAD_TMP_PATH, exist_ok=True)
+    with open(upload_temp_path(session), 'wb') as temp:
+        temp.truncate(total_size)
+    return session
+
+
+def parse_content_range(header, total_size):
+    """
+    Interpreta `Content-Range: bytes <inicio>-<fin>/<total>` (fin inclusivo).
+
+    Returns:
+        tuple: (inicio, fin) con fin exclusivo.
+    """
+    match = CONTENT_RANGE_RE.match((header or '').strip())
+    if not match:
+        raise UploadRangeError("Cabecera Content-Range no válida, se espera 'bytes <inicio>-<fin>/<total>'.")
+    start, end, total = (int(value) for value in match.groups())
+    if total != total_size:
+        raise UploadRangeError(f"El tamaño total no coincide con el de la sesión ({total_size}).")
+    if start > end or end >= total_size:
+        raise UploadRangeError("Rango fuera de los límites del archivo.")
+    return start, end + 1
+
+
+def write_chunk(session_id, user, content_range, stream):
+    """
+    Escribe un trozo en su posición del archivo temporal y avanza el offset de la sesión.
+
+    Se admite reenviar bytes ya recibidos (reintentos tras un corte), pero no dejar huecos:
+    el trozo debe empezar como mucho en `received_bytes`. Los bytes se leen del socket y se
+    escriben sin transacción ni bloqueo (un cliente lento no retiene la fila) y después el offset
+    avanza con un UPDATE condicional: solo si sigue siendo contiguo con el trozo y menor que su
+    final. Dos trozos concurrentes que se solapan escriben los mismos bytes en la misma posición.
+
+    Returns:
+        UploadSession: La sesión con el offset actualizado.
+    """
+    session = UploadSession.objects.get(pk=session_id, user_id=user)
+    if session.status != UploadSession.UploadStatus.PENDING:
+        raise UploadStateError("La subida ya no admite más datos.")
+    start, end = parse_content_range(content_range, session.total_size)
+    if start > session.received_bytes:
+        raise UploadRangeError(f"Falta el rango previo, la subida continúa en el byte {session.received_bytes}.")
+
+    position = start
+    try:
+        fd = os.open(upload_temp_path(session), os.O_WRONLY)
+    except FileNotFoundError:
+        # Finalizada o abortada mientras tanto: el archivo temporal ya no existe.
+        raise UploadStateError("La subida ya no admite más datos.")
+    try:
+        while position < end:
+            block = stream.read(min(COPY_BLOCK_SIZE, end - position))
+            if not block:
+                break
+            position += os.pwrite(fd, block, position)
+    finally:
+        os.close(fd)
+    if position != end:
+        # Cuerpo más corto que el rango declarado: se conserva solo la parte contigua.
+        logger.warning(f"Trozo incompleto en la subida {session.pk}: {position - start} de {end - start} bytes.")
+
+    UploadSession.objects.filter(
+        pk=session.pk,
+        status=UploadSession.UploadStatus.PENDING,
+        received_bytes__gte=start,
+        received_bytes__lt=position,
+    ).update(received_bytes=position, updated_at=timezone.now())
+    session.refresh_from_db()
+    if session.status != UploadSession.UploadStatus.PENDING:
+        raise UploadStateError("La subida ya no admite más datos.")
+    return session
+
+
+def finalize_upload(session_id, user):
+    """
+    Entrega el archivo completo al pipeline de imágenes y cierra la sesión.
+
+    La imagen se decodifica y se escribe antes de abrir la transacción; la fila de la sesión solo
+    se bloquea para guardar la imagen y marcarla como completada, de modo que un segundo
+    `finalize` concurrente espera milisegundos y no el tiempo de decodificación.
+
+    Returns:
+        Image: La imagen creada o reemplazada.
+    """
+    session = UploadSession.objects.get(pk=session_id, user_id=user)
+    if session.status != UploadSession.UploadStatus.PENDING:
+        raise UploadStateError("La subida ya se finalizó o se abortó.")
+    if session.received_bytes < session.total_size:
+        raise UploadStateError(f"Subida incompleta: {session.received_bytes} de {session.total_size} bytes.")
+
+    check_quota(user.id)
+    try:
+        with open(upload_temp_path(session), 'rb') as temp:
+            filename, metadata = save_file_to_disk(File(temp, name=session.filename), user.id)
+    except Exception:
+        raise UploadStateError("No se pudo procesar la imagen.")
+
+    try:
+        with transaction.atomic():
+            session = UploadSession.objects.select_for_update().get(pk=session_id, user_id=user)
+            if session.status != UploadSession.UploadStatus.PENDING:
+                raise UploadStateError("La subida ya se finalizó o se abortó.")
+            image_obj, previous_url = upsert_image(session.external_id, session.type, filename, **metadata)
+            session.status = UploadSession.UploadStatus.COMPLETED
+            session.save(update_fields=['status', 'updated_at'])
+    except Exception:
+        remove_image_file(user.id, filename)
+        raise
+    if previous_url and previous_url != filename:
+        remove_image_file(user.id, previous_url)
+    discard_upload_file(session)
+    return image_obj
+
+
+def abort_upload(session_id, user):
+    session = UploadSession.objects.get(pk=session_id, user_id=user)
+    session.status = UploadSession.UploadStatus.ABORTED
+    session.save(update_fields=['status', 'updated_at'])
+    discard_upload_file(session)
+    return session
+
+
+def discard_upload_file(session):
+    try:
+        os.remove(upload_temp_path(session))
+    except FileNotFoundError:
+        pass
+
+
+def purge_expired_uploads(now=None):
+    """
+    Borra las sesiones caducadas (abiertas o ya cerradas) y sus archivos temporales.
+
+    Returns:
+        int: Número de sesiones eliminadas.
+    """
+    now = now or timezone.now()
+    purged = []
+    for session in UploadSession.objects.filter(expires_at__lt=now).only('pk').iterator():
+        discard_upload_file(session)
+        purged.append(session.pk)
+    UploadSession.objects.filter(pk__in=purged).delete()
+    return len(purged)
@@ -0,0 +1,89 @@
+"""
+Contabilidad del espacio de imágenes por usuario.
+
+Cada escritura o borrado de una fila `Image` aplica un delta (bytes, número de imágenes) al
+contador `MediaUsage` de su propietario dentro de la misma transacción, con actualizaciones
+`F()` que no necesitan leer el valor previo. La cuota (`MEDIA_USER_QUOTA_BYTES`) se aplica sobre
+los bytes WebP que se guardan, en esa misma actualización; antes de decodificar solo se rechazan
+las subidas de usuarios que ya no tienen espacio libre.
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from media.models import MediaUsage
+
+
+class MediaQuotaExceeded(APIException):
+    """La subida haría superar la cuota de almacenamiento del usuario."""
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = "Has superado el espacio de almacenamiento de imágenes disponible."
+    default_code = 'media_quota_exceeded'
+
+
+def check_quota(user_id):
+    """
+    Lanza `MediaQuotaExceeded` si el usuario ya ha agotado su cuota.
+
+    Es un rechazo temprano, antes de gastar CPU en decodificar: el tamaño del archivo subido no
+    dice cuánto ocupará el WebP, así que el límite exacto lo aplica `UsageDelta.apply`.
+    """
+    quota = getattr(settings, 'MEDIA_USER_QUOTA_BYTES', None)
+    if not quota or user_id is None:
+        return
+    used = MediaUsage.objects.filter(user_id=user_id).values_list('bytes_used', flat=True).first() or 0
+    if used >= quota:
+        raise MediaQuotaExceeded(f"No queda espacio disponible: {used} de {quota} bytes usados.")
+
+
+class UsageDelta:
+    """Acumula deltas por propietario para aplicarlos con una actualización por usuario."""
+
+    def __init__(self):
+        self.deltas = defaultdict(lambda: [0, 0])
+
+    def add(self, owner_id, size_bytes, count=1):
+        if owner_id is None:
+            return
+        delta = self.deltas[owner_id]
+        delta[0] += size_bytes or 0
+        delta[1] += count
+
+    def remove(self, owner_id, size_bytes, count=1):
+        self.add(owner_id, -(size_bytes or 0), -count)
+
+    def apply(self):
+        """
+        Aplica los deltas acumulados; debe llamarse dentro de la transacción que cambia las filas.
+
+        Los deltas positivos solo se aplican si el contador no supera la cuota (la condición va en
+        el propio UPDATE, así que dos subidas concurrentes no pueden rebasarla); si la supera lanza
+        `MediaQuotaExceeded` y la transacción del llamante deshace las filas.
+        """
+        quota = getattr(settings, 'MEDIA_USER_QUOTA_BYTES', None)
+        with transaction.atomic():
+            for owner_id, (bytes_delta, count_delta) in self.deltas.items():
+                if not bytes_delta and not count_delta:
+                    continue
+                counters = MediaUsage.objects.filter(user_id=owner_id)
+                if quota and bytes_delta > 0:
+                    counters = counters.filter(bytes_used__lte=quota - bytes_delta)
+                changes = {
+                    'bytes_used': F('bytes_used') + bytes_delta,
+                    'image_count': F('image_count') + count_delta,
+                    # update() no aplica auto_now.
+                    'updated_at': timezone.now(),
+                }
+                if counters.update(**changes):
+                    continue
+                # Primera imagen del usuario: crea el contador sin pisar uno creado en paralelo.
+                MediaUsage.objects.bulk_create([MediaUsage(user_id_id=owner_id)], ignore_conflicts=True)
+                if not counters.update(**changes):
+                    raise MediaQuotaExceeded(
+                        f"La imagen ({bytes_delta} bytes) supera el espacio disponible de {quota} bytes."
+                    )
+        self.deltas.clear()
@@ -0,0 +1,13 @@
+"""
+Señales propias de la app media.
+
+`images_changed` se envía cuando se escriben filas de 'images' sin pasar por `Model.save()`
+(upserts con `bulk_create` y `bulk_update`), que no disparan `post_save`. Así otras apps pueden
+reaccionar sin que media dependa de ellas.
+
+Argumentos:
+    images (list[tuple[str, int]]): Pares (type, external_id) de las imágenes escritas.
+"""
+from django.dispatch import Signal
+
+images_changed = Signal()
@@ -203,7 +203,10 @@ class TestImageSerializers:
         assert data['type'] == image.type
         assert data['external_id'] == image.external_id
         assert data['processing_status'] == image.processing_status
-        assert len(data) == 5
+        assert data['width'] == image.width
+        assert data['height'] == image.height
+        assert data['placeholder'] == image.placeholder
+        assert len(data) == 8
         assert 'name' not in data
         assert 'created_at' not in data
 
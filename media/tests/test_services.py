@@ -0,0 +1,557 @@
+import io
+import os
+import uuid
+from datetime import timedelta
+from unittest import mock
+
+import pytest
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import IntegrityError, connection
+from django.utils import timezone
+from model_bakery import baker
+from PIL import Image as PILImage
+from rest_framework.test import APIClient
+
+from media.models import Image, MediaUsage
+from media.services import image_service
+from media.services.image_service import (
+    StaleImageRows,
+    delete_image,
+    process_image_batch,
+    remove_image_file,
+    save_image_rows,
+    update_image_for_instance,
+    upsert_image,
+)
+from media.services.storage import ConsistentHashRing, ImageFileStorage, get_image_storage
+from recipes.models.recipe import Recipe
+
+
+def make_upload(name='photo.png', size=(8, 8), color='red'):
+    """Genera un archivo de imagen en memoria listo para subir."""
+    buffer = io.BytesIO()
+    PILImage.new('RGB', size, color).save(buffer, format='PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
+
+
+@pytest.fixture
+def media_tmp(settings, tmp_path):
+    """Redirige MEDIA_IMG_PATH a un directorio temporal."""
+    settings.MEDIA_IMG_PATH = tmp_path
+    return tmp_path
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+@pytest.mark.media_app
+class TestImageUpsert:
+    """
+    Tests for the (type, external_id) unique index and the upsert used by the image service.
+    """
+
+    def test_duplicate_type_external_id_raises(self):
+        baker.make(Image, name='a.webp', url='a.webp', type=Image.ImageType.RECIPE, external_id=10)
+        with pytest.raises(IntegrityError):
+            baker.make(Image, name='b.webp', url='b.webp', type=Image.ImageType.RECIPE, external_id=10)
+
+    def test_upsert_replaces_existing_row(self):
+        first, previous = upsert_image(10, Image.ImageType.STEP, 'a.webp')
+        second, previous_second = upsert_image(10, Image.ImageType.STEP, 'b.webp')
+
+        assert previous is None
+        assert previous_second == 'a.webp'
+        assert first.pk == second.pk
+        assert Image.objects.filter(type=Image.ImageType.STEP, external_id=10).count() == 1
+        assert Image.objects.get(pk=first.pk).url == 'b.webp'
+
+    def test_concurrent_first_insert_is_counted_once(self, test_user):
+        upsert_image(7, Image.ImageType.RECIPE, 'other.webp', size_bytes=10, owner_id=test_user.id)
+        real_upsert = image_service._upsert_image_rows
+        stale = [True]
+
+        def stale_first_read(images, update_fields):
+            # Como en PostgreSQL cuando la fila de otra transacción no era visible en la lectura.
+            previous = real_upsert(images, update_fields)
+            if stale:
+                stale.pop()
+                raise StaleImageRows()
+            return previous
+
+        with mock.patch.object(image_service, '_upsert_image_rows', side_effect=stale_first_read):
+            image, previous = upsert_image(7, Image.ImageType.RECIPE, 'mine.webp', size_bytes=25, owner_id=test_user.id)
+
+        assert not stale
+        assert previous == 'other.webp'
+        assert Image.objects.get(type=Image.ImageType.RECIPE, external_id=7).pk == image.pk
+        assert MediaUsage.objects.filter(user_id=test_user).values_list('bytes_used', 'image_count').get() == (25, 1)
+
+    @pytest.mark.skipif(connection.vendor != 'postgresql', reason='Requiere PostgreSQL')
+    def test_single_statement_upsert_returns_replaced_rows(self, test_user):
+        first, _ = upsert_image(5, Image.ImageType.RECIPE, 'a.webp', size_bytes=10, owner_id=test_user.id)
+        images = [
+            Image(name='b.webp', url='b.webp', type=Image.ImageType.RECIPE, external_id=5, size_bytes=20),
+            Image(name='c.webp', url='c.webp', type=Image.ImageType.RECIPE, external_id=6, size_bytes=30),
+        ]
+
+        previous = save_image_rows(images, ['name', 'url', 'size_bytes'])
+
+        assert images[0].pk == first.pk and images[1].pk is not None
+        assert previous == {(Image.ImageType.RECIPE, 5): {
+            'id': first.pk, 'type': Image.ImageType.RECIPE, 'external_id': 5,
+            'url': 'a.webp', 'size_bytes': 10, 'owner_id': test_user.id,
+        }}
+        assert Image.objects.get(pk=first.pk).url == 'b.webp'
+
+    def test_update_image_for_instance_removes_previous_file(self, media_tmp, test_user, django_capture_on_commit_callbacks):
+        first = update_image_for_instance(make_upload(), test_user.id, 99, Image.ImageType.RECIPE)
+        with django_capture_on_commit_callbacks(execute=True):
+            second = update_image_for_instance(make_upload(color='blue'), test_user.id, 99, Image.ImageType.RECIPE)
+
+        assert first.pk == second.pk
+        assert Image.objects.filter(type=Image.ImageType.RECIPE, external_id=99).count() == 1
+        assert not os.path.exists(os.path.join(media_tmp, str(test_user.id), first.url))
+        assert os.path.exists(os.path.join(media_tmp, str(test_user.id), second.url))
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+@pytest.mark.media_app
+class TestImageBatch:
+    """
+    Tests for the batch image pipeline and its endpoint.
+    """
+
+    def test_batch_reports_per_file_results(self, media_tmp, settings, test_user):
+        settings.MEDIA_IMAGE_WORKERS = 2
+        items = [
+            {'file': make_upload('a.png'), 'external_id': '1', 'type': Image.ImageType.STEP},
+            {'file': make_upload('b.gif'), 'external_id': '2', 'type': Image.ImageType.STEP},
+            {'file': make_upload('c.png'), 'external_id': '3', 'type': Image.ImageType.STEP},
+            {'file': make_upload('d.png'), 'external_id': '3', 'type': Image.ImageType.STEP},
+        ]
+        results = process_image_batch(items, test_user.id)
+
+        assert [result['error'] is None for result in results] == [True, False, True, False]
+        assert Image.objects.filter(type=Image.ImageType.STEP).count() == 2
+        for result in (results[0], results[2]):
+            assert os.path.exists(os.path.join(media_tmp, str(test_user.id), result['image'].url))
+
+    def test_batch_endpoint(self, media_tmp, test_user):
+        recipe_ids = [baker.make(Recipe, user_id=test_user).id for _ in range(2)]
+        client = APIClient()
+        client.force_authenticate(user=test_user)
+        response = client.post(
+            '/api/media/images/batch/',
+            {'file': [make_upload('a.png'), make_upload('b.png')], 'id': [str(i) for i in recipe_ids], 'type': 'RECIPE'},
+            format='multipart',
+        )
+
+        assert response.status_code == 201
+        assert [result['external_id'] for result in response.data['results']] == recipe_ids
+        assert Image.objects.filter(type=Image.ImageType.RECIPE, external_id__in=recipe_ids).count() == 2
+
+    def test_batch_rejects_other_users_recipe(self, media_tmp, test_user, another_custom_user):
+        own = baker.make(Recipe, user_id=test_user)
+        other = baker.make(Recipe, user_id=another_custom_user)
+        client = APIClient()
+        client.force_authenticate(user=test_user)
+        response = client.post(
+            '/api/media/images/batch/',
+            {'file': [make_upload('a.png'), make_upload('b.png')], 'id': [str(own.id), str(other.id)], 'type': 'RECIPE'},
+            format='multipart',
+        )
+
+        assert response.status_code == 403
+        assert not Image.objects.exists()
+        assert not any(media_tmp.iterdir())
+
+    def test_recipe_create_fails_when_an_image_cannot_be_saved(self, media_tmp, test_user):
+        client = APIClient()
+        client.force_authenticate(user=test_user)
+        response = client.post('/api/recipes/recipes/', {
+            'name': 'Tortilla',
+            'duration_minutes': 30,
+            'commensals': 4,
+            'photo': SimpleUploadedFile('photo.png', b'no es una imagen', content_type='image/png'),
+        }, format='multipart')
+
+        assert response.status_code == 400
+        assert 'images' in response.json()
+        assert not Recipe.objects.filter(name='Tortilla').exists()
+
+    def test_recipe_images_are_encoded_before_the_transaction(self, media_tmp, test_user, monkeypatch):
+        depths = {}
+        real_encode, real_save = image_service.encode_image, image_service.save_image_rows
+
+        def encode(data):
+            depths['encode'] = len(connection.atomic_blocks)
+            return real_encode(data)
+
+        def save(images, update_fields):
+            depths['save'] = len(connection.atomic_blocks)
+            return real_save(images, update_fields)
+
+        monkeypatch.setattr(image_service, 'encode_image', encode)
+        monkeypatch.setattr(image_service, 'save_image_rows', save)
+        baseline = len(connection.atomic_blocks)
+        client = APIClient()
+        client.force_authenticate(user=test_user)
+        response = client.post('/api/recipes/recipes/', {
+            'name': 'Tortilla', 'duration_minutes': 30, 'commensals': 4, 'photo': make_upload(),
+        }, format='multipart')
+
+        assert response.status_code == 201
+        assert depths['encode'] == baseline
+        assert depths['save'] > baseline
+        image = Image.objects.get(type=Image.ImageType.RECIPE, external_id=response.data['id'])
+        assert get_image_storage().exists(image.url, test_user.id)
+
+    def test_recipe_files_are_removed_when_the_recipe_is_not_saved(self, media_tmp, test_user):
+        client = APIClient()
+        client.force_authenticate(user=test_user)
+        response = client.post('/api/recipes/recipes/', {
+            'name': 'Tortilla', 'duration_minutes': 30, 'commensals': 4,
+            'ingredients_data': '[{"ingredient": 1}]',
+            'photo': make_upload(), 'step_image_3': make_upload('step.png'),
+        }, format='multipart')
+
+        assert response.status_code == 400
+        assert not Recipe.objects.filter(name='Tortilla').exists()
+        assert not Image.objects.exists()
+        assert not list(media_tmp.rglob('*.webp'))
+
+    def test_recipe_image_validation_does_not_need_targets(self, media_tmp, test_user, settings):
+        settings.MEDIA_UPLOAD_MAX_BYTES = 10
+        client = APIClient()
+        client.force_authenticate(user=test_user)
+        response = client.post('/api/recipes/recipes/', {
+            'name': 'Tortilla', 'duration_minutes': 30, 'commensals': 4,
+            'photo': make_upload(), 'step_image_0': make_upload('step.gif'),
+        }, format='multipart')
+
+        assert response.status_code == 400
+        assert set(response.json()['images']) == {'photo.png', 'step.gif'}
+        assert not list(media_tmp.rglob('*.webp'))
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+@pytest.mark.media_app
+class TestImageOwnership:
+    """
+    Tests for the ownership checks of the image write endpoints.
+    """
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user=user)
+        return client
+
+    def test_upload_to_other_users_recipe_is_forbidden(self, media_tmp, test_step, another_custom_user):
+        client = self.client_for(another_custom_user)
+        for image_type, external_id in (('RECIPE', test_step.recipe_id), ('STEP', test_step.id), ('RECIPE', 999999)):
+            response = client.post('/api/media/images/', {'file': make_upload(), 'id': external_id, 'type': image_type}, format='multipart')
+            assert response.status_code == 403
+        assert not Image.objects.exists()
+        assert not any(media_tmp.iterdir())
+
+    def test_user_image_ignores_supplied_id(self, media_tmp, test_user, another_custom_user):
+        response = self.client_for(test_user).post(
+            '/api/media/images/', {'file': make_upload(), 'id': another_custom_user.id, 'type': 'USER'}, format='multipart'
+        )
+
+        assert response.status_code == 201
+        assert response.data['external_id'] == test_user.id
+        assert not Image.objects.filter(type=Image.ImageType.USER, external_id=another_custom_user.id).exists()
+
+    def test_invalid_type_is_rejected(self, media_tmp, test_user):
+        response = self.client_for(test_user).post(
+            '/api/media/images/', {'file': make_upload(), 'id': '1', 'type': 'BANNER'}, format='multipart'
+        )
+
+        assert response.status_code == 400
+        assert not Image.objects.exists()
+
+    def test_update_and_destroy_by_pk_check_owner(self, media_tmp, test_recipe, test_user, another_custom_user):
+        image = update_image_for_instance(make_upload(), test_user.id, test_recipe.id, Image.ImageType.RECIPE)
+        url = f'/api/media/images/{image.pk}/'
+
+        assert self.client_for(another_custom_user).put(url, {'file': make_upload()}, format='multipart').status_code == 403
+        assert self.client_for(another_custom_user).delete(url).status_code == 403
+        assert Image.objects.filter(pk=image.pk, url=image.url).exists()
+
+        response = self.client_for(test_user).put(url, {'file': make_upload(color='blue')}, format='multipart')
+        assert response.status_code == 200
+        assert Image.objects.get(pk=image.pk).url == response.data['url'] != image.url
+        assert self.client_for(test_user).delete(url).status_code == 204
+        assert not Image.objects.filter(pk=image.pk).exists()
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+@pytest.mark.media_app
+class TestImagePlaceholders:
+    """
+    Tests for the low-quality placeholders computed by the image pipeline.
+    """
+
+    def test_upload_stores_dimensions_and_placeholder(self, media_tmp, test_user):
+        image = update_image_for_instance(make_upload(size=(40, 20)), test_user.id, test_user.id, Image.ImageType.USER)
+        image.refresh_from_db()
+
+        assert (image.width, image.height) == (40, 20)
+        assert image.placeholder.startswith('data:image/webp;base64,')
+
+    def test_backfill_command_fills_existing_rows(self, media_tmp, test_user):
+        folder = media_tmp / str(test_user.id)
+        folder.mkdir()
+        PILImage.new('RGB', (30, 10), 'green').save(folder / 'legacy.webp', format='WEBP')
+        image = baker.make(Image, name='legacy.webp', url='legacy.webp', type=Image.ImageType.USER, external_id=test_user.id)
+
+        call_command('backfill_image_placeholders', stdout=io.StringIO())
+        image.refresh_from_db()
+
+        assert (image.width, image.height) == (30, 10)
+        assert image.placeholder.startswith('data:image/webp;base64,')
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+@pytest.mark.media_app
+class TestGarbageCollector:
+    """
+    Tests for the gc_media command and the cross-folder file lookup.
+    """
+
+    def test_remove_image_file_finds_other_user_folder(self, media_tmp):
+        (media_tmp / '3').mkdir()
+        (media_tmp / '3' / 'x.webp').write_bytes(b'data')
+
+        remove_image_file(8, 'x.webp')
+
+        assert not (media_tmp / '3' / 'x.webp').exists()
+
+    def test_gc_media_removes_orphans(self, media_tmp, test_recipe):
+        folder = media_tmp / str(test_recipe.user_id_id)
+        folder.mkdir()
+        for name in ('kept.webp', 'stray.webp', 'deleted.webp'):
+            (folder / name).write_bytes(b'data')
+        kept = baker.make(Image, name='kept.webp', url='kept.webp', type=Image.ImageType.RECIPE, external_id=test_recipe.id)
+        orphan = baker.make(Image, name='deleted.webp', url='deleted.webp', type=Image.ImageType.STEP, external_id=987654)
+
+        call_command('gc_media', '--dry-run', '--min-age', '0', stdout=io.StringIO())
+        assert Image.objects.filter(id=orphan.id).exists()
+        assert (folder / 'stray.webp').exists()
+
+        call_command('gc_media', '--min-age', '0', stdout=io.StringIO())
+        assert Image.objects.filter(id=kept.id).exists()
+        assert not Image.objects.filter(id=orphan.id).exists()
+        assert (folder / 'kept.webp').exists()
+        assert not (folder / 'stray.webp').exists()
+        assert not (folder / 'deleted.webp').exists()
+
+    def test_gc_media_keeps_unlinked_rows_unless_old_and_requested(self, media_tmp):
+        recent = baker.make(Image, name='recent.webp', url='recent.webp', type=Image.ImageType.STEP, external_id=None)
+        old = baker.make(Image, name='old.webp', url='old.webp', type=Image.ImageType.STEP, external_id=None)
+        Image.objects.filter(id=old.id).update(created_at=timezone.now() - timedelta(days=2))
+
+        call_command('gc_media', '--only', 'rows', stdout=io.StringIO())
+        assert Image.objects.filter(id__in=[recent.id, old.id]).count() == 2
+
+        call_command('gc_media', '--only', 'rows', '--include-unlinked', stdout=io.StringIO())
+        assert list(Image.objects.values_list('id', flat=True)) == [recent.id]
+
+
+@pytest.fixture
+def hashed_storage(settings, media_tmp):
+    """Configura el layout con hash sobre dos volúmenes dentro del directorio temporal."""
+    roots = [str(media_tmp / 'vol-a'), str(media_tmp / 'vol-b')]
+    settings.MEDIA_IMG_STORAGE = {
+        'BACKEND': 'media.services.storage.FileSystemImageStorage',
+        'OPTIONS': {'layout': 'hashed', 'roots': roots},
+    }
+    return roots
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+@pytest.mark.media_app
+class TestImageStorage:
+    """
+    Tests for the pluggable image storage backends and the layout migration.
+    """
+
+    def test_consistent_hash_ring_moves_few_names(self):
+        names = [f"{i}.webp" for i in range(1000)]
+        before = ConsistentHashRing(['a', 'b', 'c'])
+        after = ConsistentHashRing(['a', 'b', 'c', 'd'])
+
+        moved = [name for name in names if before.get(name) != after.get(name)]
+
+        assert all(after.get(name) == 'd' for name in moved)
+        assert len(moved) < 400
+
+    def test_hashed_layout_writes_sharded_path(self, hashed_storage, test_user):
+        image = update_image_for_instance(make_upload(), test_user.id, test_user.id, Image.ImageType.USER)
+        path = get_image_storage().locate(image.url, test_user.id)
+
+        assert path.startswith(tuple(hashed_storage))
+        assert os.path.relpath(path, os.path.dirname(os.path.dirname(os.path.dirname(path)))).count(os.sep) == 2
+
+    def test_hashed_layout_reads_legacy_files(self, media_tmp, hashed_storage):
+        (media_tmp / '7').mkdir()
+        (media_tmp / '7' / 'legacy.webp').write_bytes(b'data')
+
+        assert get_image_storage().open('legacy.webp', 7) == b'data'
+        remove_image_file(7, 'legacy.webp')
+        assert not (media_tmp / '7' / 'legacy.webp').exists()
+
+    def test_public_url_is_stable_across_layouts(self, media_tmp, hashed_storage, test_user):
+        legacy_name = f'{uuid.uuid4()}.webp'
+        (media_tmp / str(test_user.id)).mkdir()
+        (media_tmp / str(test_user.id) / legacy_name).write_bytes(b'legacy')
+        image = update_image_for_instance(make_upload(), test_user.id, test_user.id, Image.ImageType.USER)
+        client = APIClient()
+
+        for name in (legacy_name, image.url):
+            response = client.get(f'/media/img/{test_user.id}/{name}')
+            assert response.status_code == 200
+            assert b''.join(response.streaming_content) == get_image_storage().open(name, test_user.id)
+        assert client.get(f'/media/img/{test_user.id}/{uuid.uuid4()}.webp').status_code == 404
+
+    def test_public_route_rejects_invalid_names(self, media_tmp, hashed_storage, test_user):
+        (media_tmp / str(test_user.id)).mkdir()
+        (media_tmp / str(test_user.id) / 'legacy.webp').write_bytes(b'legacy')
+        client = APIClient()
+
+        for name in ('..', '.', 'legacy.webp', '%2E%2E'):
+            assert client.get(f'/media/img/{test_user.id}/{name}').status_code == 404
+
+    def test_public_route_does_not_scan_other_user_folders(self, media_tmp, hashed_storage, test_user):
+        name = f'{uuid.uuid4()}.webp'
+        (media_tmp / '999').mkdir()
+        (media_tmp / '999' / name).write_bytes(b'other')
+
+        assert APIClient().get(f'/media/img/{test_user.id}/{name}').status_code == 404
+        assert get_image_storage().open(name, test_user.id, scan=True) == b'other'
+
+    def test_storage_url_is_built_from_the_volume_root(self, media_tmp, hashed_storage, test_user):
+        image = update_image_for_instance(make_upload(), test_user.id, test_user.id, Image.ImageType.USER)
+
+        url = ImageFileStorage().url(image.url)
+        assert url.startswith('/media/img/')
+        assert '..' not in url
+        assert url.endswith(image.url)
+
+    def test_migrate_media_layout_moves_files(self, media_tmp, hashed_storage, test_user):
+        folder = media_tmp / str(test_user.id)
+        folder.mkdir()
+        (folder / 'legacy.webp').write_bytes(b'data')
+        baker.make(Image, name='legacy.webp', url='legacy.webp', type=Image.ImageType.USER, external_id=test_user.id)
+
+        call_command('migrate_media_layout', stdout=io.StringIO())
+
+        storage = get_image_storage()
+        assert not (folder / 'legacy.webp').exists()
+        assert storage.in_place('legacy.webp', test_user.id)
+        assert storage.open('legacy.webp', test_user.id) == b'data'
+
+    def test_local_object_store_roundtrip(self, settings, media_tmp, test_user):
+        settings.MEDIA_IMG_STORAGE = {
+            'BACKEND': 'media.services.storage.LocalObjectStore',
+            'OPTIONS': {'root': str(media_tmp / 'bucket')},
+        }
+        image = update_image_for_instance(make_upload(), test_user.id, test_user.id, Image.ImageType.USER)
+        storage = get_image_storage()
+
+        assert [stored.name for stored in storage.iter_files()] == [image.url]
+        assert ImageFileStorage(storage).open(image.url).read() == storage.open(image.url)
+        remove_image_file(test_user.id, image.url)
+        assert not storage.exists(image.url)
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+@pytest.mark.media_app
+class TestMediaUsage:
+    """
+    Tests for the per-user storage counters and quota.
+    """
+
+    def usage(self, user):
+        return MediaUsage.objects.filter(user_id=user).values_list('bytes_used', 'image_count').first()
+
+    def test_counters_follow_create_replace_and_delete(self, media_tmp, test_user):
+        first = update_image_for_instance(make_upload(), test_user.id, test_user.id, Image.ImageType.USER)
+        assert first.original_size_bytes > 0
+        assert self.usage(test_user) == (first.size_bytes, 1)
+
+        second = update_image_for_instance(make_upload(size=(64, 64), color='blue'), test_user.id, test_user.id, Image.ImageType.USER)
+        assert self.usage(test_user) == (second.size_bytes, 1)
+
+        delete_image(Image.objects.get(pk=second.pk), test_user.id)
+        assert self.usage(test_user) == (0, 0)
+
+    def test_batch_updates_counters(self, media_tmp, test_user):
+        items = [
+            {'file': make_upload('a.png'), 'external_id': '1', 'type': Image.ImageType.STEP},
+            {'file': make_upload('b.png'), 'external_id': '2', 'type': Image.ImageType.STEP},
+        ]
+        results = process_image_batch(items, test_user.id)
+
+        assert self.usage(test_user) == (sum(result['image'].size_bytes for result in results), 2)
+
+    def test_quota_rejects_upload_before_decoding(self, media_tmp, test_recipe, test_user, settings):
+        settings.MEDIA_USER_QUOTA_BYTES = 10
+        baker.make(MediaUsage, user_id=test_user, bytes_used=10, image_count=1)
+        client = APIClient()
+        client.force_authenticate(user=test_user)
+
+        with mock.patch('media.services.image_service.encode_image') as encode:
+            response = client.post('/api/media/images/', {'file': make_upload(), 'id': test_recipe.id, 'type': 'RECIPE'}, format='multipart')
+
+        assert response.status_code == 413
+        assert not encode.called
+        assert not Image.objects.filter(type=Image.ImageType.RECIPE, external_id=test_recipe.id).exists()
+        assert not any(media_tmp.iterdir())
+
+    def test_quota_counts_stored_webp_bytes(self, media_tmp, test_recipe, test_user, settings):
+        upload = make_upload(size=(64, 64))
+        image = update_image_for_instance(upload, test_user.id, test_user.id, Image.ImageType.USER)
+        assert image.original_size_bytes > image.size_bytes
+        # Cabe justo el WebP aunque el archivo subido sea mayor que la cuota.
+        settings.MEDIA_USER_QUOTA_BYTES = image.size_bytes
+        delete_image(image, test_user.id)
+        client = APIClient()
+        client.force_authenticate(user=test_user)
+
+        response = client.post('/api/media/images/', {'file': make_upload(size=(64, 64)), 'id': test_user.id, 'type': 'USER'}, format='multipart')
+        assert response.status_code == 201
+        assert self.usage(test_user) == (image.size_bytes, 1)
+
+        settings.MEDIA_USER_QUOTA_BYTES = image.size_bytes + 1
+        response = client.post('/api/media/images/', {'file': make_upload(), 'id': test_recipe.id, 'type': 'RECIPE'}, format='multipart')
+        assert response.status_code == 413
+        assert not Image.objects.filter(type=Image.ImageType.RECIPE).exists()
+        assert [path.name for path in media_tmp.rglob('*.webp')] == [Image.objects.get(type=Image.ImageType.USER).url]
+        assert self.usage(test_user) == (image.size_bytes, 1)
+
+    def test_counter_updates_touch_updated_at(self, media_tmp, test_user):
+        usage = baker.make(MediaUsage, user_id=test_user)
+        MediaUsage.objects.filter(pk=usage.pk).update(updated_at=timezone.now() - timedelta(days=1))
+
+        update_image_for_instance(make_upload(), test_user.id, test_user.id, Image.ImageType.USER)
+
+        assert MediaUsage.objects.get(pk=usage.pk).updated_at > timezone.now() - timedelta(minutes=1)
+
+    def test_reconcile_fixes_drift(self, media_tmp, test_user):
+        image = update_image_for_instance(make_upload(), test_user.id, test_user.id, Image.ImageType.USER)
+        MediaUsage.objects.filter(user_id=test_user).update(bytes_used=1, image_count=7)
+        Image.objects.filter(pk=image.pk).update(size_bytes=None, owner_id=None)
+
+        call_command('reconcile_media_usage', stdout=io.StringIO())
+
+        image.refresh_from_db()
+        assert image.owner_id == test_user.id
+        assert self.usage(test_user) == (image.size_bytes, 1)
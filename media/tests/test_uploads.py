@@ -0,0 +1,169 @@
+import io
+import os
+from unittest import mock
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from PIL import Image as PILImage
+from rest_framework.test import APIClient
+
+from media.models import Image, UploadSession
+from media.services import upload_service
+from media.services.upload_service import upload_temp_path, write_chunk
+
+
+def png_bytes(size=(20, 10)):
+    buffer = io.BytesIO()
+    PILImage.new('RGB', size, 'red').save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def upload_tmp(settings, tmp_path):
+    """Redirige MEDIA_IMG_PATH y la carpeta de subidas a un directorio temporal."""
+    settings.MEDIA_IMG_PATH = tmp_path / 'img'
+    settings.MEDIA_UPLOAD_TMP_PATH = tmp_path / 'uploads'
+    return tmp_path
+
+
+@pytest.fixture
+def client(test_user):
+    client = APIClient()
+    client.force_authenticate(user=test_user)
+    return client
+
+
+def send_chunk(client, session_id, data, start, total):
+    return client.put(
+        f'/api/media/uploads/{session_id}/',
+        data=data,
+        content_type='application/offset+octet-stream',
+        HTTP_CONTENT_RANGE=f'bytes {start}-{start + len(data) - 1}/{total}',
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+@pytest.mark.media_app
+class TestResumableUploads:
+    """
+    Tests for the resumable chunked upload protocol.
+    """
+
+    @pytest.fixture(autouse=True)
+    def recipe(self, test_recipe):
+        self.recipe = test_recipe
+
+    def create_session(self, client, data, **overrides):
+        payload = {'filename': 'photo.png', 'type': 'RECIPE', 'external_id': self.recipe.id, 'total_size': len(data), **overrides}
+        response = client.post('/api/media/uploads/', payload, format='json')
+        assert response.status_code == 201
+        return response.data['id']
+
+    def test_chunked_upload_then_finalize(self, client, upload_tmp):
+        data = png_bytes()
+        session_id = self.create_session(client, data)
+        middle = len(data) // 2
+
+        assert send_chunk(client, session_id, data[:middle], 0, len(data))['Upload-Offset'] == str(middle)
+        # Un reintento del mismo trozo no cambia el offset.
+        assert send_chunk(client, session_id, data[:middle], 0, len(data))['Upload-Offset'] == str(middle)
+        assert client.head(f'/api/media/uploads/{session_id}/')['Upload-Offset'] == str(middle)
+        assert send_chunk(client, session_id, data[middle:], middle, len(data)).status_code == 200
+
+        response = client.post(f'/api/media/uploads/{session_id}/finalize/')
+
+        assert response.status_code == 201
+        assert (response.data['width'], response.data['height']) == (20, 10)
+        assert Image.objects.filter(type='RECIPE', external_id=self.recipe.id).exists()
+        session = UploadSession.objects.get(pk=session_id)
+        assert session.status == UploadSession.UploadStatus.COMPLETED
+        assert not (upload_tmp / 'uploads' / f'{session_id}.part').exists()
+
+    def test_gap_is_rejected(self, client, upload_tmp):
+        data = png_bytes()
+        session_id = self.create_session(client, data)
+
+        response = send_chunk(client, session_id, data[10:], 10, len(data))
+
+        assert response.status_code == 416
+        assert response['Upload-Offset'] == '0'
+
+    def test_finalize_incomplete_upload_conflicts(self, client, upload_tmp):
+        data = png_bytes()
+        session_id = self.create_session(client, data)
+        send_chunk(client, session_id, data[:10], 0, len(data))
+
+        assert client.post(f'/api/media/uploads/{session_id}/finalize/').status_code == 409
+
+    def test_invalid_extension_and_size(self, client, upload_tmp, settings):
+        settings.MEDIA_UPLOAD_MAX_BYTES = 100
+        response = client.post(
+            '/api/media/uploads/', {'filename': 'a.gif', 'type': 'RECIPE', 'external_id': 1, 'total_size': 500}, format='json'
+        )
+
+        assert response.status_code == 400
+        assert set(response.data) == {'filename', 'total_size'}
+
+    def test_sessions_are_private(self, client, upload_tmp, admin_user):
+        session_id = self.create_session(client, png_bytes())
+        other = APIClient()
+        other.force_authenticate(user=admin_user)
+
+        assert other.get(f'/api/media/uploads/{session_id}/').status_code == 404
+
+    def test_session_for_other_users_recipe_is_forbidden(self, upload_tmp, another_custom_user):
+        other = APIClient()
+        other.force_authenticate(user=another_custom_user)
+        payload = {'filename': 'photo.png', 'type': 'RECIPE', 'external_id': self.recipe.id, 'total_size': 10}
+
+        assert other.post('/api/media/uploads/', payload, format='json').status_code == 403
+        assert not UploadSession.objects.exists()
+
+    def test_no_transaction_is_open_while_reading_or_decoding(self, client, upload_tmp, test_user):
+        data = png_bytes()
+        session_id = self.create_session(client, data)
+        depth = len(connection.savepoint_ids)
+        depths = []
+
+        class Stream(io.BytesIO):
+            def read(self, size=-1):
+                depths.append(len(connection.savepoint_ids))
+                return super().read(size)
+
+        encode = upload_service.save_file_to_disk
+
+        def save_file_to_disk(*args):
+            depths.append(len(connection.savepoint_ids))
+            return encode(*args)
+
+        session = write_chunk(session_id, test_user, f'bytes 0-{len(data) - 1}/{len(data)}', Stream(data))
+        assert session.received_bytes == len(data)
+        with mock.patch.object(upload_service, 'save_file_to_disk', save_file_to_disk):
+            assert client.post(f'/api/media/uploads/{session_id}/finalize/').status_code == 201
+        assert depths and set(depths) == {depth}
+
+    def test_chunk_after_abort_does_not_move_offset(self, client, upload_tmp, test_user):
+        data = png_bytes()
+        session_id = self.create_session(client, data)
+
+        class Stream(io.BytesIO):
+            def read(self, size=-1):
+                # El cliente aborta mientras este trozo aún se está recibiendo.
+                UploadSession.objects.filter(pk=session_id).update(status=UploadSession.UploadStatus.ABORTED)
+                return super().read(size)
+
+        with pytest.raises(upload_service.UploadStateError):
+            write_chunk(session_id, test_user, f'bytes 0-{len(data) - 1}/{len(data)}', Stream(data))
+        assert UploadSession.objects.get(pk=session_id).received_bytes == 0
+
+    def test_purge_removes_expired_sessions(self, client, upload_tmp, settings):
+        settings.MEDIA_UPLOAD_SESSION_TTL = -1
+        session_id = self.create_session(client, png_bytes())
+        path = upload_temp_path(UploadSession.objects.get(pk=session_id))
+
+        call_command('purge_upload_sessions', stdout=io.StringIO())
+
+        assert not UploadSession.objects.filter(pk=session_id).exists()
+        assert not os.path.exists(path)
@@ -1,7 +1,12 @@
+from django.urls import path, include
 from media.views.imageViewSet import ImageWriteDeleteViewSet
+from media.views.uploadViewSet import UploadSessionViewSet
 from rest_framework.routers import DefaultRouter
 
 router = DefaultRouter()
 router.register(r'images', ImageWriteDeleteViewSet, basename='image-write')
+router.register(r'uploads', UploadSessionViewSet, basename='upload-session')
 
-urlpatterns += router.urls
+urlpatterns = [
+    path('', include(router.urls)),
+]
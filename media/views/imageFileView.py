@@ -0,0 +1,27 @@
+from django.http import FileResponse, Http404
+from django.views.decorators.http import require_safe
+
+from media.services.storage import get_image_storage, is_image_name
+
+
+@require_safe
+def serve_image_file(request, user_id, name):
+    """
+    Sirve una imagen en su URL pública histórica, MEDIA_URL/img/<user_id>/<nombre>.
+
+    Los clientes construyen la URL con el propietario y `Image.url`; con el layout `hashed`, o con
+    otro backend, el archivo ya no vive en esa ruta, así que se localiza a través del backend
+    configurado y la URL de los clientes no cambia. Los nombres son UUID y nunca se reescriben,
+    por lo que la respuesta se puede cachear indefinidamente.
+
+    Es una ruta pública: solo se aceptan nombres <uuid>.webp y solo se miran la ubicación del
+    layout y la histórica del usuario, sin recorrer las carpetas del resto de usuarios.
+    """
+    if not is_image_name(name):
+        raise Http404("Imagen no encontrada.")
+    location = get_image_storage().locate(name, user_id)
+    if location is None:
+        raise Http404("Imagen no encontrada.")
+    response = FileResponse(open(location, 'rb'), content_type='image/webp')
+    response['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
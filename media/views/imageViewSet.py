@@ -1,18 +1,26 @@
-import os
-import uuid
-from PIL import Image as PILImage
 from django.conf import settings
-from django.forms import ValidationError
-from rest_framework import viewsets,mixins,status
+from rest_framework import viewsets,mixins,status,serializers
 from rest_framework.permissions import AllowAny, IsAdminUser,IsAuthenticated
 from media.models.image import Image
+from api.throttling import ExpensiveEndpointThrottleMixin
 from media.serializers.image_serializer import (
     ImageListSerializer,
     ImageAdminSerializer,
     ImageWriteSerializer
 )
 from rest_framework.response import Response
-from rest_framework.exceptions import NotFound
+from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied
+from media.services.image_service import (
+    delete_image,
+    forbidden_image_targets,
+    process_image_batch,
+    remove_image_file,
+    save_file_to_disk,
+    resolve_image_owners,
+    upsert_image,
+)
+from media.services.usage_service import check_quota
 
 def filter_and_order_images(queryset, params):
     image_type = params.get('type')
@@ -67,37 +75,20 @@ ALLOWED_EXTENSIONS = {'jpg', 'jpeg', 'png', 'webp'}
 def validate_extension(filename):
     ext = filename.split('.')[-1].lower()
     if ext not in ALLOWED_EXTENSIONS:
-        raise ValidationError(f"Formato de imagen no permitido: .{ext}")
-
-def delete_old_image_file(user_id, external_id, image_type):
-    """
-    Elimina archivos y registros previos asociados al mismo external_id y type.
-    """
-    old_images = Image.objects.filter(external_id=external_id, type=image_type)
-    for img in old_images:
-        if img.url:
-            old_path = os.path.join(settings.MEDIA_IMG_PATH, str(user_id), img.url)
-            if os.path.exists(old_path):
-                os.remove(old_path)
-    old_images.delete()
+        raise serializers.ValidationError(f"Formato de imagen no permitido: .{ext}")
 
 def save_image_to_webp(image_file, user_id):
     """
-    Convierte la imagen a WEBP y la guarda en media/{user_id}/uuid.webp
+    Convierte la imagen a WEBP y la guarda en media/{user_id}/uuid.webp.
+    Devuelve el nombre del archivo y sus metadatos (dimensiones, placeholder, tamaños y propietario).
+    Si el usuario ya agotó su cuota se rechaza antes de decodificar.
     """
     validate_extension(image_file.name)
-    
-    user_folder = os.path.join(settings.MEDIA_IMG_PATH, str(user_id))
-    os.makedirs(user_folder, exist_ok=True)
-
-    new_filename = f"{uuid.uuid4()}.webp"
-    new_path = os.path.join(user_folder, new_filename)
-
-    image = PILImage.open(image_file)
-    image.save(new_path, format="WEBP")
-    return new_filename
+    check_quota(user_id)
+    return save_file_to_disk(image_file, user_id)
 
 class ImageWriteDeleteViewSet(
+    ExpensiveEndpointThrottleMixin,
     mixins.CreateModelMixin,
     mixins.UpdateModelMixin,
     mixins.DestroyModelMixin,
@@ -105,63 +96,146 @@ class ImageWriteDeleteViewSet(
 ):
     serializer_class = ImageWriteSerializer
     permission_classes = [IsAuthenticated]
+    throttle_scope = 'upload'
+    throttled_actions = {'create', 'update', 'partial_update', 'batch'}
 
     def get_queryset(self):
         return Image.objects.all()
 
     def get_object(self):
-        external_id = self.kwargs.get("id")
-        image_type = self.kwargs.get("type")
+        """Imagen por `pk`; solo su propietario (o el staff) puede reemplazarla o borrarla."""
+        image = super().get_object()
+        user = self.request.user
+        if not user.is_staff and resolve_image_owners([image]).get(image.id) != user.id:
+            raise PermissionDenied("No puedes modificar imágenes de otro usuario.")
+        return image
+
+    def authorize_targets(self, targets):
+        """
+        Comprueba los destinos [(type, external_id)] de una subida. Las imágenes USER siempre son las
+        del propio usuario (se ignora el id recibido); las RECIPE y STEP deben ser de una receta suya.
+
+        Returns:
+            list: Los destinos con el id de las imágenes USER ya sustituido.
+
+        Raises:
+            PermissionDenied: Si alguna receta o paso no existe o es de otro usuario.
+        """
+        user = self.request.user
+        targets = [
+            (image_type, user.id if image_type == Image.ImageType.USER else external_id)
+            for image_type, external_id in targets
+        ]
+        forbidden = forbidden_image_targets(user, [
+            (image_type, external_id) for image_type, external_id in targets if image_type != Image.ImageType.USER
+        ])
+        if forbidden:
+            raise PermissionDenied(
+                "No puedes subir imágenes a: " + ', '.join(f"{image_type} {external_id}" for image_type, external_id in forbidden)
+            )
+        return targets
+
+    def save_image(self, external_id, image_type, filename, metadata):
+        """`upsert_image` del archivo ya escrito; si falla (p. ej. por la cuota) borra el archivo."""
         try:
-            return Image.objects.get(external_id=external_id, type=image_type)
-        except Image.DoesNotExist:
-            raise NotFound("Imagen no encontrada con ese id y type.")
+            return upsert_image(external_id, image_type, filename, processing_status='UPLOADED', **metadata)
+        except Exception:
+            remove_image_file(self.request.user.id, filename)
+            raise
 
     def create(self, request, *args, **kwargs):
         image_file = request.FILES.get("file")
         if not image_file:
-            raise ValidationError("Debes adjuntar un archivo de imagen con el campo 'file'.")
+            raise serializers.ValidationError("Debes adjuntar un archivo de imagen con el campo 'file'.")
 
-        external_id = request.data.get("id")
         image_type = request.data.get("type")
-
-        if not external_id or not image_type:
-            raise ValidationError("Faltan campos 'id' o 'type' en la solicitud.")
-
-        delete_old_image_file(request.user.id, external_id, image_type)
-        filename = save_image_to_webp(image_file, request.user.id)
-
-        image = Image.objects.create(
-            name=filename,
-            url=filename,
-            external_id=external_id,
-            type=image_type,
-            processing_status='UPLOADED',
-        )
+        if image_type not in Image.ImageType.values:
+            raise serializers.ValidationError({'type': f"Tipo de imagen no válido: {image_type}"})
+        external_id = request.data.get("id")
+        if image_type != Image.ImageType.USER:
+            try:
+                external_id = int(external_id)
+            except (TypeError, ValueError):
+                raise serializers.ValidationError({'id': "El campo 'id' debe ser un entero."})
+        [(image_type, external_id)] = self.authorize_targets([(image_type, external_id)])
+
+        filename, metadata = save_image_to_webp(image_file, request.user.id)
+        image, previous_url = self.save_image(external_id, image_type, filename, metadata)
+        if previous_url and previous_url != filename:
+            remove_image_file(request.user.id, previous_url)
         serializer = self.get_serializer(image)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+    @action(detail=False, methods=['post'], url_path='batch')
+    def batch(self, request, *args, **kwargs):
+        """
+        Sube varias imágenes en una sola petición multipart.
+
+        Campos repetidos y alineados por posición: `file`, `id` y `type` (si solo se envía
+        un `type`, se aplica a todos los archivos). Todas se validan antes de decodificar,
+        se codifican en paralelo y sus filas se guardan en una única transacción.
+        Devuelve un resultado por archivo: 201 si todas se guardan, 207 si solo algunas
+        y 400 si ninguna.
+        """
+        files = request.FILES.getlist("file")
+        if not files:
+            raise serializers.ValidationError("Debes adjuntar al menos un archivo de imagen con el campo 'file'.")
+        if len(files) > settings.MEDIA_IMAGE_BATCH_MAX_FILES:
+            raise serializers.ValidationError(f"Como máximo se permiten {settings.MEDIA_IMAGE_BATCH_MAX_FILES} imágenes por lote.")
+
+        external_ids = request.data.getlist("id")
+        image_types = request.data.getlist("type")
+        if len(image_types) == 1:
+            image_types = image_types * len(files)
+        if len(external_ids) != len(files) or len(image_types) != len(files):
+            raise serializers.ValidationError("Cada archivo debe tener su 'id' y 'type' correspondiente.")
+        if any(image_type not in Image.ImageType.values for image_type in image_types):
+            raise serializers.ValidationError({'type': f"Tipos de imagen válidos: {', '.join(Image.ImageType.values)}"})
+        try:
+            external_ids = [
+                external_id if image_type == Image.ImageType.USER else int(external_id)
+                for external_id, image_type in zip(external_ids, image_types)
+            ]
+        except ValueError:
+            raise serializers.ValidationError({'id': "Cada 'id' debe ser un entero."})
+        targets = self.authorize_targets(list(zip(image_types, external_ids)))
+
+        items = [
+            {'file': image_file, 'external_id': external_id, 'type': image_type}
+            for image_file, (image_type, external_id) in zip(files, targets)
+        ]
+        results = process_image_batch(items, request.user.id, processing_status='UPLOADED')
+
+        payload = []
+        for result in results:
+            image = result.pop('image')
+            result['image'] = ImageListSerializer(image).data if image else None
+            payload.append(result)
+
+        saved = sum(1 for result in payload if result['error'] is None)
+        if saved == len(payload):
+            response_status = status.HTTP_201_CREATED
+        elif saved:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+        return Response({'results': payload}, status=response_status)
+
     def update(self, request, *args, **kwargs):
         instance = self.get_object()
         image_file = request.FILES.get("file")
         if not image_file:
-            raise ValidationError("Debes adjuntar un archivo de imagen con el campo 'file'.")
-
-        delete_old_image_file(request.user.id, instance.external_id, instance.type)
-        filename = save_image_to_webp(image_file, request.user.id)
+            raise serializers.ValidationError("Debes adjuntar un archivo de imagen con el campo 'file'.")
 
-        instance.name = filename
-        instance.url = filename
-        instance.processing_status = 'UPLOADED'
-        instance.save()
+        filename, metadata = save_image_to_webp(image_file, request.user.id)
+        image, previous_url = self.save_image(instance.external_id, instance.type, filename, metadata)
+        if previous_url and previous_url != filename:
+            remove_image_file(request.user.id, previous_url)
 
-        serializer = self.get_serializer(instance)
+        serializer = self.get_serializer(image)
         return Response(serializer.data)
 
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
-        file_path = os.path.join(settings.MEDIA_IMG_PATH, str(request.user.id), instance.url)
-        if os.path.exists(file_path):
-            os.remove(file_path)
-        instance.delete()
+        delete_image(instance, request.user.id)
         return Response(status=status.HTTP_204_NO_CONTENT)
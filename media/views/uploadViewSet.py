@@ -0,0 +1,107 @@
+from django.forms import ValidationError
+from rest_framework import mixins, serializers, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.parsers import BaseParser, JSONParser
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from api.throttling import ExpensiveEndpointThrottleMixin
+from media.models.upload_session import UploadSession
+from media.serializers.image_serializer import ImageListSerializer
+from media.serializers.upload_serializer import UploadSessionSerializer
+from media.services.upload_service import (
+    UploadRangeError,
+    UploadStateError,
+    abort_upload,
+    create_upload_session,
+    finalize_upload,
+    write_chunk,
+)
+
+
+class ChunkParser(BaseParser):
+    """
+    Parser para el cuerpo binario de un trozo. Devuelve el stream sin leerlo, para que la vista
+    lo copie por bloques al archivo temporal sin cargar el trozo entero en memoria.
+    """
+    media_type = 'application/offset+octet-stream'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        return stream
+
+
+class OctetStreamChunkParser(ChunkParser):
+    media_type = 'application/octet-stream'
+
+
+class UploadSessionViewSet(
+    ExpensiveEndpointThrottleMixin,
+    mixins.RetrieveModelMixin,
+    viewsets.GenericViewSet
+):
+    """
+    Subidas de imagen reanudables.
+
+    - POST   /uploads/                 crea la sesión (`filename`, `type`, `external_id`, `total_size`).
+    - PUT    /uploads/<id>/            envía un trozo con `Content-Range: bytes <inicio>-<fin>/<total>`.
+    - HEAD   /uploads/<id>/            devuelve el offset en la cabecera `Upload-Offset` (GET, además, en el cuerpo).
+    - POST   /uploads/<id>/finalize/   procesa el archivo completo y crea o reemplaza la imagen.
+    - DELETE /uploads/<id>/            aborta la subida.
+    """
+    serializer_class = UploadSessionSerializer
+    permission_classes = [IsAuthenticated]
+    parser_classes = [JSONParser, ChunkParser, OctetStreamChunkParser]
+    # Solo el procesado final decodifica la imagen; los trozos son escrituras baratas.
+    throttle_scope = 'upload'
+    throttled_actions = {'finalize'}
+
+    def get_queryset(self):
+        return UploadSession.objects.filter(user_id=self.request.user)
+
+    def offset_response(self, session, response_status=status.HTTP_200_OK):
+        response = Response(self.get_serializer(session).data, status=response_status)
+        response['Upload-Offset'] = str(session.received_bytes)
+        response['Upload-Length'] = str(session.total_size)
+        response['Cache-Control'] = 'no-store'
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.offset_response(self.get_object())
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        session = create_upload_session(request.user, **serializer.validated_data)
+        response = self.offset_response(session, status.HTTP_201_CREATED)
+        response['Location'] = request.build_absolute_uri(f"{session.pk}/")
+        return response
+
+    def update(self, request, *args, **kwargs):
+        session = self.get_object()
+        if not hasattr(request.data, 'read'):
+            raise serializers.ValidationError("El trozo debe enviarse como application/offset+octet-stream.")
+        try:
+            session = write_chunk(session.pk, request.user, request.headers.get('Content-Range'), request.data)
+        except UploadRangeError as e:
+            session.refresh_from_db()
+            response = self.offset_response(session, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+            response.data = {'detail': str(e), 'received_bytes': session.received_bytes}
+            return response
+        except UploadStateError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_409_CONFLICT)
+        return self.offset_response(session)
+
+    @action(detail=True, methods=['post'])
+    def finalize(self, request, *args, **kwargs):
+        session = self.get_object()
+        try:
+            image = finalize_upload(session.pk, request.user)
+        except UploadStateError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_409_CONFLICT)
+        except ValidationError as e:
+            raise serializers.ValidationError(e.messages)
+        return Response(ImageListSerializer(image).data, status=status.HTTP_201_CREATED)
+
+    def destroy(self, request, *args, **kwargs):
+        session = self.get_object()
+        abort_upload(session.pk, request.user)
+        return Response(status=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,76 @@
+"""
+Filtros de las recetas para `RecipeViewSet`.
+
+Cada filtro se resuelve con un índice:
+    - `category`, `ingredients`: subconsultas `id IN (...)` sobre 'categories_recipes' y
+      'recipe_ingredients', que se recorren desde el índice de la categoría o del ingrediente.
+    - `exclude_ingredients`: `NOT EXISTS` sobre el índice (receta, ingrediente).
+    - Rangos de duración, comensales y fecha: índices de una columna de 'recipes'.
+"""
+from django.db.models import Exists, OuterRef
+from django_filters import rest_framework as filters
+from django_filters.rest_framework import DjangoFilterBackend
+
+from recipes.models.recipe import Recipe
+from recipes.models.recipeIngredient import RecipeIngredient
+
+
+class NumberInFilter(filters.BaseInFilter, filters.NumberFilter):
+    """Lista de números separados por comas (`?category=1,2`)."""
+
+
+class RecipeFilter(filters.FilterSet):
+    """
+    Filtros de la lista de recetas.
+
+    Attributes:
+        category: Recetas de alguna de las categorías (`?category=1,2`).
+        ingredients: Recetas que llevan todos los ingredientes indicados.
+        exclude_ingredients: Recetas que no llevan ninguno de los ingredientes indicados.
+        duration_min / duration_max: Rango de `duration_minutes`, ambos inclusive.
+        commensals_min / commensals_max: Rango de `commensals`, ambos inclusive.
+        created_after / created_before: Rango de `created_at` (ISO 8601), ambos inclusive.
+    """
+    category = NumberInFilter(method='filter_category')
+    ingredients = NumberInFilter(method='filter_ingredients')
+    exclude_ingredients = NumberInFilter(method='filter_exclude_ingredients')
+    duration_min = filters.NumberFilter(field_name='duration_minutes', lookup_expr='gte')
+    duration_max = filters.NumberFilter(field_name='duration_minutes', lookup_expr='lte')
+    commensals_min = filters.NumberFilter(field_name='commensals', lookup_expr='gte')
+    commensals_max = filters.NumberFilter(field_name='commensals', lookup_expr='lte')
+    created_after = filters.IsoDateTimeFilter(field_name='created_at', lookup_expr='gte')
+    created_before = filters.IsoDateTimeFilter(field_name='created_at', lookup_expr='lte')
+
+    class Meta:
+        model = Recipe
+        fields = ['user_id', 'id']
+
+    def filter_category(self, queryset, name, value):
+        # Subconsulta en vez de JOIN: una receta de varias categorías no sale repetida.
+        through = Recipe.categories.through.objects.filter(category_id__in=value)
+        return queryset.filter(id__in=through.values('recipe_id'))
+
+    def filter_ingredients(self, queryset, name, value):
+        for ingredient_id in set(value):
+            queryset = queryset.filter(
+                id__in=RecipeIngredient.objects.filter(ingredient_id=ingredient_id).values('recipe_id')
+            )
+        return queryset
+
+    def filter_exclude_ingredients(self, queryset, name, value):
+        return queryset.filter(~Exists(
+            RecipeIngredient.objects.filter(recipe_id=OuterRef('pk'), ingredient_id__in=value)
+        ))
+
+
+class RecipeFilterBackend(DjangoFilterBackend):
+    """
+    `DjangoFilterBackend` que deja en `view.filterset` el filterset con el que ha filtrado, ya
+    validado, para que la vista reutilice sus `cleaned_data` (por ejemplo, en la clave de cache de
+    las facetas) sin construirlo y validarlo otra vez.
+    """
+
+    def get_filterset(self, request, queryset, view):
+        filterset = super().get_filterset(request, queryset, view)
+        view.filterset = filterset
+        return filterset
@@ -0,0 +1,30 @@
+# CF-backend/recipes/management/commands/build_similarity.py
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.services.similarity import build_similarity_index
+
+
+class Command(BaseCommand):
+    help = (
+        'Calcula las recetas similares (co-favoritos e ingredientes en común) y publica el índice '
+        'de vecinas en SIMILARITY_INDEX_DIR para /recipes/recipes/{id}/similar/.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top-k', type=int, default=None, help='Vecinas por receta (por defecto SIMILARITY_TOP_K).')
+        parser.add_argument('--output', default=None, help='Directorio del índice (por defecto SIMILARITY_INDEX_DIR).')
+        parser.add_argument('--favorite-weight', type=float, default=None, help='Peso de la similitud por co-favoritos.')
+        parser.add_argument('--ingredient-weight', type=float, default=None, help='Peso de la similitud por ingredientes.')
+
+    def handle(self, *args, **options):
+        if options['top_k'] is not None and options['top_k'] < 1:
+            raise CommandError('--top-k debe ser mayor que 0')
+        total, version = build_similarity_index(
+            directory=options['output'],
+            top_k=options['top_k'],
+            favorite_weight=options['favorite_weight'],
+            ingredient_weight=options['ingredient_weight'],
+        )
+        self.stdout.write(f'Recetas indexadas: {total}')
+        self.stdout.write(f'Índice publicado en: {version}')
+        self.stdout.write(self.style.SUCCESS('✅ Cálculo de recetas similares completado'))
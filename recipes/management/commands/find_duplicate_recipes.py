@@ -0,0 +1,43 @@
+# CF-backend/recipes/management/commands/find_duplicate_recipes.py
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.models.recipe import Recipe
+from recipes.services.duplicates import duplicate_clusters, index_recipes
+
+
+class Command(BaseCommand):
+    help = (
+        'Calcula las firmas MinHash de las recetas que aún no la tienen (o de todas con --reindex) '
+        'y muestra los grupos de recetas casi duplicadas encontrados con LSH.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reindex',
+            action='store_true',
+            help='Recalcula las firmas de todas las recetas (tras editar recetas o cambiar los parámetros de MinHash).',
+        )
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            default=None,
+            help='Similitud mínima entre 0 y 1 (por defecto DUPLICATE_THRESHOLD).',
+        )
+
+    def handle(self, *args, **options):
+        threshold = options['threshold']
+        if threshold is not None and not 0 < threshold <= 1:
+            raise CommandError('--threshold debe estar entre 0 y 1')
+
+        recipes = Recipe.objects.order_by('id')
+        if not options['reindex']:
+            recipes = recipes.filter(signature__isnull=True)
+        indexed = index_recipes(recipes.values_list('id', flat=True))
+        self.stdout.write(f'Recetas indexadas: {indexed}')
+
+        clusters = duplicate_clusters(threshold)
+        for cluster in clusters:
+            names = ', '.join(f"#{recipe['id']} {recipe['name']}" for recipe in cluster['recipes'])
+            self.stdout.write(f"[{cluster['similarity']:.2f}] {names}")
+        self.stdout.write(f'Grupos de posibles duplicados: {len(clusters)}')
+        self.stdout.write(self.style.SUCCESS('✅ Búsqueda de recetas duplicadas completada'))
@@ -0,0 +1,51 @@
+# CF-backend/recipes/management/commands/rebuild_recipe_documents.py
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.models.recipe import Recipe
+from recipes.services.recipe_documents import find_stale_documents, rebuild_documents
+
+
+class Command(BaseCommand):
+    help = (
+        'Regenera los documentos precalculados del detalle de las recetas (todos, o solo los que '
+        'faltan con --missing-only). Con --check compara los guardados con los actuales y muestra '
+        'los que no coinciden; con --check --fix, además, los regenera.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--missing-only',
+            action='store_true',
+            help='Genera solo los documentos de las recetas que no tienen (p. ej. tras migrar).',
+        )
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Comprueba la consistencia de los documentos sin regenerarlos.',
+        )
+        parser.add_argument(
+            '--fix',
+            action='store_true',
+            help='Con --check, regenera los documentos que faltan o no coinciden.',
+        )
+
+    def handle(self, *args, **options):
+        if options['fix'] and not options['check']:
+            raise CommandError('--fix solo se puede usar junto con --check')
+
+        if options['check']:
+            missing, stale = find_stale_documents()
+            for recipe_id in stale:
+                self.stdout.write(self.style.WARNING(f'Documento desactualizado: receta #{recipe_id}'))
+            self.stdout.write(f'Documentos sin generar: {len(missing)}; desactualizados: {len(stale)}')
+            if options['fix'] and (missing or stale):
+                self.stdout.write(f'Documentos regenerados: {rebuild_documents(missing + stale)}')
+            self.stdout.write(self.style.SUCCESS('✅ Comprobación de documentos de recetas completada'))
+            return
+
+        recipes = Recipe.objects.order_by('id')
+        if options['missing_only']:
+            recipes = recipes.filter(document__isnull=True)
+        rebuilt = rebuild_documents(recipes.values_list('id', flat=True))
+        self.stdout.write(f'Documentos generados: {rebuilt}')
+        self.stdout.write(self.style.SUCCESS('✅ Regeneración de documentos de recetas completada'))
@@ -0,0 +1,31 @@
+# CF-backend/recipes/management/commands/update_popularity.py
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.services.popularity import update_popularity
+
+
+class Command(BaseCommand):
+    help = (
+        'Recalcula las puntuaciones de tendencia de las recetas con actividad nueva y refresca '
+        'los rankings "trending" y "popular" guardados en la base de datos. Pensado para ejecutarse periódicamente.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Recalcula todas las recetas, no solo las que han cambiado desde la última pasada.',
+        )
+        parser.add_argument(
+            '--top-k',
+            type=int,
+            default=None,
+            help='Número de recetas de cada ranking (por defecto POPULARITY_TOP_K).',
+        )
+
+    def handle(self, *args, **options):
+        if options['top_k'] is not None and options['top_k'] < 1:
+            raise CommandError('--top-k debe ser mayor que 0')
+        updated = update_popularity(full=options['full'], top_k=options['top_k'])
+        self.stdout.write(f'Recetas recalculadas: {updated}')
+        self.stdout.write(self.style.SUCCESS('✅ Actualización de rankings completada'))
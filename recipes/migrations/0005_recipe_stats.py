@@ -0,0 +1,44 @@
+# Generated by Django 5.2.3 on 2026-10-19 05:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+from django.utils import timezone
+
+
+def backfill_favorites_count(apps, schema_editor):
+    """Crea los contadores de las recetas que ya tienen favoritos a partir de la tabla 'favorites'."""
+    Favorite = apps.get_model('users', 'Favorite')
+    RecipeStats = apps.get_model('recipes', 'RecipeStats')
+    counts = Favorite.objects.values('recipe_id').annotate(total=Count('id')).order_by()
+    now = timezone.now()
+    batch = []
+    for row in counts.iterator():
+        batch.append(RecipeStats(recipe_id=row['recipe_id'], favorites_count=row['total'], updated_at=now))
+        if len(batch) >= 1000:
+            RecipeStats.objects.bulk_create(batch)
+            batch = []
+    RecipeStats.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0004_alter_recipe_description'),
+        ('users', '0005_favorite_user_recipe_uniq'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeStats',
+            fields=[
+                ('recipe', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='recipes.recipe')),
+                ('favorites_count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'recipe_stats',
+            },
+        ),
+        migrations.RunPython(backfill_favorites_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 5.2.3 on 2026-10-19 05:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+
+def backfill_daily_favorites(apps, schema_editor):
+    """Reparte los favoritos existentes en cubos diarios según su fecha de creación."""
+    Favorite = apps.get_model('users', 'Favorite')
+    RecipeDailyStats = apps.get_model('recipes', 'RecipeDailyStats')
+    rows = (
+        Favorite.objects.annotate(day=TruncDate('created_at'))
+        .values('recipe_id', 'day')
+        .annotate(total=Count('id'))
+        .order_by()
+    )
+    now = timezone.now()
+    batch = []
+    for row in rows.iterator():
+        batch.append(RecipeDailyStats(
+            recipe_id=row['recipe_id'], day=row['day'], favorites_added=row['total'], updated_at=now
+        ))
+        if len(batch) >= 1000:
+            RecipeDailyStats.objects.bulk_create(batch)
+            batch = []
+    RecipeDailyStats.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0005_recipe_stats'),
+        ('users', '0005_favorite_user_recipe_uniq'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipestats',
+            name='trending_score',
+            field=models.FloatField(db_index=True, default=0),
+        ),
+        migrations.AlterField(
+            model_name='recipestats',
+            name='favorites_count',
+            field=models.IntegerField(db_index=True, default=0),
+        ),
+        migrations.CreateModel(
+            name='RecipeDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('favorites_added', models.IntegerField(default=0)),
+                ('favorites_removed', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True, db_index=True)),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='recipes.recipe')),
+            ],
+            options={
+                'db_table': 'recipe_daily_stats',
+                'constraints': [models.UniqueConstraint(fields=('recipe', 'day'), name='recipe_daily_stats_recipe_day_uniq')],
+            },
+        ),
+        migrations.RunPython(backfill_daily_favorites, migrations.RunPython.noop),
+    ]
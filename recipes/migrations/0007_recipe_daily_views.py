@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-19 05:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0006_recipe_daily_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipedailystats',
+            name='views',
+            field=models.IntegerField(default=0),
+        ),
+    ]
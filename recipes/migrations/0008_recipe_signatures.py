@@ -0,0 +1,40 @@
+# Generated by Django 5.2.3 on 2026-10-19 05:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0007_recipe_daily_views'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeSignature',
+            fields=[
+                ('recipe', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='signature', serialize=False, to='recipes.recipe')),
+                ('minhash', models.BinaryField()),
+                ('duplicate_candidates', models.JSONField(blank=True, default=list)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'recipe_signatures',
+            },
+        ),
+        migrations.CreateModel(
+            name='RecipeSignatureBand',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('band', models.SmallIntegerField()),
+                ('bucket', models.BigIntegerField()),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='signature_bands', to='recipes.recipe')),
+            ],
+            options={
+                'db_table': 'recipe_signature_bands',
+                'indexes': [models.Index(fields=['band', 'bucket'], name='recipe_sig_band_bucket_idx')],
+                'constraints': [models.UniqueConstraint(fields=('recipe', 'band'), name='recipe_sig_band_recipe_band_uniq')],
+            },
+        ),
+    ]
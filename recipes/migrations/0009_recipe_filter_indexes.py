@@ -0,0 +1,32 @@
+# Generated by Django 5.2.3 on 2026-10-19 05:18
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('measurements', '0003_alter_unit_unit_type'),
+        ('recipes', '0008_recipe_signatures'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['duration_minutes'], name='recipes_duration_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['commensals'], name='recipes_commensals_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['created_at'], name='recipes_created_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipeingredient',
+            index=models.Index(fields=['recipe', 'ingredient'], name='recipe_ing_recipe_ingr_idx'),
+        ),
+    ]
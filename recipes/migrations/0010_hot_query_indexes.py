@@ -0,0 +1,34 @@
+# Generated by Django 5.2.3 on 2026-10-19 05:22
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('measurements', '0003_alter_unit_unit_type'),
+        ('recipes', '0009_recipe_filter_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ingredient',
+            index=models.Index(condition=models.Q(('is_approved', True)), fields=['name'], name='ingredients_approved_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['user_id', '-created_at'], name='recipes_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='step',
+            index=models.Index(fields=['recipe', 'order'], name='steps_recipe_order_idx'),
+        ),
+        migrations.AlterField(
+            model_name='recipe',
+            name='user_id',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+    ]
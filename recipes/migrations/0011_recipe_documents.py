@@ -0,0 +1,25 @@
+# Generated by Django 5.2.3 on 2026-10-19 05:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0010_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeDocument',
+            fields=[
+                ('recipe', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='document', serialize=False, to='recipes.recipe')),
+                ('data', models.JSONField()),
+                ('built_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'recipe_documents',
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.3 on 2026-10-19 06:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0011_recipe_documents'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeRanking',
+            fields=[
+                ('feed', models.CharField(max_length=32, primary_key=True, serialize=False)),
+                ('recipe_ids', models.JSONField(default=list)),
+                ('pass_started_at', models.DateTimeField(blank=True, null=True)),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'recipe_rankings',
+            },
+        ),
+    ]
@@ -3,3 +3,8 @@ from .step import Step
 from .category import Category
 from .ingredient import Ingredient
 from .recipe import Recipe
+from .recipe_stats import RecipeStats
+from .recipe_daily_stats import RecipeDailyStats
+from .recipe_signature import RecipeSignature, RecipeSignatureBand
+from .recipe_document import RecipeDocument
+from .recipe_ranking import RecipeRanking
@@ -35,8 +35,12 @@ class Ingredient(models.Model):
         """ Meta class Define el nombre de la tabla.
         arguments:
         - db_table (str): Es el nombre de la tabla en este caso.
+        - indexes (list): Índice parcial por nombre de los ingredientes aprobados (lista pública).
         """
         db_table = 'ingredients'
+        indexes = [
+            models.Index(fields=['name'], condition=models.Q(is_approved=True), name='ingredients_approved_name_idx'),
+        ]
 
     def __str__(self):
         return self.name
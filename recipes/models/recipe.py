@@ -25,7 +25,8 @@ class Recipe(models.Model):
     
     name = models.CharField(max_length=50)
     description = models.CharField(max_length=255, null=True, blank=True)
-    user_id = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    # Sin índice propio: lo cubre recipes_user_created_idx (user_id, -created_at).
+    user_id = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, db_index=False)
     duration_minutes = models.IntegerField()
     commensals = models.IntegerField()
     created_at = models.DateTimeField(auto_now_add=True)
@@ -42,9 +43,17 @@ class Recipe(models.Model):
         Esta clase define el nombre de la tabla en la base de datos.  
         Args:  
             db_table (str): Nombre de la tabla en la base de datos, en este caso 'recipes'.
+            indexes (list): Índices de los filtros por rango de `RecipeFilter` y de la lista de un
+                usuario ordenada por fecha (`?user_id=` con la ordenación por defecto).
         """
         
         db_table = 'recipes'
+        indexes = [
+            models.Index(fields=['duration_minutes'], name='recipes_duration_idx'),
+            models.Index(fields=['commensals'], name='recipes_commensals_idx'),
+            models.Index(fields=['created_at'], name='recipes_created_at_idx'),
+            models.Index(fields=['user_id', '-created_at'], name='recipes_user_created_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -30,9 +30,13 @@ class RecipeIngredient(models.Model):
     class Meta:
         """
         Metadatos del modelo RecipeIngredient.
-        Define el nombre exacto de la tabla en la base de datos.
+        Define el nombre exacto de la tabla en la base de datos y el índice (receta, ingrediente)
+        con el que se comprueba si una receta lleva un ingrediente sin leer la tabla.
         """
         db_table = 'recipe_ingredients'
+        indexes = [
+            models.Index(fields=['recipe', 'ingredient'], name='recipe_ing_recipe_ingr_idx'),
+        ]
 
     def __str__(self):
         return f"{self.quantity} {self.unit.name} of {self.ingredient.name} for {self.recipe.name}"
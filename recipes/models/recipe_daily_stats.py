@@ -0,0 +1,39 @@
+from django.db import models
+from recipes.models.recipe import Recipe
+
+
+class RecipeDailyStats(models.Model):
+    """Modelo de RecipeDailyStats, contadores de actividad de una receta por día.
+
+    Una fila por (receta, día) que se incrementa con cada evento (ver `recipes.services.counters`).
+    Las puntuaciones de popularidad se calculan a partir de estas filas sin agrupar la tabla
+    'favorites' en cada petición.
+
+    Args:
+        models (Model): Clase base de Django para modelos.
+    Attributes:
+        `recipe (ForeignKey)`: Receta a la que pertenecen los contadores.
+        `day (DateField)`: Día (UTC) del cubo.
+        `favorites_added (int)`: Favoritos creados ese día.
+        `favorites_removed (int)`: Favoritos eliminados ese día.
+        `views (int)`: Visitas al detalle de la receta ese día (acumuladas en memoria y volcadas por lotes).
+        `updated_at (DateTimeField)`: Última modificación, para recalcular solo las recetas con actividad nueva.
+    """
+    recipe = models.ForeignKey(Recipe, on_delete=models.CASCADE, related_name='daily_stats')
+    day = models.DateField()
+    favorites_added = models.IntegerField(default=0)
+    favorites_removed = models.IntegerField(default=0)
+    views = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        """
+        Meta clase para definir metadatos del modelo RecipeDailyStats.
+        Args:
+            db_table (str): Nombre de la tabla en la base de datos, en este caso 'recipe_daily_stats'.
+            constraints (list): Una fila por receta y día.
+        """
+        db_table = 'recipe_daily_stats'
+        constraints = [
+            models.UniqueConstraint(fields=['recipe', 'day'], name='recipe_daily_stats_recipe_day_uniq'),
+        ]
@@ -0,0 +1,31 @@
+from django.db import models
+from recipes.models.recipe import Recipe
+
+
+class RecipeDocument(models.Model):
+    """Modelo de RecipeDocument, detalle de una receta ya serializado.
+
+    Guarda la salida de `RecipeSerializer` sin los campos que dependen del usuario o de los
+    contadores (`favorites_count`, `is_favorited`), de modo que el detalle de una receta es una
+    lectura por clave primaria. Las señales de `recipes.signals` lo borran en la misma transacción
+    que cualquier cambio de la receta, sus pasos, ingredientes, categorías, autor o imágenes, y lo
+    regeneran tras el commit (ver `recipes.services.recipe_documents`).
+
+    Args:
+        models (Model): Clase base de Django para modelos.
+    Attributes:
+        `recipe (OneToOneField)`: Receta, es la clave primaria.
+        `data (JSONField)`: Documento serializado de la receta.
+        `built_at (DateTimeField)`: Fecha y hora en la que se generó el documento.
+    """
+    recipe = models.OneToOneField(Recipe, on_delete=models.CASCADE, primary_key=True, related_name='document')
+    data = models.JSONField()
+    built_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        """
+        Meta clase para definir metadatos del modelo RecipeDocument.
+        Args:
+            db_table (str): Nombre de la tabla en la base de datos, en este caso 'recipe_documents'.
+        """
+        db_table = 'recipe_documents'
@@ -0,0 +1,32 @@
+from django.db import models
+
+
+class RecipeRanking(models.Model):
+    """Modelo de RecipeRanking, lista precalculada de un ranking de recetas.
+
+    La escribe `update_popularity` y la leen todas las vistas de ranking (`trending`, `popular`),
+    de modo que todos los procesos ven el resultado de la última pasada sin depender de un cache
+    compartido. El inicio de esa pasada marca desde dónde se recalculan las puntuaciones en la
+    siguiente (ver `recipes.services.popularity`).
+
+    Args:
+        models (Model): Clase base de Django para modelos.
+    Attributes:
+        `feed (str)`: Nombre del ranking, es la clave primaria.
+        `recipe_ids (JSONField)`: Ids de las recetas del ranking, en orden.
+        `pass_started_at (DateTimeField)`: Inicio de la pasada de `update_popularity` que generó
+            la lista; nulo si se calculó al vuelo porque aún no había ninguna pasada.
+        `computed_at (DateTimeField)`: Fecha y hora en la que se guardó la lista.
+    """
+    feed = models.CharField(max_length=32, primary_key=True)
+    recipe_ids = models.JSONField(default=list)
+    pass_started_at = models.DateTimeField(null=True, blank=True)
+    computed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        """
+        Meta clase para definir metadatos del modelo RecipeRanking.
+        Args:
+            db_table (str): Nombre de la tabla en la base de datos, en este caso 'recipe_rankings'.
+        """
+        db_table = 'recipe_rankings'
@@ -0,0 +1,65 @@
+from django.db import models
+from recipes.models.recipe import Recipe
+
+
+class RecipeSignature(models.Model):
+    """Modelo de RecipeSignature, firma MinHash de una receta para detectar casi duplicados.
+
+    La firma se calcula sobre el nombre, los pasos y los ingredientes normalizados (ver
+    `recipes.services.duplicates`) y se guarda para no recalcular todo el catálogo: al crear una
+    receta solo se calcula la suya y se compara con las de sus mismos cubos LSH.
+
+    Args:
+        models (Model): Clase base de Django para modelos.
+    Attributes:
+        `recipe (OneToOneField)`: Receta, es la clave primaria.
+        `minhash (BinaryField)`: Valores mínimos de cada permutación, como array de uint64.
+        `duplicate_candidates (JSONField)`: Ids de las recetas parecidas encontradas al indexarla.
+        `updated_at (DateTimeField)`: Fecha y hora del último cálculo de la firma.
+    """
+    recipe = models.OneToOneField(Recipe, on_delete=models.CASCADE, primary_key=True, related_name='signature')
+    minhash = models.BinaryField()
+    duplicate_candidates = models.JSONField(default=list, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        """
+        Meta clase para definir metadatos del modelo RecipeSignature.
+        Args:
+            db_table (str): Nombre de la tabla en la base de datos, en este caso 'recipe_signatures'.
+        """
+        db_table = 'recipe_signatures'
+
+
+class RecipeSignatureBand(models.Model):
+    """Modelo de RecipeSignatureBand, cubo LSH de una banda de la firma de una receta.
+
+    Dos recetas son candidatas a duplicado si coinciden en el cubo de alguna banda; el índice
+    (band, bucket) permite buscarlas sin comparar todas las parejas.
+
+    Args:
+        models (Model): Clase base de Django para modelos.
+    Attributes:
+        `recipe (ForeignKey)`: Receta de la firma.
+        `band (int)`: Número de banda.
+        `bucket (int)`: Hash de las filas de la firma que forman la banda.
+    """
+    recipe = models.ForeignKey(Recipe, on_delete=models.CASCADE, related_name='signature_bands')
+    band = models.SmallIntegerField()
+    bucket = models.BigIntegerField()
+
+    class Meta:
+        """
+        Meta clase para definir metadatos del modelo RecipeSignatureBand.
+        Args:
+            db_table (str): Nombre de la tabla en la base de datos, en este caso 'recipe_signature_bands'.
+            indexes (list): Búsqueda de recetas por cubo.
+            constraints (list): Un cubo por receta y banda.
+        """
+        db_table = 'recipe_signature_bands'
+        indexes = [
+            models.Index(fields=['band', 'bucket'], name='recipe_sig_band_bucket_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['recipe', 'band'], name='recipe_sig_band_recipe_band_uniq'),
+        ]
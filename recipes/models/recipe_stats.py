@@ -0,0 +1,32 @@
+from django.db import models
+from recipes.models.recipe import Recipe
+
+
+class RecipeStats(models.Model):
+    """Modelo de RecipeStats, contadores de una receta mantenidos de forma incremental.
+
+    Va en su propia tabla para que los `save()` de la receta (edición) no pisen los contadores
+    con el valor leído al empezar la petición. Se actualiza con `F()` desde
+    `recipes.services.counters`, en la misma transacción que el cambio que cuenta.
+
+    Args:
+        models (Model): Clase base de Django para modelos.
+    Attributes:
+        `recipe (OneToOneField)`: Receta, es la clave primaria.
+        `favorites_count (int)`: Número de usuarios que la tienen en favoritos.
+        `trending_score (float)`: Puntuación de tendencia con decaimiento hacia delante (ver
+            `recipes.services.popularity`); solo es comparable entre recetas.
+        `updated_at (DateTimeField)`: Fecha y hora de la última actualización de los contadores.
+    """
+    recipe = models.OneToOneField(Recipe, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    favorites_count = models.IntegerField(default=0, db_index=True)
+    trending_score = models.FloatField(default=0, db_index=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        """
+        Meta clase para definir metadatos del modelo RecipeStats.
+        Args:
+            db_table (str): Nombre de la tabla en la base de datos, en este caso 'recipe_stats'.
+        """
+        db_table = 'recipe_stats'
@@ -30,9 +30,13 @@ class Step(models.Model):
             Esta clase define el nombre de la tabla en la base de datos.  
         Args:  
             db_table (str): Nombre de la tabla en la base de datos, en este caso 'units'.
+            indexes (list): Pasos de una receta en orden, como los carga `with_recipe_relations`.
         """
 
         db_table = 'steps'
+        indexes = [
+            models.Index(fields=['recipe', 'order'], name='steps_recipe_order_idx'),
+        ]
 
     def __str__(self):
         return f"Step {self.order} for {self.recipe.name}: {self.description[:30]}..."
\ No newline at end of file
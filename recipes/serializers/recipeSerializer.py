@@ -5,6 +5,8 @@ from recipes.models.recipe import Recipe
 from recipes.models.category import Category
 from recipes.models.recipeIngredient import RecipeIngredient
 from recipes.models.step import Step
+from recipes.models.recipe_stats import RecipeStats
+from users.models.favorite import Favorite
 from recipes.models.ingredient import Ingredient
 from measurements.models.unit import Unit
 
@@ -15,12 +17,50 @@ from media.models.image import Image
 from media.serializers.image_serializer import ImageListSerializer
 
 # Importa el servicio de imágenes
-from media.services.image_service import update_image_for_instance
+from media.services.image_service import discard_encoded_images, encode_uploaded_images, save_encoded_images
 
 import json
+import logging
 
+logger = logging.getLogger(__name__)
 
-class RecipeSerializer(serializers.ModelSerializer):
+
+def get_recipe_image(context, recipe):
+    """
+    Imagen de la receta desde el mapa {recipe_id: Image} del contexto (ver
+    `recipes.services.recipe_loading`) o, si no lo hay, con una consulta.
+    """
+    if 'recipe_images' in context:
+        return context['recipe_images'].get(recipe.id)
+    return Image.objects.filter(external_id=recipe.id, type='RECIPE').first()
+
+
+class RecipeFavoriteFieldsMixin:
+    """
+    Campos `favorites_count` e `is_favorited` leídos de las anotaciones de
+    `recipes.services.recipe_loading.with_user_annotations`; sin ellas (p. ej. tras crear la
+    receta) se consultan. `is_favorited` se omite para usuarios anónimos.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        if request is None or not request.user.is_authenticated:
+            fields.pop('is_favorited', None)
+        return fields
+
+    def get_favorites_count(self, obj):
+        if hasattr(obj, 'favorites_count'):
+            return obj.favorites_count
+        return RecipeStats.objects.filter(recipe_id=obj.id).values_list('favorites_count', flat=True).first() or 0
+
+    def get_is_favorited(self, obj):
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
+        return Favorite.objects.filter(user_id=self.context['request'].user.pk, recipe_id=obj.id).exists()
+
+
+class RecipeSerializer(RecipeFavoriteFieldsMixin, serializers.ModelSerializer):
     """
         Serializer para el modelo Recipe utilizado en vistas públicas o de uso general.
 
@@ -48,6 +88,8 @@ class RecipeSerializer(serializers.ModelSerializer):
             `ingredients (list[obj])`: Lista de ingredientes de la receta.
             `updated_at (datetime)`: Fecha de la última modificación del registro (solo lectura).
             `image (str)`: URL de la imagen principal de la receta.
+            `favorites_count (int)`: Número de usuarios que tienen la receta en favoritos.
+            `is_favorited (bool)`: Si el usuario autenticado la tiene en favoritos (no aparece para anónimos).
 
         Author:
             Lorena Martínez
@@ -63,6 +105,8 @@ class RecipeSerializer(serializers.ModelSerializer):
     ingredients = RecipeIngredientSerializer(many=True, read_only=True, source='recipe_ingredients')
     steps = StepSerializer(many=True, read_only=True, source='step_set')
     image = serializers.SerializerMethodField()
+    favorites_count = serializers.SerializerMethodField()
+    is_favorited = serializers.SerializerMethodField()
 
     class Meta:
 
@@ -78,15 +122,55 @@ class RecipeSerializer(serializers.ModelSerializer):
             'categories',
             'steps',
             'updated_at',
-            'image'
+            'image',
+            'favorites_count',
+            'is_favorited'
         ]
 
         read_only_fields = ['id', 'user', 'updated_at']
 
     def get_image(self, obj):
-        image = Image.objects.filter(external_id=obj.id, type='RECIPE').first()
+        image = get_recipe_image(self.context, obj)
         return ImageListSerializer(image).data if image else None
 
+    def encode_images(self, request):
+        """
+        Valida y codifica a WebP las imágenes de la petición (`photo` y `step_image_<n>`) y las deja
+        en el contexto. La vista lo llama antes de abrir la transacción de la receta, así que
+        `create` y `update` solo insertan las filas; sin la vista, se codifican al guardar.
+
+        Returns:
+            dict: {clave del archivo: (nombre, metadatos)}.
+        """
+        if 'encoded_images' not in self.context:
+            files = {key: request.FILES[key] for key in request.FILES if key == 'photo' or key.startswith('step_image_')}
+            written, errors = encode_uploaded_images(files, request.user.id)
+            if errors:
+                raise serializers.ValidationError({"images": errors})
+            self.context['encoded_images'] = written
+        return self.context['encoded_images']
+
+    def _save_images(self, image_items):
+        """
+        Guarda las filas de las imágenes de la receta y sus pasos, ya codificadas por `encode_images`,
+        con una sola llamada al servicio. Los archivos de la petición que no corresponden a ningún
+        paso se borran.
+
+        Args:
+            image_items (list[tuple]): Tuplas (type, external_id, clave del archivo).
+        """
+        request = self.context.get('request')
+        encoded = self.encode_images(request)
+        # Una fila por entidad: si dos archivos apuntan a la misma, gana el último.
+        targets = {(image_type, external_id): key for image_type, external_id, key in image_items}
+        used = set(targets.values())
+        discard_encoded_images([entry for key, entry in encoded.items() if key not in used], request.user.id)
+        if targets:
+            save_encoded_images(
+                [(image_type, external_id, encoded[key]) for (image_type, external_id), key in targets.items()],
+                request.user.id,
+            )
+
     def create(self, validated_data):
         request = self.context.get('request')
 
@@ -109,6 +193,8 @@ class RecipeSerializer(serializers.ModelSerializer):
         except json.JSONDecodeError:
             raise serializers.ValidationError({"steps_data": "Formato JSON de pasos inválido."})
 
+        self.encode_images(request)
+
         # === FIX PARA KeyError: 'user' ===
         # 'validated_data' contiene 'user_id', no 'user'.
         user = validated_data.pop('user_id')
@@ -145,15 +231,11 @@ class RecipeSerializer(serializers.ModelSerializer):
                 raise serializers.ValidationError(f"Ingrediente o unidad no encontrado: {e}")
 
         # === La parte de los archivos sigue esperando que vengan en request.FILES ===
+        # Todas las imágenes (foto de la receta y de los pasos) se procesan juntas en un lote.
+        image_items = []
         recipe_photo_file = request.FILES.get('photo')
         if recipe_photo_file:
-            update_image_for_instance(
-                image_file=recipe_photo_file,
-                user_id=request.user.id,
-                external_id=recipe.id,
-                image_type=Image.ImageType.RECIPE
-            )
-
+            image_items.append((Image.ImageType.RECIPE, recipe.id, 'photo'))
 
         for idx, step_data in enumerate(parsed_steps):
             order = step_data.get('order')
@@ -168,14 +250,10 @@ class RecipeSerializer(serializers.ModelSerializer):
                 description=text,
             )
 
-            step_image_file = request.FILES.get(f'step_image_{idx}')
-            if step_image_file:
-                update_image_for_instance(
-                    image_file=step_image_file,
-                    user_id=request.user.id,
-                    external_id=step_obj.id,
-                    image_type=Image.ImageType.STEP
-                )
+            if f'step_image_{idx}' in request.FILES:
+                image_items.append((Image.ImageType.STEP, step_obj.id, f'step_image_{idx}'))
+
+        self._save_images(image_items)
 
         return recipe
 
@@ -188,6 +266,10 @@ class RecipeSerializer(serializers.ModelSerializer):
         (categorías) y anidadas (ingredientes, pasos) comparando los datos existentes
         con los recibidos.
         """
+        request = self.context['request']
+        self.encode_images(request)
+        image_items = []
+
         instance.name = validated_data.get('name', instance.name)
         instance.description = validated_data.get('description', instance.description)
         instance.duration_minutes = validated_data.get('duration_minutes', instance.duration_minutes)
@@ -249,7 +331,7 @@ class RecipeSerializer(serializers.ModelSerializer):
             current_steps = {s.order: s for s in instance.step_set.all()}
             new_step_orders_set = {item['order'] for item in new_steps_data}
 
-            for item in new_steps_data:
+            for idx, item in enumerate(new_steps_data):
                 order = item['order']
                 description = item['description']
 
@@ -258,20 +340,27 @@ class RecipeSerializer(serializers.ModelSerializer):
                     step_instance.description = description
                     step_instance.save()
                 else:
-                    Step.objects.create(
+                    step_instance = Step.objects.create(
                         recipe=instance,
                         order=order,
                         description=description
                     )
 
+                if f'step_image_{idx}' in request.FILES:
+                    image_items.append((Image.ImageType.STEP, step_instance.id, f'step_image_{idx}'))
+
             for order_to_delete, step_instance in current_steps.items():
                 if order_to_delete not in new_step_orders_set:
                     step_instance.delete()
 
+        if 'photo' in request.FILES:
+            image_items.append((Image.ImageType.RECIPE, instance.id, 'photo'))
+        self._save_images(image_items)
+
         return instance
 
 
-class RecipeAdminSerializer(serializers.ModelSerializer):
+class RecipeAdminSerializer(RecipeFavoriteFieldsMixin, serializers.ModelSerializer):
 
     """
     Serializer para el modelo Recipe con acceso completo a todos los campos.
@@ -305,6 +394,8 @@ class RecipeAdminSerializer(serializers.ModelSerializer):
     steps = StepSerializer(many=True, read_only=True, source='step_set')
     ingredients = RecipeIngredientSerializer(many=True, read_only=True, source='recipe_ingredients')
     image = serializers.SerializerMethodField()
+    favorites_count = serializers.SerializerMethodField()
+    is_favorited = serializers.SerializerMethodField()
 
     class Meta:
         model = Recipe
@@ -312,7 +403,7 @@ class RecipeAdminSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at', 'user_id']
 
     def get_image(self, obj):
-        image = Image.objects.filter(external_id=obj.id, type='RECIPE').first()
+        image = get_recipe_image(self.context, obj)
         return ImageListSerializer(image).data['url'] if image else None
 
     # Si el RecipeAdminSerializer también va a manejar subidas de imágenes
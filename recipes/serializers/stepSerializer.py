@@ -3,6 +3,13 @@ from recipes.models import Step, Recipe
 from media.models.image import Image
 from media.serializers.image_serializer import ImageListSerializer
 
+
+def get_step_image(context, step):
+    """Imagen del paso desde el mapa {step_id: Image} del contexto o, si no lo hay, con una consulta."""
+    if 'step_images' in context:
+        return context['step_images'].get(step.id)
+    return Image.objects.filter(external_id=step.id, type='STEP').first()
+
 class StepSerializer(serializers.ModelSerializer):
     """
     Serializer para el modelo Step.
@@ -31,7 +38,7 @@ class StepSerializer(serializers.ModelSerializer):
         fields = ('order', 'description', 'id', 'recipe', 'created_at', 'updated_at', 'image')  
         read_only_fields = ('id', 'created_at', 'updated_at', 'recipe')
     def get_image(self, obj):
-        image = Image.objects.filter(external_id=obj.id, type='STEP').first()
+        image = get_step_image(self.context, obj)
         return ImageListSerializer(image).data if image else None
 
 
@@ -65,6 +72,6 @@ class StepAdminSerializer(serializers.ModelSerializer):
         read_only_fields = ('created_at', 'updated_at', 'id', 'recipe')
         
     def get_image(self, obj):
-        image = Image.objects.filter(external_id=obj.id, type='STEP').first()
+        image = get_step_image(self.context, obj)
         return ImageListSerializer(image).data if image else None
 
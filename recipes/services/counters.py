@@ -0,0 +1,183 @@
+"""
+Contadores incrementales de las recetas.
+
+    - `RecipeStats`: totales por receta (favoritos), con `UPDATE ... SET n = n + delta`.
+    - `RecipeDailyStats`: cubos diarios por receta, con un único `INSERT ... ON CONFLICT DO UPDATE`
+      que suma los deltas de varias filas a la vez.
+    - `BufferedCounter`: para eventos de lectura muy frecuentes (visitas), acumula en memoria del
+      proceso y vuelca cada pocos segundos a los cubos diarios con `add_daily_counts`.
+
+Ninguna actualización lee el valor previo, así que se pueden aplicar en paralelo sin bloqueos
+largos. Las filas de contadores se crean la primera vez que hace falta.
+"""
+import atexit
+import logging
+import os
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection, connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from recipes.models.recipe import Recipe
+from recipes.models.recipe_daily_stats import RecipeDailyStats
+from recipes.models.recipe_stats import RecipeStats
+
+logger = logging.getLogger(__name__)
+
+DAILY_COUNTER_FIELDS = ('favorites_added', 'favorites_removed', 'views')
+UPSERT_BATCH_SIZE = 500
+
+
+def increment_favorites(recipe_id, delta=1):
+    """Suma `delta` al contador de favoritos de la receta; llamar dentro de la transacción del cambio."""
+    if not delta:
+        return
+    with transaction.atomic():
+        updated = RecipeStats.objects.filter(recipe_id=recipe_id).update(favorites_count=F('favorites_count') + delta)
+        if not updated:
+            RecipeStats.objects.bulk_create([RecipeStats(recipe_id=recipe_id)], ignore_conflicts=True)
+            RecipeStats.objects.filter(recipe_id=recipe_id).update(favorites_count=F('favorites_count') + delta)
+
+
+def add_daily_counts(increments):
+    """
+    Suma contadores diarios en bloque.
+
+    Args:
+        increments (dict): {(recipe_id, day): {campo: delta}} con campos de `DAILY_COUNTER_FIELDS`.
+    """
+    rows = [
+        (recipe_id, day, [deltas.get(field, 0) for field in DAILY_COUNTER_FIELDS])
+        for (recipe_id, day), deltas in increments.items()
+        if any(deltas.values())
+    ]
+    if not rows:
+        return
+    meta = RecipeDailyStats._meta
+    quote = connection.ops.quote_name
+    table = quote(meta.db_table)
+    columns = [meta.get_field(name).column for name in ('recipe', 'day', *DAILY_COUNTER_FIELDS, 'updated_at')]
+    updates = [f"{quote(column)} = {table}.{quote(column)} + EXCLUDED.{quote(column)}" for column in columns[2:-1]]
+    updates.append(f"{quote(columns[-1])} = EXCLUDED.{quote(columns[-1])}")
+    placeholders = '(' + ', '.join(['%s'] * len(columns)) + ')'
+    updated_at = meta.get_field('updated_at').get_db_prep_value(timezone.now(), connection)
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+            batch = rows[start:start + UPSERT_BATCH_SIZE]
+            params = []
+            for recipe_id, day, deltas in batch:
+                params.extend([recipe_id, meta.get_field('day').get_db_prep_value(day, connection), *deltas, updated_at])
+            cursor.execute(
+                f"INSERT INTO {table} ({', '.join(quote(column) for column in columns)}) "
+                f"VALUES {', '.join([placeholders] * len(batch))} "
+                f"ON CONFLICT ({quote(columns[0])}, {quote(columns[1])}) DO UPDATE SET {', '.join(updates)}",
+                params,
+            )
+
+
+def record_favorite(recipe_id, delta):
+    """
+    Registra el alta (`delta=1`) o la baja (`delta=-1`) de un favorito: total de la receta y cubo del día.
+    """
+    field = 'favorites_added' if delta > 0 else 'favorites_removed'
+    with transaction.atomic():
+        increment_favorites(recipe_id, delta)
+        add_daily_counts({(recipe_id, timezone.now().date()): {field: abs(delta)}})
+
+
+class BufferedCounter:
+    """
+    Contador diario por receta acumulado en memoria y volcado por lotes.
+
+    `add()` solo suma en un `Counter` protegido por un lock: la petición no escribe en la base de
+    datos. Un hilo en segundo plano vuelca lo acumulado cada `RECIPE_COUNTER_FLUSH_INTERVAL`
+    segundos (o antes, si hay más de `RECIPE_COUNTER_MAX_PENDING` claves pendientes) con un único
+    upsert multi-fila. Si el proceso muere se pierden como mucho los eventos de un intervalo; si el
+    volcado falla, los eventos vuelven al buffer para el siguiente intento.
+
+    Con `RECIPE_COUNTER_FLUSH_INTERVAL = 0` no se arranca el hilo y hay que llamar a `flush()`.
+
+    Args:
+        field (str): Columna de `RecipeDailyStats` (una de `DAILY_COUNTER_FIELDS`).
+    """
+
+    def __init__(self, field):
+        if field not in DAILY_COUNTER_FIELDS:
+            raise ValueError(f'Campo de contador desconocido: {field}')
+        self.field = field
+        self._reset()
+        atexit.register(self.flush)
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._pending = Counter()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def add(self, recipe_id, amount=1):
+        """Suma `amount` al contador de hoy de la receta."""
+        if os.getpid() != self._pid:
+            # Proceso hijo tras un fork (p. ej. workers de gunicorn): ni el lock ni el hilo se heredan.
+            self._reset()
+        key = (recipe_id, timezone.now().date())
+        with self._lock:
+            self._pending[key] += amount
+            pending = len(self._pending)
+        if settings.RECIPE_COUNTER_FLUSH_INTERVAL > 0:
+            self._ensure_flusher()
+            if pending >= settings.RECIPE_COUNTER_MAX_PENDING:
+                self._wakeup.set()
+
+    def clear(self):
+        """Descarta los eventos pendientes sin volcarlos."""
+        with self._lock:
+            self._pending.clear()
+
+    def pending(self):
+        """Copia de los eventos aún no volcados: {(recipe_id, día): cantidad}."""
+        with self._lock:
+            return dict(self._pending)
+
+    def flush(self):
+        """Vuelca lo acumulado a `RecipeDailyStats`. Devuelve el número de filas escritas."""
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+        if not pending:
+            return 0
+        try:
+            # Las recetas borradas desde la visita romperían la clave foránea de todo el lote.
+            existing = set(Recipe.objects.filter(id__in={recipe_id for recipe_id, _ in pending}).values_list('id', flat=True))
+            increments = {key: {self.field: amount} for key, amount in pending.items() if key[0] in existing}
+            add_daily_counts(increments)
+        except Exception:
+            logger.exception('No se pudieron volcar los contadores %s; se reintentará', self.field)
+            with self._lock:
+                self._pending.update(pending)
+            return 0
+        return len(increments)
+
+    def _ensure_flusher(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=f'recipe-counter-{self.field}', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(settings.RECIPE_COUNTER_FLUSH_INTERVAL)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            finally:
+                # El hilo tiene su propia conexión: se cierra para no dejarla abierta entre volcados.
+                connections.close_all()
+
+
+recipe_views = BufferedCounter('views')
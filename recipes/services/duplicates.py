@@ -0,0 +1,251 @@
+"""
+Detección de recetas casi duplicadas con MinHash y LSH.
+
+Cada receta se reduce a un conjunto de "shingles" normalizados (palabras del nombre, trigramas de
+palabras de los pasos y nombres de los ingredientes) y a su firma MinHash de `NUM_PERM` valores:
+la fracción de valores iguales entre dos firmas estima la similitud de Jaccard de sus conjuntos.
+
+La firma se parte en `BANDS` bandas; dos recetas son candidatas si coinciden en el hash de alguna
+banda entera (tabla `recipe_signature_bands`, indexada por banda y cubo). Con 16 bandas de 8 filas
+la probabilidad de ser candidatas pasa del 50 % hacia una similitud de 0.7, así que solo se
+comparan firmas de parejas que probablemente lo son y nunca todas contra todas.
+
+Cambiar `NUM_PERM`, `BANDS` o `SEED` invalida las firmas guardadas: hay que ejecutar
+`find_duplicate_recipes --reindex`.
+"""
+import hashlib
+import logging
+import re
+import unicodedata
+from collections import defaultdict
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Prefetch, Q
+
+from recipes.models.recipe import Recipe
+from recipes.models.recipe_signature import RecipeSignature, RecipeSignatureBand
+from recipes.models.step import Step
+
+logger = logging.getLogger(__name__)
+
+NUM_PERM = 128
+BANDS = 16
+ROWS_PER_BAND = NUM_PERM // BANDS
+SEED = 20250101
+STEP_SHINGLE_SIZE = 3
+INDEX_BATCH_SIZE = 500
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_rng = np.random.default_rng(SEED)
+# a < 2**31 y shingles de 32 bits: a * x + b cabe en uint64 sin desbordar.
+_PERM_A = _rng.integers(1, 1 << 31, size=NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.integers(0, (1 << 61) - 1, size=NUM_PERM, dtype=np.uint64)
+
+
+def normalize_text(text):
+    """Minúsculas, sin tildes ni signos de puntuación y con los espacios colapsados."""
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(char for char in text if not unicodedata.combining(char)).lower()
+    return re.sub(r'[^a-z0-9]+', ' ', text).split()
+
+
+def recipe_shingles(name, steps, ingredients):
+    """
+    Conjunto de shingles de una receta.
+
+    Args:
+        name (str): Nombre de la receta.
+        steps (list): Descripciones de los pasos, en orden.
+        ingredients (list): Nombres de los ingredientes.
+    """
+    shingles = {f'n:{word}' for word in normalize_text(name)}
+    words = [word for step in steps for word in normalize_text(step)]
+    size = min(STEP_SHINGLE_SIZE, len(words))
+    shingles.update('s:' + ' '.join(words[start:start + size]) for start in range(len(words) - size + 1) if size)
+    shingles.update('i:' + ' '.join(normalize_text(ingredient)) for ingredient in ingredients)
+    return shingles
+
+
+def minhash(shingles):
+    """Firma MinHash (array uint64 de `NUM_PERM` valores); None si no hay shingles."""
+    if not shingles:
+        return None
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=4).digest(), 'little') for shingle in shingles),
+        dtype=np.uint64,
+        count=len(shingles),
+    )
+    return ((np.outer(hashes, _PERM_A) + _PERM_B) % _MERSENNE_PRIME).min(axis=0)
+
+
+def band_buckets(signature):
+    """Hash (int64 con signo) de cada banda de la firma."""
+    return [
+        int.from_bytes(
+            hashlib.blake2b(signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND].tobytes(), digest_size=8).digest(),
+            'little',
+            signed=True,
+        )
+        for band in range(BANDS)
+    ]
+
+
+def signature_similarity(first, second):
+    """Similitud de Jaccard estimada a partir de dos firmas."""
+    return float(np.mean(first == second))
+
+
+def _load_signature(value):
+    return np.frombuffer(bytes(value), dtype=np.uint64)
+
+
+def _recipes_for_shingles(recipe_ids):
+    return Recipe.objects.filter(id__in=recipe_ids).prefetch_related(
+        Prefetch('step_set', queryset=Step.objects.order_by('order', 'id')),
+        'recipe_ingredients__ingredient',
+    )
+
+
+def index_recipes(recipe_ids):
+    """
+    Calcula y guarda la firma y los cubos LSH de las recetas dadas.
+
+    Las recetas sin texto (sin nombre, pasos ni ingredientes) guardan firma vacía y ningún cubo.
+
+    Returns:
+        int: Número de recetas indexadas.
+    """
+    recipe_ids = list(recipe_ids)
+    indexed = 0
+    for start in range(0, len(recipe_ids), INDEX_BATCH_SIZE):
+        batch = recipe_ids[start:start + INDEX_BATCH_SIZE]
+        signatures, bands = [], []
+        for recipe in _recipes_for_shingles(batch):
+            signature = minhash(recipe_shingles(
+                recipe.name,
+                [step.description for step in recipe.step_set.all()],
+                [item.ingredient.name for item in recipe.recipe_ingredients.all()],
+            ))
+            signatures.append(RecipeSignature(recipe=recipe, minhash=b'' if signature is None else signature.tobytes()))
+            if signature is not None:
+                bands.extend(
+                    RecipeSignatureBand(recipe=recipe, band=band, bucket=bucket)
+                    for band, bucket in enumerate(band_buckets(signature))
+                )
+        with transaction.atomic():
+            RecipeSignature.objects.bulk_create(
+                signatures, update_conflicts=True, unique_fields=['recipe'], update_fields=['minhash', 'updated_at']
+            )
+            RecipeSignatureBand.objects.filter(recipe_id__in=batch).delete()
+            RecipeSignatureBand.objects.bulk_create(bands)
+        indexed += len(signatures)
+    return indexed
+
+
+def find_candidates(recipe_id, threshold=None):
+    """
+    Recetas parecidas a `recipe_id`: las que comparten algún cubo LSH y superan el umbral.
+
+    Returns:
+        list: [(recipe_id, similitud)] de mayor a menor similitud.
+    """
+    threshold = settings.DUPLICATE_THRESHOLD if threshold is None else threshold
+    own = RecipeSignature.objects.filter(recipe_id=recipe_id).values_list('minhash', flat=True).first()
+    if not own:
+        return []
+    buckets = RecipeSignatureBand.objects.filter(recipe_id=recipe_id).values_list('band', 'bucket')
+    query = Q()
+    for band, bucket in buckets:
+        query |= Q(band=band, bucket=bucket)
+    others = RecipeSignatureBand.objects.filter(query).exclude(recipe_id=recipe_id).values('recipe_id').distinct()
+    own = _load_signature(own)
+    candidates = [
+        (other_id, signature_similarity(own, _load_signature(signature)))
+        for other_id, signature in RecipeSignature.objects.filter(recipe_id__in=others).values_list('recipe_id', 'minhash')
+    ]
+    return sorted(
+        [(other_id, similarity) for other_id, similarity in candidates if similarity >= threshold],
+        key=lambda candidate: (-candidate[1], candidate[0]),
+    )
+
+
+def check_recipe(recipe_id):
+    """Indexa una receta nueva o editada y guarda sus candidatas a duplicado."""
+    index_recipes([recipe_id])
+    candidates = find_candidates(recipe_id)
+    RecipeSignature.objects.filter(recipe_id=recipe_id).update(
+        duplicate_candidates=[other_id for other_id, _ in candidates]
+    )
+    if candidates:
+        logger.info('La receta %s parece duplicada de %s', recipe_id, [other_id for other_id, _ in candidates])
+    return candidates
+
+
+def duplicate_clusters(threshold=None):
+    """
+    Grupos de recetas casi duplicadas en todo el catálogo.
+
+    Solo se leen los cubos compartidos por más de una receta y solo se comparan las parejas que
+    coinciden en alguno; las parejas que superan el umbral se unen en grupos (union-find).
+
+    Returns:
+        list: [{'recipes': [{'id', 'name', 'user_id'}], 'similarity': máxima similitud del grupo}],
+        de los grupos más grandes a los más pequeños.
+    """
+    threshold = settings.DUPLICATE_THRESHOLD if threshold is None else threshold
+    shared = RecipeSignatureBand.objects.filter(Exists(
+        RecipeSignatureBand.objects.filter(band=OuterRef('band'), bucket=OuterRef('bucket')).exclude(recipe_id=OuterRef('recipe_id'))
+    )).values_list('band', 'bucket', 'recipe_id')
+    buckets = defaultdict(list)
+    for band, bucket, recipe_id in shared:
+        buckets[(band, bucket)].append(recipe_id)
+    pairs = {
+        (members[first], members[second])
+        for members in map(sorted, buckets.values())
+        for first in range(len(members))
+        for second in range(first + 1, len(members))
+    }
+    if not pairs:
+        return []
+
+    involved = {recipe_id for pair in pairs for recipe_id in pair}
+    signatures = {
+        recipe_id: _load_signature(signature)
+        for recipe_id, signature in RecipeSignature.objects.filter(recipe_id__in=involved).values_list('recipe_id', 'minhash')
+    }
+    parent = {}
+
+    def root(recipe_id):
+        while parent.get(recipe_id, recipe_id) != recipe_id:
+            recipe_id = parent[recipe_id]
+        return recipe_id
+
+    best = defaultdict(float)
+    for first, second in pairs:
+        similarity = signature_similarity(signatures[first], signatures[second])
+        if similarity < threshold:
+            continue
+        first_root, second_root = root(first), root(second)
+        if first_root != second_root:
+            parent[max(first_root, second_root)] = min(first_root, second_root)
+        best[first] = max(best[first], similarity)
+        best[second] = max(best[second], similarity)
+
+    groups = defaultdict(list)
+    for recipe_id in best:
+        groups[root(recipe_id)].append(recipe_id)
+    groups = [sorted(members) for members in groups.values()]
+    recipes = Recipe.objects.in_bulk([recipe_id for members in groups for recipe_id in members])
+    clusters = [
+        {
+            'recipes': [
+                {'id': recipe_id, 'name': recipes[recipe_id].name, 'user_id': recipes[recipe_id].user_id_id}
+                for recipe_id in members
+            ],
+            'similarity': round(max(best[recipe_id] for recipe_id in members), 4),
+        }
+        for members in groups
+    ]
+    return sorted(clusters, key=lambda cluster: (-len(cluster['recipes']), -cluster['similarity'], cluster['recipes'][0]['id']))
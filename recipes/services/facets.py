@@ -0,0 +1,141 @@
+"""
+Facetas (histogramas) de la lista de recetas filtrada.
+
+Todas las facetas pedidas se calculan en una única consulta: un `SELECT ... GROUP BY` por faceta
+sobre los ids filtrados, unidos con `UNION ALL`. El resultado se guarda en el cache con una clave
+derivada de los filtros ya validados y normalizados (`?category=2,1` y `?category=1,2` comparten
+entrada), durante `RECIPE_FACETS_CACHE_TTL` segundos.
+"""
+import datetime
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Case, CharField, Count, F, Value, When
+from django.db.models.functions import Cast
+
+from recipes.models.recipe import Recipe
+
+# (etiqueta, mínimo, máximo) de cada tramo, ambos inclusive; None = sin límite.
+DURATION_BUCKETS = (('0-15', None, 15), ('16-30', 16, 30), ('31-60', 31, 60), ('61+', 61, None))
+COMMENSALS_BUCKETS = (('1', None, 1), ('2', 2, 2), ('3-4', 3, 4), ('5-6', 5, 6), ('7+', 7, None))
+BUCKET_FACETS = {
+    'duration': ('duration_minutes', DURATION_BUCKETS),
+    'commensals': ('commensals', COMMENSALS_BUCKETS),
+}
+FACETS = ('category', *BUCKET_FACETS)
+CACHE_KEY = 'recipes:facets:%s'
+
+
+def parse_facets(value):
+    """Facetas pedidas en `?facets=category,duration`, sin repetir y en orden; ValueError si alguna no existe."""
+    names = list(dict.fromkeys(name.strip() for name in value.split(',') if name.strip()))
+    unknown = [name for name in names if name not in FACETS]
+    if unknown or not names:
+        raise ValueError(f"Facetas válidas: {', '.join(FACETS)}")
+    return names
+
+
+def _bucket_expression(field, buckets):
+    whens = []
+    for label, _, maximum in buckets:
+        if maximum is not None:
+            whens.append(When(**{f'{field}__lte': maximum}, then=Value(label)))
+    return Case(*whens, default=Value(buckets[-1][0]), output_field=CharField())
+
+
+def _facet_query(name, recipe_ids):
+    """SELECT (faceta, valor, etiqueta, total) agrupado de una faceta."""
+    if name == 'category':
+        return (
+            Recipe.categories.through.objects.filter(recipe_id__in=recipe_ids)
+            .values('category_id')
+            .annotate(
+                facet=Value(name, output_field=CharField()),
+                key=Cast('category_id', CharField()),
+                label=F('category__name'),
+                total=Count('recipe_id'),
+            )
+            .values_list('facet', 'key', 'label', 'total')
+            .order_by()
+        )
+    field, buckets = BUCKET_FACETS[name]
+    bucket = _bucket_expression(field, buckets)
+    return (
+        Recipe.objects.filter(id__in=recipe_ids)
+        .annotate(facet=Value(name, output_field=CharField()), key=bucket, label=bucket)
+        .values('facet', 'key', 'label')
+        .annotate(total=Count('id'))
+        .values_list('facet', 'key', 'label', 'total')
+        .order_by()
+    )
+
+
+def compute_facets(queryset, names):
+    """
+    Cuenta las recetas de `queryset` por cada faceta de `names` con una sola consulta.
+
+    Returns:
+        dict: {faceta: [{'value', 'label', 'count'} (+ 'min', 'max' en los tramos)]}. Las categorías
+        van de más a menos recetas; los tramos, en orden y con los vacíos a 0.
+    """
+    recipe_ids = queryset.order_by().values('id')
+    queries = [_facet_query(name, recipe_ids) for name in names]
+    rows = queries[0].union(*queries[1:], all=True) if len(queries) > 1 else queries[0]
+
+    counts = {name: {} for name in names}
+    labels = {}
+    for facet, key, label, total in rows:
+        counts[facet][key] = total
+        labels[(facet, key)] = label
+
+    result = {}
+    for name in names:
+        if name == 'category':
+            result[name] = sorted(
+                (
+                    {'value': int(key), 'label': labels[(name, key)], 'count': total}
+                    for key, total in counts[name].items()
+                ),
+                key=lambda item: (-item['count'], item['label']),
+            )
+        else:
+            result[name] = [
+                {'value': label, 'label': label, 'min': minimum, 'max': maximum, 'count': counts[name].get(label, 0)}
+                for label, minimum, maximum in BUCKET_FACETS[name][1]
+            ]
+    return result
+
+
+def _normalize(value):
+    if isinstance(value, (list, tuple, set)):
+        return sorted({_normalize(item) for item in value}, key=str)
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    if hasattr(value, 'pk'):
+        return value.pk
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def facets_cache_key(filters, names):
+    """Clave de cache de unos filtros validados (`FilterSet.form.cleaned_data`) y unas facetas."""
+    normalized = {
+        name: _normalize(value)
+        for name, value in filters.items()
+        if value not in (None, '', [], ())
+    }
+    payload = json.dumps({'filters': normalized, 'facets': sorted(names)}, sort_keys=True, default=str)
+    return CACHE_KEY % hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+
+def cached_facets(queryset, filters, names):
+    """`compute_facets` con cache por conjunto de filtros normalizado."""
+    key = facets_cache_key(filters, names)
+    facets = cache.get(key)
+    if facets is None:
+        facets = compute_facets(queryset, names)
+        cache.set(key, facets, settings.RECIPE_FACETS_CACHE_TTL)
+    return facets
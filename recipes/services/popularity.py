@@ -0,0 +1,137 @@
+"""
+Rankings de recetas precalculados: tendencia ("trending") y más favoritas ("popular").
+
+Tendencia: cada favorito neto de un día pesa `2 ** ((día - POPULARITY_EPOCH) / POPULARITY_HALF_LIFE_DAYS)`
+(decaimiento hacia delante). Con un punto de referencia fijo, el peso de un día no cambia con el
+tiempo, así que la puntuación de una receta sin actividad nueva no necesita recalcularse y el
+orden entre recetas es el mismo que con un decaimiento exponencial desde hoy. `update_popularity`
+solo recalcula las recetas cuyos cubos diarios han cambiado desde la última pasada. La puntuación
+comparable con el día de hoy es `trending_score / current_scale()`.
+
+Los pesos crecen ×2 cada vida media: con 7 días, un float llega a su límite tras ~19 años desde
+el epoch; basta mover `POPULARITY_EPOCH` y ejecutar `update_popularity --full`.
+
+Popular: `RecipeStats.favorites_count`, que ya se mantiene de forma incremental.
+
+Las dos listas (top `POPULARITY_TOP_K` ids) se guardan en `RecipeRanking` junto con el inicio de la
+pasada, así que todos los procesos web ven la última y la siguiente pasada sabe desde cuándo buscar
+cambios; las vistas paginan la lista leyendo una fila, sin tocar las tablas de contadores.
+"""
+import datetime
+from collections import defaultdict
+
+from django.conf import settings
+from django.db.models import Min
+from django.utils import timezone
+
+from recipes.models.recipe_daily_stats import RecipeDailyStats
+from recipes.models.recipe_ranking import RecipeRanking
+from recipes.models.recipe_stats import RecipeStats
+
+FEEDS = {
+    'trending': '-trending_score',
+    'popular': '-favorites_count',
+}
+RECOMPUTE_BATCH_SIZE = 500
+
+
+def _epoch():
+    return datetime.date.fromisoformat(settings.POPULARITY_EPOCH)
+
+
+def day_weight(day):
+    """Peso de la actividad de un día en la puntuación de tendencia."""
+    return 2 ** ((day - _epoch()).days / settings.POPULARITY_HALF_LIFE_DAYS)
+
+
+def current_scale(today=None):
+    """Divisor que convierte `trending_score` en favoritos equivalentes de hoy."""
+    return day_weight(today or timezone.now().date())
+
+
+def changed_recipe_ids(since):
+    """Recetas con cubos diarios modificados desde `since` (todas las que tienen cubos si es None)."""
+    queryset = RecipeDailyStats.objects.all()
+    if since is not None:
+        queryset = queryset.filter(updated_at__gte=since)
+    return queryset.order_by().values_list('recipe_id', flat=True).distinct()
+
+
+def recompute_trending_scores(recipe_ids):
+    """Recalcula `trending_score` de las recetas dadas a partir de sus cubos. Devuelve cuántas."""
+    recipe_ids = list(recipe_ids)
+    for start in range(0, len(recipe_ids), RECOMPUTE_BATCH_SIZE):
+        batch = recipe_ids[start:start + RECOMPUTE_BATCH_SIZE]
+        scores = defaultdict(float)
+        rows = RecipeDailyStats.objects.filter(recipe_id__in=batch).values_list(
+            'recipe_id', 'day', 'favorites_added', 'favorites_removed'
+        )
+        for recipe_id, day, added, removed in rows:
+            scores[recipe_id] += (added - removed) * day_weight(day)
+        # Crea los contadores que falten sin pisar los existentes y actualiza solo la puntuación.
+        RecipeStats.objects.bulk_create([RecipeStats(recipe_id=recipe_id) for recipe_id in batch], ignore_conflicts=True)
+        RecipeStats.objects.bulk_update(
+            [RecipeStats(recipe_id=recipe_id, trending_score=max(scores[recipe_id], 0.0)) for recipe_id in batch],
+            ['trending_score'],
+        )
+    return len(recipe_ids)
+
+
+def compute_ranking(feed, limit=None):
+    """Ids de las `limit` recetas mejor situadas en el ranking (consulta sobre el índice de la columna)."""
+    ordering = FEEDS[feed]
+    limit = limit or settings.POPULARITY_TOP_K
+    return list(
+        RecipeStats.objects.filter(**{f'{ordering.lstrip("-")}__gt': 0})
+        .order_by(ordering, 'recipe_id')
+        .values_list('recipe_id', flat=True)[:limit]
+    )
+
+
+def refresh_rankings(limit=None, pass_started_at=None):
+    """Recalcula y guarda en `RecipeRanking` las listas de todos los rankings."""
+    rankings = {feed: compute_ranking(feed, limit) for feed in FEEDS}
+    RecipeRanking.objects.bulk_create(
+        [
+            RecipeRanking(feed=feed, recipe_ids=ids, pass_started_at=pass_started_at)
+            for feed, ids in rankings.items()
+        ],
+        update_conflicts=True,
+        unique_fields=['feed'],
+        update_fields=['recipe_ids', 'pass_started_at', 'computed_at'],
+    )
+    return rankings
+
+
+def get_ranking(feed):
+    """Lista precalculada de ids del ranking; si aún no hay ninguna pasada, se calcula y se guarda."""
+    ids = RecipeRanking.objects.filter(feed=feed).values_list('recipe_ids', flat=True).first()
+    if ids is None:
+        ids = compute_ranking(feed)
+        # Sin `pass_started_at`: no cuenta como pasada y no se pisa una que termine a la vez.
+        RecipeRanking.objects.bulk_create([RecipeRanking(feed=feed, recipe_ids=ids)], ignore_conflicts=True)
+    return ids
+
+
+def last_pass_started_at():
+    """Inicio de la última pasada de `update_popularity` (None si no ha habido ninguna)."""
+    return RecipeRanking.objects.filter(feed__in=FEEDS).aggregate(since=Min('pass_started_at'))['since']
+
+
+def update_popularity(full=False, top_k=None):
+    """
+    Pasada periódica: recalcula las puntuaciones con actividad nueva y refresca los rankings.
+
+    Args:
+        full (bool): Recalcula todas las recetas con cubos, no solo las modificadas.
+        top_k (int): Tamaño de cada ranking; por defecto `POPULARITY_TOP_K`.
+
+    Returns:
+        int: Número de recetas recalculadas.
+    """
+    started_at = timezone.now()
+    since = None if full else last_pass_started_at()
+    updated = recompute_trending_scores(changed_recipe_ids(since))
+    # Se guarda el inicio de la pasada: lo escrito durante ella se vuelve a leer en la siguiente.
+    refresh_rankings(top_k, pass_started_at=started_at)
+    return updated
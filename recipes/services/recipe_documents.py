@@ -0,0 +1,152 @@
+"""
+Documentos precalculados del detalle de las recetas (`RecipeDocument`).
+
+El detalle de una receta junta filas de 'recipes', 'steps', 'recipe_ingredients',
+'categories_recipes', 'users' e 'images'. En vez de recomponerlo en cada lectura se guarda ya
+serializado y el detalle pasa a ser una lectura por clave primaria; `favorites_count` e
+`is_favorited` no se guardan y se añaden en la misma consulta (ver `recipe_document_rows`).
+
+Consistencia:
+    - Cualquier cambio de una fila que forma parte del documento (señales de `recipes.signals`)
+      llama a `invalidate_documents`, que borra el documento dentro de la misma transacción: quien
+      lea antes de que se regenere no encuentra documento y serializa la receta como siempre.
+    - La regeneración se hace tras el commit, una sola vez por transacción aunque se hayan tocado
+      muchas filas de la misma receta.
+    - Los cambios que afectan a muchas recetas a la vez (el `username` de un autor con miles de
+      recetas) usan `discard_documents`: solo se borran, y se regeneran al leerse o con
+      `rebuild_recipe_documents --missing-only`, no en la petición que hizo el cambio.
+    - `find_stale_documents` compara los documentos guardados con los recién generados y el comando
+      `rebuild_recipe_documents` los regenera (todos, los que faltan o los que no coinciden).
+"""
+import threading
+
+from django.db import transaction
+
+from recipes.models.recipe import Recipe
+from recipes.models.recipe_document import RecipeDocument
+from recipes.serializers.recipeSerializer import RecipeSerializer
+from recipes.services.recipe_loading import recipe_image_context, with_recipe_relations
+
+DOCUMENT_BATCH_SIZE = 500
+# Campos del detalle que dependen del usuario o de los contadores: se calculan en cada lectura.
+DYNAMIC_FIELDS = ('favorites_count', 'is_favorited')
+
+# Recetas invalidadas en este hilo pendientes de regenerar tras el commit.
+_pending = threading.local()
+
+
+class RecipeDocumentSerializer(RecipeSerializer):
+    """`RecipeSerializer` sin los campos de `DYNAMIC_FIELDS`."""
+    favorites_count = None
+    is_favorited = None
+
+    class Meta(RecipeSerializer.Meta):
+        fields = [field for field in RecipeSerializer.Meta.fields if field not in DYNAMIC_FIELDS]
+
+
+def render_documents(recipe_ids):
+    """
+    Genera los documentos de las recetas indicadas con un número fijo de consultas.
+
+    Returns:
+        dict: {recipe_id: documento}; las recetas que no existen no aparecen.
+    """
+    recipes = list(with_recipe_relations(Recipe.objects.filter(id__in=recipe_ids)))
+    if not recipes:
+        return {}
+    data = RecipeDocumentSerializer(recipes, many=True, context=recipe_image_context(recipes)).data
+    return {document['id']: document for document in data}
+
+
+def rebuild_documents(recipe_ids):
+    """Regenera y guarda (upsert) los documentos de las recetas indicadas. Devuelve cuántos se guardaron."""
+    recipe_ids = sorted(set(recipe_ids))
+    saved = 0
+    for start in range(0, len(recipe_ids), DOCUMENT_BATCH_SIZE):
+        documents = render_documents(recipe_ids[start:start + DOCUMENT_BATCH_SIZE])
+        RecipeDocument.objects.bulk_create(
+            [RecipeDocument(recipe_id=recipe_id, data=data) for recipe_id, data in documents.items()],
+            update_conflicts=True,
+            unique_fields=['recipe'],
+            update_fields=['data', 'built_at'],
+        )
+        saved += len(documents)
+    return saved
+
+
+def _rebuild_pending():
+    recipe_ids = getattr(_pending, 'ids', None)
+    if recipe_ids:
+        _pending.ids = set()
+        rebuild_documents(recipe_ids)
+
+
+def invalidate_documents(recipe_ids):
+    """
+    Borra los documentos de las recetas indicadas y programa su regeneración tras el commit.
+
+    Las recetas de una transacción que se deshace siguen pendientes y se regeneran con el siguiente
+    commit del hilo; regenerar una receta que no ha cambiado es inocuo.
+    """
+    recipe_ids = {recipe_id for recipe_id in recipe_ids if recipe_id is not None}
+    if not recipe_ids:
+        return
+    RecipeDocument.objects.filter(recipe_id__in=recipe_ids).delete()
+    if getattr(_pending, 'ids', None) is None:
+        _pending.ids = set()
+    _pending.ids.update(recipe_ids)
+    transaction.on_commit(_rebuild_pending, robust=True)
+
+
+def discard_documents(recipe_ids):
+    """
+    Borra los documentos de las recetas indicadas (lista o queryset de ids, que se resuelve como
+    subconsulta) sin programar su regeneración.
+    """
+    RecipeDocument.objects.filter(recipe_id__in=recipe_ids).delete()
+
+
+def recipe_document_rows(queryset):
+    """
+    Documentos de las recetas de `queryset`, en su orden, con una sola consulta. Los campos de
+    `DYNAMIC_FIELDS` anotados en el queryset (ver `with_user_annotations`) se añaden a cada uno.
+
+    Returns:
+        list: [(recipe_id, detalle o None si la receta aún no tiene documento)].
+    """
+    dynamic = [field for field in DYNAMIC_FIELDS if field in queryset.query.annotations]
+    rows = []
+    for row in queryset.values('id', 'document__data', *dynamic):
+        recipe_id, data = row.pop('id'), row.pop('document__data')
+        rows.append((recipe_id, None if data is None else {**data, **row}))
+    return rows
+
+
+def get_document(recipe_id):
+    """Documento guardado de la receta, o None si no existe."""
+    return RecipeDocument.objects.filter(recipe_id=recipe_id).values_list('data', flat=True).first()
+
+
+def find_stale_documents(recipe_ids=None):
+    """
+    Compara los documentos guardados con los que se generarían ahora.
+
+    Args:
+        recipe_ids (list | None): Recetas a comprobar; None para todas.
+
+    Returns:
+        tuple: (ids sin documento, ids con un documento distinto del actual).
+    """
+    if recipe_ids is None:
+        recipe_ids = Recipe.objects.order_by('id').values_list('id', flat=True)
+    recipe_ids = list(recipe_ids)
+    missing, stale = [], []
+    for start in range(0, len(recipe_ids), DOCUMENT_BATCH_SIZE):
+        batch = recipe_ids[start:start + DOCUMENT_BATCH_SIZE]
+        stored = dict(RecipeDocument.objects.filter(recipe_id__in=batch).values_list('recipe_id', 'data'))
+        for recipe_id, document in render_documents(batch).items():
+            if recipe_id not in stored:
+                missing.append(recipe_id)
+            elif stored[recipe_id] != document:
+                stale.append(recipe_id)
+    return missing, stale
@@ -0,0 +1,155 @@
+"""
+Detalle de recetas en una sola sentencia SQL con las funciones JSON de PostgreSQL.
+
+Alternativa a los documentos precalculados (`recipe_documents`) para recetas que se editan mucho,
+donde regenerar el documento en cada cambio no compensa. `recipe_detail_json` es una expresión
+`json_build_object(...)` con la forma exacta de `RecipeSerializer` (sin `favorites_count` ni
+`is_favorited`); los pasos, ingredientes y categorías son subconsultas `json_agg` correlacionadas y
+las imágenes, subconsultas de una fila sobre el índice único (type, external_id). Se anota sobre
+cualquier queryset de recetas, así que conserva sus filtros, su orden y las anotaciones de
+`with_user_annotations`, que se añaden al resultado.
+
+Formatos: las fechas se escriben como las escribe DRF (ISO 8601 en UTC, microsegundos solo si no
+son cero y sufijo 'Z'); por eso solo se usa con `TIME_ZONE = 'UTC'`. En otros motores, o con otra
+zona horaria, `json_detail_supported` es False y las vistas usan el plan con prefetch.
+
+El resultado se lee como texto y se decodifica con `json.loads`: convertirlo a jsonb para que
+Django lo decodifique reordenaría las claves (jsonb las guarda ordenadas por longitud y nombre).
+"""
+import json
+
+from django.conf import settings
+from django.contrib.postgres.aggregates.mixins import OrderableAggMixin
+from django.db import connections
+from django.db.models import Aggregate, CharField, F, Func, JSONField, OuterRef, Subquery, TextField, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast, Coalesce
+
+from media.models.image import Image
+from recipes.models.recipe import Recipe
+from recipes.models.recipeIngredient import RecipeIngredient
+from recipes.models.step import Step
+from recipes.services.recipe_documents import DYNAMIC_FIELDS
+
+
+class JSONBuildObject(Func):
+    """`json_build_object('clave', valor, ...)` a partir de argumentos con nombre, en ese orden."""
+    function = 'JSON_BUILD_OBJECT'
+    output_field = JSONField()
+
+    def __init__(self, **fields):
+        arguments = []
+        for key, value in fields.items():
+            arguments.extend((Cast(Value(key, output_field=CharField()), TextField()), value))
+        super().__init__(*arguments)
+
+
+class JSONAgg(OrderableAggMixin, Aggregate):
+    """`json_agg(expresión ORDER BY ...)`; a diferencia de `JSONBAgg` conserva el orden de las claves."""
+    function = 'JSON_AGG'
+    template = '%(function)s(%(distinct)s%(expressions)s %(order_by)s)'
+    output_field = JSONField()
+
+
+class DRFDateTime(Func):
+    """Fecha con el formato de `serializers.DateTimeField` de DRF en UTC."""
+    template = (
+        "(to_char(%(expressions)s AT TIME ZONE 'UTC', 'YYYY-MM-DD\"T\"HH24:MI:SS')"
+        " || CASE WHEN mod(date_part('microseconds', %(expressions)s)::bigint, 1000000) = 0 THEN ''"
+        " ELSE to_char(%(expressions)s, '.US') END || 'Z')"
+    )
+    output_field = TextField()
+
+
+EMPTY_JSON_ARRAY = RawSQL("'[]'::json", ())
+
+
+def json_detail_supported(using='default'):
+    """Si el detalle en SQL se puede usar con la base de datos `using`."""
+    return connections[using].vendor == 'postgresql' and settings.USE_TZ and settings.TIME_ZONE == 'UTC'
+
+
+def _json_list(queryset, group_by, item, order_by):
+    """Lista JSON de las filas de `queryset` (correlacionado con la receta); '[]' si no hay ninguna."""
+    rows = queryset.order_by().values(group_by).annotate(items=JSONAgg(item, order_by=order_by)).values('items')
+    return Coalesce(Subquery(rows), EMPTY_JSON_ARRAY, output_field=JSONField())
+
+
+def _image_json(image_type, external_id):
+    """Objeto de `ImageListSerializer` de la imagen del tipo dado, o null."""
+    image = Image.objects.filter(type=image_type, external_id=external_id).values(
+        json=JSONBuildObject(
+            id=F('id'),
+            url=F('url'),
+            type=F('type'),
+            external_id=F('external_id'),
+            processing_status=F('processing_status'),
+            width=F('width'),
+            height=F('height'),
+            placeholder=F('placeholder'),
+        )
+    )[:1]
+    return Subquery(image, output_field=JSONField())
+
+
+def recipe_detail_json():
+    """Expresión con el detalle de la receta (campos de `RecipeDocumentSerializer`) como texto JSON."""
+    steps = _json_list(
+        Step.objects.filter(recipe_id=OuterRef('pk')),
+        'recipe_id',
+        JSONBuildObject(
+            order=F('order'),
+            description=F('description'),
+            id=F('id'),
+            recipe=F('recipe_id'),
+            created_at=DRFDateTime('created_at'),
+            updated_at=DRFDateTime('updated_at'),
+            image=_image_json(Image.ImageType.STEP, OuterRef('id')),
+        ),
+        ['order', 'id'],
+    )
+    ingredients = _json_list(
+        RecipeIngredient.objects.filter(recipe_id=OuterRef('pk')),
+        'recipe_id',
+        JSONBuildObject(
+            id=F('id'),
+            recipe=F('recipe_id'),
+            ingredient=F('ingredient_id'),
+            quantity=F('quantity'),
+            unit=F('unit_id'),
+        ),
+        ['id'],
+    )
+    categories = _json_list(
+        Recipe.categories.through.objects.filter(recipe_id=OuterRef('pk')),
+        'recipe_id',
+        F('category_id'),
+        ['category_id'],
+    )
+    detail = JSONBuildObject(
+        id=F('id'),
+        name=F('name'),
+        description=F('description'),
+        ingredients=ingredients,
+        user=JSONBuildObject(id=F('user_id'), username=F('user_id__username')),
+        duration_minutes=F('duration_minutes'),
+        commensals=F('commensals'),
+        categories=categories,
+        steps=steps,
+        updated_at=DRFDateTime('updated_at'),
+        image=_image_json(Image.ImageType.RECIPE, OuterRef('pk')),
+    )
+    # json -> text: psycopg2 decodificaría el json por su cuenta y JSONField volvería a intentarlo.
+    return Cast(detail, TextField())
+
+
+def recipe_json_rows(queryset):
+    """
+    Detalle de las recetas de `queryset`, en su orden, con una sola consulta.
+
+    Los campos de `DYNAMIC_FIELDS` anotados en el queryset (ver `with_user_annotations`) se añaden
+    a cada receta, igual que los añade `RecipeSerializer`.
+    """
+    dynamic = [field for field in DYNAMIC_FIELDS if field in queryset.query.annotations]
+    rows = queryset.annotate(detail_json=recipe_detail_json()).values('detail_json', *dynamic)
+    return [{**json.loads(row.pop('detail_json')), **row} for row in rows]
@@ -0,0 +1,80 @@
+"""
+Plan de carga de recetas para serializarlas en lote con un número fijo de consultas.
+
+`RecipeSerializer` recorre el usuario, las categorías, los ingredientes, los pasos y las imágenes
+de la receta y de cada paso. Sin plan, eso es una consulta por relación y por fila. Con él:
+
+    - `with_recipe_relations`: `select_related` del usuario y un `prefetch_related` por relación.
+    - `recipe_image_context`: dos consultas (imágenes de recetas y de pasos) que se pasan al
+      serializer como mapas {external_id: Image}.
+    - `with_user_annotations`: `favorites_count` (LEFT JOIN a 'recipe_stats') y, para usuarios
+      autenticados, `is_favorited` (subconsulta `EXISTS` sobre 'favorites'), en la misma consulta.
+"""
+from django.db.models import Exists, F, OuterRef, Prefetch
+from django.db.models.functions import Coalesce
+
+from media.models.image import Image
+from media.services.image_service import images_by_external_id
+from recipes.models.step import Step
+from users.models.favorite import Favorite
+
+RECIPE_SELECT_RELATED = ('user_id',)
+RECIPE_PREFETCH_RELATED = (
+    'categories',
+    'recipe_ingredients',
+    Prefetch('step_set', queryset=Step.objects.order_by('order', 'id')),
+)
+
+
+def with_recipe_relations(queryset):
+    """Aplica el plan de carga a un queryset de recetas."""
+    return queryset.select_related(*RECIPE_SELECT_RELATED).prefetch_related(*RECIPE_PREFETCH_RELATED)
+
+
+def with_user_annotations(queryset, user):
+    """Anota cada receta con `favorites_count` y, si `user` está autenticado, con `is_favorited`."""
+    queryset = queryset.annotate(favorites_count=Coalesce(F('stats__favorites_count'), 0))
+    if user is not None and user.is_authenticated:
+        queryset = queryset.annotate(
+            is_favorited=Exists(Favorite.objects.filter(user_id=user.pk, recipe_id=OuterRef('pk')))
+        )
+    return queryset
+
+
+def recipe_image_context(recipes):
+    """
+    Contexto con las imágenes de las recetas y de sus pasos. Las recetas deben venir de
+    `with_recipe_relations` para que leer sus pasos no haga consultas.
+    """
+    step_ids = [step.id for recipe in recipes for step in recipe.step_set.all()]
+    return {
+        'recipe_images': images_by_external_id(Image.ImageType.RECIPE, [recipe.id for recipe in recipes]),
+        'step_images': images_by_external_id(Image.ImageType.STEP, step_ids),
+    }
+
+
+def parse_recipe_ids(values, max_ids):
+    """
+    Convierte una lista de valores (o cadenas separadas por comas) en ids únicos en el orden pedido.
+
+    Raises:
+        ValueError: Si algún valor no es un entero positivo o hay más de `max_ids` ids distintos.
+    """
+    tokens = []
+    for value in values:
+        tokens.extend(str(value).split(',') if isinstance(value, str) else [value])
+    ids = []
+    for token in tokens:
+        if isinstance(token, str):
+            token = token.strip()
+            if not token:
+                continue
+            if token.isdigit():
+                token = int(token)
+        if not isinstance(token, int) or isinstance(token, bool) or token <= 0:
+            raise ValueError(f"Id de receta no válido: {token!r}.")
+        ids.append(token)
+    ids = list(dict.fromkeys(ids))
+    if len(ids) > max_ids:
+        raise ValueError(f"Se admiten como máximo {max_ids} ids por petición.")
+    return ids
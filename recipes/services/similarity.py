@@ -0,0 +1,198 @@
+"""
+Recomendaciones "recetas similares" precalculadas.
+
+`build_similarity_index` (comando `build_similarity`) calcula fuera de línea, con productos de
+matrices dispersas, una similitud que combina:
+
+    - co-favoritos: coseno entre las columnas de la matriz usuarios × recetas de `Favorite`;
+    - ingredientes: coseno entre las filas de la matriz recetas × ingredientes de `RecipeIngredient`,
+      ponderadas por IDF para que la sal o el aceite no hagan parecidas a todas las recetas.
+
+Para cada receta se guardan sus `SIMILARITY_TOP_K` vecinas en tres arrays `.npy` (ids ordenados,
+vecinas y puntuaciones) dentro de una versión nueva de `SIMILARITY_INDEX_DIR`; el enlace `current`
+se cambia de forma atómica al terminar. Los workers abren los arrays con `mmap`, así que comparten
+las páginas del sistema operativo sin copiarlas, y servir una recomendación es una búsqueda binaria
+y una rebanada del array, sin SQL.
+"""
+import os
+import shutil
+import time
+
+import numpy as np
+from django.conf import settings
+from scipy import sparse
+
+from recipes.models.recipe import Recipe
+from recipes.models.recipeIngredient import RecipeIngredient
+from users.models.favorite import Favorite
+
+CURRENT_LINK = 'current'
+INDEX_FILES = ('ids', 'neighbors', 'scores')
+ROW_CHUNK_SIZE = 1000
+KEPT_VERSIONS = 2
+
+# Versión abierta en este proceso: {'key': (enlace, versión), 'index': (ids, neighbors, scores)}.
+_loaded = {}
+
+
+def _binary_matrix(pairs, rows, columns):
+    """Matriz dispersa 0/1 a partir de pares (fila, columna) ya traducidos a posiciones."""
+    pairs = np.asarray(pairs, dtype=np.int64).reshape(-1, 2)
+    matrix = sparse.csr_matrix(
+        (np.ones(len(pairs), dtype=np.float32), (pairs[:, 0], pairs[:, 1])), shape=(rows, columns)
+    )
+    matrix.data[:] = 1  # los pares repetidos se habrían sumado
+    return matrix
+
+
+def _normalize_rows(matrix):
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return sparse.diags(1 / norms).dot(matrix).tocsr()
+
+
+def _positions(values, ids):
+    """Posición de cada id en el array ordenado `ids`."""
+    return np.searchsorted(ids, np.asarray(values, dtype=np.int64))
+
+
+def favorite_matrix(ids):
+    """Recetas × usuarios con filas normalizadas: su producto por la traspuesta es el coseno de co-favoritos."""
+    pairs = list(Favorite.objects.filter(recipe_id__in=ids.tolist()).values_list('recipe_id', 'user_id'))
+    if not pairs:
+        return sparse.csr_matrix((len(ids), 0), dtype=np.float32)
+    recipes, users = np.asarray(pairs, dtype=np.int64).T
+    user_ids, user_positions = np.unique(users, return_inverse=True)
+    matrix = _binary_matrix(np.column_stack([_positions(recipes, ids), user_positions]), len(ids), len(user_ids))
+    return _normalize_rows(matrix)
+
+
+def ingredient_matrix(ids):
+    """Recetas × ingredientes con peso IDF y filas normalizadas."""
+    pairs = list(
+        RecipeIngredient.objects.filter(recipe_id__in=ids.tolist()).values_list('recipe_id', 'ingredient_id').distinct()
+    )
+    if not pairs:
+        return sparse.csr_matrix((len(ids), 0), dtype=np.float32)
+    recipes, ingredients = np.asarray(pairs, dtype=np.int64).T
+    ingredient_ids, ingredient_positions = np.unique(ingredients, return_inverse=True)
+    matrix = _binary_matrix(np.column_stack([_positions(recipes, ids), ingredient_positions]), len(ids), len(ingredient_ids))
+    document_frequency = np.bincount(ingredient_positions, minlength=len(ingredient_ids))
+    idf = np.log((1 + len(ids)) / (1 + document_frequency)).astype(np.float32) + 1
+    return _normalize_rows(matrix.dot(sparse.diags(idf)))
+
+
+def top_neighbors(favorites, ingredients, top_k, favorite_weight, ingredient_weight):
+    """
+    Vecinas más parecidas de cada receta, procesando las filas por bloques para acotar la memoria.
+
+    Returns:
+        tuple: (neighbors, scores) de forma (recetas, top_k); posiciones -1 donde no hay vecina.
+    """
+    total = favorites.shape[0]
+    neighbors = np.full((total, top_k), -1, dtype=np.int64)
+    scores = np.zeros((total, top_k), dtype=np.float32)
+    favorites_t, ingredients_t = favorites.T.tocsr(), ingredients.T.tocsr()
+    for start in range(0, total, ROW_CHUNK_SIZE):
+        stop = min(start + ROW_CHUNK_SIZE, total)
+        block = (
+            favorite_weight * favorites[start:stop].dot(favorites_t)
+            + ingredient_weight * ingredients[start:stop].dot(ingredients_t)
+        ).tocsr()
+        for offset in range(stop - start):
+            row = start + offset
+            begin, end = block.indptr[offset], block.indptr[offset + 1]
+            columns, values = block.indices[begin:end], block.data[begin:end]
+            keep = (columns != row) & (values > 0)
+            columns, values = columns[keep], values[keep]
+            if len(values) > top_k:
+                best = np.argpartition(-values, top_k - 1)[:top_k]
+                columns, values = columns[best], values[best]
+            # Mayor puntuación primero; a igualdad, el id más bajo.
+            order = np.lexsort((columns, -values))
+            neighbors[row, :len(order)] = columns[order]
+            scores[row, :len(order)] = values[order]
+    return neighbors, scores
+
+
+def build_similarity_index(directory=None, top_k=None, favorite_weight=None, ingredient_weight=None):
+    """
+    Calcula el índice de similitud y lo publica como nueva versión en `directory`.
+
+    Returns:
+        tuple: (número de recetas, ruta de la versión escrita).
+    """
+    directory = str(directory or settings.SIMILARITY_INDEX_DIR)
+    top_k = top_k or settings.SIMILARITY_TOP_K
+    favorite_weight = settings.SIMILARITY_FAVORITE_WEIGHT if favorite_weight is None else favorite_weight
+    ingredient_weight = settings.SIMILARITY_INGREDIENT_WEIGHT if ingredient_weight is None else ingredient_weight
+
+    ids = np.fromiter(Recipe.objects.order_by('id').values_list('id', flat=True), dtype=np.int64)
+    positions, scores = top_neighbors(
+        favorite_matrix(ids), ingredient_matrix(ids), top_k, favorite_weight, ingredient_weight
+    )
+    neighbors = np.where(positions >= 0, ids[positions.clip(min=0)], -1)
+
+    os.makedirs(directory, exist_ok=True)
+    version = os.path.join(directory, f'v{time.time_ns()}')
+    os.makedirs(version)
+    for name, array in zip(INDEX_FILES, (ids, neighbors, scores)):
+        np.save(os.path.join(version, f'{name}.npy'), array)
+    _publish(directory, version)
+    return len(ids), version
+
+
+def _publish(directory, version):
+    """Apunta `current` a la nueva versión con un rename atómico y borra las versiones antiguas."""
+    link = os.path.join(directory, CURRENT_LINK)
+    temporary = f'{link}.{os.getpid()}'
+    os.symlink(os.path.basename(version), temporary)
+    os.replace(temporary, link)
+    versions = sorted(entry for entry in os.listdir(directory) if entry.startswith('v'))
+    for old in versions[:-KEPT_VERSIONS]:
+        # Un worker que aún tenga mapeada una versión borrada la sigue leyendo hasta que recargue.
+        shutil.rmtree(os.path.join(directory, old), ignore_errors=True)
+
+
+def load_similarity_index(directory=None):
+    """
+    Arrays de la versión actual abiertos con `mmap` (o None si no se ha construido el índice).
+
+    Se cachean en el proceso y se vuelven a abrir cuando `current` pasa a apuntar a otra versión.
+    """
+    link = os.path.join(str(directory or settings.SIMILARITY_INDEX_DIR), CURRENT_LINK)
+    try:
+        version = os.readlink(link)
+    except OSError:
+        return None
+    if _loaded.get('key') == (link, version):
+        return _loaded['index']
+    path = os.path.join(os.path.dirname(link), version)
+    try:
+        index = tuple(np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r') for name in INDEX_FILES)
+    except OSError:
+        return None
+    _loaded.update(key=(link, version), index=index)
+    return index
+
+
+def similar_recipes(recipe_id, limit):
+    """
+    Recetas más parecidas a `recipe_id` según el índice precalculado, sin consultar la base de datos.
+
+    Returns:
+        list: [(recipe_id, score)] de mayor a menor; vacía si la receta no está en el índice.
+    """
+    index = load_similarity_index()
+    if index is None:
+        return []
+    ids, neighbors, scores = index
+    position = int(np.searchsorted(ids, recipe_id))
+    if position >= len(ids) or ids[position] != recipe_id:
+        return []
+    row_neighbors, row_scores = neighbors[position, :limit], scores[position, :limit]
+    return [
+        (int(neighbor), round(float(score), 6))
+        for neighbor, score in zip(row_neighbors, row_scores)
+        if neighbor >= 0
+    ]
@@ -0,0 +1,89 @@
+"""
+Señales de la app recipes: mantienen los documentos precalculados del detalle de las recetas
+(ver `recipes.services.recipe_documents`).
+
+Cada cambio de una fila que aparece en el documento (la receta, sus pasos, ingredientes y
+categorías, el nombre de su autor y las imágenes de la receta y de sus pasos) invalida el documento
+de las recetas afectadas en la misma transacción.
+"""
+from django.conf import settings
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from media.models.image import Image
+from media.signals import images_changed
+from recipes.models.recipe import Recipe
+from recipes.models.recipeIngredient import RecipeIngredient
+from recipes.models.step import Step
+from recipes.services.recipe_documents import discard_documents, invalidate_documents
+
+
+def _recipes_of_images(images):
+    """Ids de las recetas afectadas por unas imágenes dadas como pares (type, external_id)."""
+    recipe_ids = {external_id for image_type, external_id in images if image_type == Image.ImageType.RECIPE}
+    step_ids = {external_id for image_type, external_id in images if image_type == Image.ImageType.STEP}
+    if step_ids:
+        recipe_ids.update(Step.objects.filter(id__in=step_ids).values_list('recipe_id', flat=True))
+    return recipe_ids
+
+
+@receiver(post_save, sender=Recipe)
+def invalidate_saved_recipe(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate_documents([instance.pk])
+
+
+@receiver(post_save, sender=Step)
+@receiver(post_delete, sender=Step)
+@receiver(post_save, sender=RecipeIngredient)
+@receiver(post_delete, sender=RecipeIngredient)
+def invalidate_recipe_part(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate_documents([instance.recipe_id])
+
+
+@receiver(m2m_changed, sender=Recipe.categories.through)
+def invalidate_recipe_categories(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            invalidate_documents([instance.pk])
+    elif action in ('post_add', 'post_remove'):
+        invalidate_documents(pk_set)
+    elif action == 'pre_clear':
+        # Al vaciar desde la categoría, pk_set no trae las recetas: se leen antes de borrarlas.
+        invalidate_documents(list(instance.recipes.values_list('id', flat=True)))
+
+
+@receiver(pre_save, sender=settings.AUTH_USER_MODEL)
+def remember_username_change(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Anota en la instancia si el guardado cambia el `username` guardado en la base de datos."""
+    instance._username_changed = False
+    if raw or instance.pk is None or (update_fields is not None and 'username' not in update_fields):
+        return
+    stored = sender.objects.filter(pk=instance.pk).values_list('username', flat=True).first()
+    instance._username_changed = stored is not None and stored != instance.username
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_author_recipes(sender, instance, created, raw=False, **kwargs):
+    """
+    El documento lleva el `username` del autor. Un autor puede tener miles de recetas (las del
+    usuario semilla), así que sus documentos solo se borran, con un DELETE, y no se regeneran en
+    la petición: mientras tanto el detalle se sirve por el camino normal.
+    """
+    if raw or created or not getattr(instance, '_username_changed', False):
+        return
+    instance._username_changed = False
+    discard_documents(Recipe.objects.filter(user_id=instance.pk).values('id'))
+
+
+@receiver(post_save, sender=Image)
+@receiver(post_delete, sender=Image)
+def invalidate_image_recipe(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate_documents(_recipes_of_images([(instance.type, instance.external_id)]))
+
+
+@receiver(images_changed)
+def invalidate_bulk_image_recipes(sender, images, **kwargs):
+    invalidate_documents(_recipes_of_images(images))
@@ -0,0 +1,33 @@
+# recipes/tests/conftest.py
+import pytest
+from model_bakery import baker
+from recipes.models.category import Category
+from recipes.models.ingredient import Ingredient
+from recipes.models.recipe import Recipe
+from recipes.models.recipeIngredient import RecipeIngredient
+
+
+@pytest.fixture
+def pantry(test_user, test_unit_type, test_unit):
+    """
+    Cuatro recetas con categorías, ingredientes, duraciones y comensales distintos para los tests
+    de filtros y facetas. Devuelve (recetas, ingredientes, categorías) como diccionarios por nombre.
+    """
+    egg, potato, flour = (
+        baker.make(Ingredient, name=name, user_id=test_user, unit_type_id=test_unit_type)
+        for name in ('Huevo', 'Patata', 'Harina')
+    )
+    breakfast, dessert = (baker.make(Category, name=name, user_id=test_user) for name in ('Desayuno', 'Postre'))
+    recipes = {}
+    for name, duration, commensals, categories, ingredients in (
+        ('tortilla', 30, 4, [breakfast], [egg, potato]),
+        ('huevo frito', 5, 1, [breakfast], [egg]),
+        ('bizcocho', 60, 8, [dessert, breakfast], [egg, flour]),
+        ('patatas', 20, 2, [], [potato]),
+    ):
+        recipe = baker.make(Recipe, name=name, user_id=test_user, duration_minutes=duration, commensals=commensals)
+        recipe.categories.set(categories)
+        for ingredient in ingredients:
+            baker.make(RecipeIngredient, recipe=recipe, ingredient=ingredient, quantity=1, unit=test_unit)
+        recipes[name] = recipe
+    return recipes, {'egg': egg, 'potato': potato, 'flour': flour}, {'breakfast': breakfast, 'dessert': dessert}
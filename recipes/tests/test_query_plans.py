@@ -0,0 +1,170 @@
+"""
+Planes de las consultas más frecuentes de las vistas, para que no vuelvan a recorrer tablas enteras.
+
+    - SQLite (siempre): cada consulta usa el índice previsto.
+    - PostgreSQL (`-m slow`): se siembran tablas grandes, se ejecuta ANALYZE y el test falla si
+      algún plan tiene un `Seq Scan` sobre ellas. Filas por tabla: EXPLAIN_SEED_ROWS (50 000).
+
+    DATABASE_URL=postgres://... pytest -m slow recipes/tests/test_query_plans.py
+"""
+import json
+import os
+import re
+
+import pytest
+from django.db import connection
+from model_bakery import baker
+from rest_framework.test import APIClient
+
+from measurements.models.unit import Unit
+from measurements.models.unitType import UnitType
+from media.models.image import Image
+from recipes.models.ingredient import Ingredient
+from recipes.models.recipe import Recipe
+from recipes.models.step import Step
+from recipes.views.ingredientViewSet import IngredientViewSet
+from shopping.models.shoppingListItem import ShoppingListItem
+from users.models.favorite import Favorite
+from users.models.user import CustomUser
+
+SEED_ROWS = int(os.getenv('EXPLAIN_SEED_ROWS', 50000))
+SEED_USERS = 500
+LARGE_TABLES = {'recipes', 'steps', 'ingredients', 'images', 'favorites', 'shopping_list_items'}
+
+# (nombre, consulta a partir de un usuario y unos ids de receta, índice esperado en SQLite como regex)
+HOT_QUERIES = [
+    (
+        'recetas de un usuario por fecha',
+        lambda user, ids: Recipe.objects.filter(user_id=user).order_by('-created_at')[:20],
+        'recipes_user_created_idx',
+    ),
+    (
+        'pasos de una página de recetas',
+        lambda user, ids: Step.objects.filter(recipe_id__in=ids).order_by('order', 'id'),
+        'steps_recipe_order_idx',
+    ),
+    (
+        'ingredientes aprobados',
+        lambda user, ids: IngredientViewSet.queryset.all()[:50],
+        'ingredients_approved_name_idx',
+    ),
+    (
+        'imágenes de una página de recetas',
+        lambda user, ids: Image.objects.filter(type=Image.ImageType.RECIPE, external_id__in=ids),
+        # Sin migraciones, SQLite crea la restricción única dentro de la tabla (sqlite_autoindex_images_N).
+        r'INDEX \w+ \(type=\? AND external_id=\?\)',
+    ),
+    (
+        'favoritos de un usuario por fecha',
+        lambda user, ids: Favorite.objects.filter(user_id=user).order_by('-created_at', '-id')[:20],
+        'favorites_user_created_idx',
+    ),
+    (
+        'lista de la compra pendiente',
+        lambda user, ids: ShoppingListItem.objects.filter(user_id=user, is_purchased=False),
+        'shop_items_user_purch_idx',
+    ),
+]
+
+
+def seq_scans(plan):
+    """Tablas recorridas con `Seq Scan` en un plan JSON de PostgreSQL."""
+    scans = []
+    stack = [plan['Plan']]
+    while stack:
+        node = stack.pop()
+        if node.get('Node Type') == 'Seq Scan':
+            scans.append(node.get('Relation Name'))
+        stack.extend(node.get('Plans', []))
+    return scans
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+@pytest.mark.recipes_app
+@pytest.mark.skipif(connection.vendor != 'sqlite', reason='Planes de EXPLAIN QUERY PLAN de SQLite')
+class TestHotQueryIndexes:
+    """
+    Each hot query shape uses its dedicated index on SQLite.
+    """
+
+    @pytest.mark.parametrize('name, query, index', HOT_QUERIES, ids=[name for name, _, _ in HOT_QUERIES])
+    def test_query_uses_index(self, name, query, index, test_user):
+        explained = query(test_user, [1, 2, 3]).explain()
+        assert re.search(index, explained)
+        assert not re.findall(r'SCAN \w+$', explained, flags=re.MULTILINE)
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+@pytest.mark.recipes_app
+class TestApprovedIngredientList:
+    """
+    The public ingredient list is ordered by name, the order its partial index provides.
+    """
+
+    def test_list_is_ordered_by_name(self, test_user, test_unit_type):
+        for name in ('Sal', 'Aceite', 'Huevo', 'Pimienta'):
+            baker.make(Ingredient, name=name, user_id=test_user, unit_type_id=test_unit_type, is_approved=name != 'Pimienta')
+
+        response = APIClient().get('/api/recipes/ingredients/')
+
+        assert response.status_code == 200
+        assert [ingredient['name'] for ingredient in response.json()] == ['Aceite', 'Huevo', 'Sal']
+
+
+@pytest.mark.django_db
+@pytest.mark.slow
+@pytest.mark.recipes_app
+@pytest.mark.skipif(connection.vendor != 'postgresql', reason='Requiere PostgreSQL')
+class TestHotQueryPlansPostgres:
+    """
+    No sequential scans over large seeded tables. Run with `pytest -m slow` against PostgreSQL.
+    """
+
+    @pytest.fixture
+    def seeded(self):
+        users = CustomUser.objects.bulk_create(
+            CustomUser(username=f'plan-user-{index}', email=f'plan-{index}@example.com', password='!')
+            for index in range(SEED_USERS)
+        )
+        unit_type = baker.make(UnitType, name='PlanUnitType')
+        unit = baker.make(Unit, name='PlanUnit', unit_type=unit_type, user_id=users[0])
+        recipes = Recipe.objects.bulk_create(
+            Recipe(name=f'Receta {index}', user_id=users[index % SEED_USERS], duration_minutes=index % 120, commensals=index % 8 + 1)
+            for index in range(SEED_ROWS)
+        )
+        ingredients = Ingredient.objects.bulk_create(
+            Ingredient(name=f'Ingrediente {index}', user_id=users[0], unit_type_id=unit_type, is_approved=index % 10 != 0)
+            for index in range(SEED_ROWS)
+        )
+        Step.objects.bulk_create(Step(recipe=recipe, order=1, description='Paso') for recipe in recipes)
+        Image.objects.bulk_create(
+            Image(name=f'{recipe.id}.webp', type=Image.ImageType.RECIPE, external_id=recipe.id, url=f'{recipe.id}.webp')
+            for recipe in recipes
+        )
+        Favorite.objects.bulk_create(
+            Favorite(user_id=users[index % SEED_USERS], recipe_id=recipes[index]) for index in range(SEED_ROWS)
+        )
+        ShoppingListItem.objects.bulk_create(
+            ShoppingListItem(
+                user_id=users[index % SEED_USERS], ingredient_id=ingredients[index], quantity_needed=1,
+                unit=unit, is_purchased=index % 3 == 0,
+            )
+            for index in range(SEED_ROWS)
+        )
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        return users[1], [recipe.id for recipe in recipes[1000:1020]]
+
+    def test_no_sequential_scans(self, seeded):
+        user, recipe_ids = seeded
+        failures = {}
+        for name, query, _ in HOT_QUERIES:
+            plan = json.loads(query(user, recipe_ids).explain(format='json'))
+            # Según el driver, Django devuelve la lista de EXPLAIN o directamente su único elemento.
+            plan = plan[0] if isinstance(plan, list) else plan
+            scanned = [table for table in seq_scans(plan) if table in LARGE_TABLES]
+            if scanned:
+                failures[name] = scanned
+        assert failures == {}
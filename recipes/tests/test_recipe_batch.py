@@ -0,0 +1,88 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from model_bakery import baker
+from rest_framework.test import APIClient
+
+from media.models.image import Image
+from recipes.models.recipe import Recipe
+from recipes.models.step import Step
+from recipes.services.recipe_loading import parse_recipe_ids
+
+BATCH_URL = '/api/recipes/recipes/batch/'
+
+
+def make_recipes(user, count, category=None):
+    recipes = []
+    for index in range(count):
+        recipe = baker.make(Recipe, name=f'Recipe {index}', user_id=user, duration_minutes=10, commensals=2)
+        if category:
+            recipe.categories.add(category)
+        step = baker.make(Step, recipe=recipe, order=1, description='Paso')
+        baker.make(Image, type='RECIPE', external_id=recipe.id, url=f'recipe-{recipe.id}.webp')
+        baker.make(Image, type='STEP', external_id=step.id, url=f'step-{step.id}.webp')
+        recipes.append(recipe)
+    return recipes
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+@pytest.mark.recipes_app
+class TestRecipeBatch:
+    """
+    Tests for batch recipe retrieval by id list.
+    """
+
+    def test_returns_recipes_in_requested_order_and_reports_missing(self, test_user):
+        first, second, third = make_recipes(test_user, 3)
+        missing_id = third.id + 1000
+        response = APIClient().get(BATCH_URL, {'ids': f'{third.id},{first.id},{missing_id},{third.id}'})
+
+        assert response.status_code == 200
+        data = response.json()
+        assert [recipe['id'] for recipe in data['results']] == [third.id, first.id]
+        assert data['missing'] == [missing_id]
+        assert data['results'][0]['image']['url'] == f'recipe-{third.id}.webp'
+        assert data['results'][0]['steps'][0]['image']['url'].startswith('step-')
+
+    def test_post_accepts_long_lists(self, test_user):
+        recipes = make_recipes(test_user, 2)
+        response = APIClient().post(BATCH_URL, {'ids': [recipe.id for recipe in reversed(recipes)]}, format='json')
+        assert response.status_code == 200
+        assert [recipe['id'] for recipe in response.json()['results']] == [recipes[1].id, recipes[0].id]
+
+    def test_query_count_is_constant(self, test_user, test_category):
+        small = make_recipes(test_user, 1, test_category)
+        large = make_recipes(test_user, 8, test_category)
+        client = APIClient()
+        with CaptureQueriesContext(connection) as one:
+            client.get(BATCH_URL, {'ids': ','.join(str(recipe.id) for recipe in small)})
+        with CaptureQueriesContext(connection) as many:
+            client.get(BATCH_URL, {'ids': ','.join(str(recipe.id) for recipe in large)})
+        assert len(one.captured_queries) == len(many.captured_queries)
+
+    def test_list_uses_the_same_plan(self, test_user, test_category):
+        make_recipes(test_user, 2, test_category)
+        client = APIClient()
+        with CaptureQueriesContext(connection) as few:
+            client.get('/api/recipes/recipes/')
+        make_recipes(test_user, 6, test_category)
+        with CaptureQueriesContext(connection) as many:
+            client.get('/api/recipes/recipes/')
+        assert len(few.captured_queries) == len(many.captured_queries)
+
+    def test_rejects_invalid_and_too_many_ids(self, settings):
+        settings.RECIPE_BATCH_MAX_IDS = 2
+        client = APIClient()
+        assert client.get(BATCH_URL, {'ids': '1,abc'}).status_code == 400
+        assert client.get(BATCH_URL, {'ids': '1,2,3'}).status_code == 400
+        assert client.get(BATCH_URL, {'ids': '1,1,2,2'}).status_code == 200
+
+    def test_parse_recipe_ids(self):
+        assert parse_recipe_ids(['3,1', '3', 2], 10) == [3, 1, 2]
+        assert parse_recipe_ids([], 10) == []
+        with pytest.raises(ValueError):
+            parse_recipe_ids([True], 10)
+        with pytest.raises(ValueError):
+            parse_recipe_ids(['-1'], 10)
+
@@ -0,0 +1,128 @@
+import io
+
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from model_bakery import baker
+from rest_framework.test import APIClient, APIRequestFactory
+
+from media.services.image_service import upsert_image
+from recipes.models.recipe import Recipe
+from recipes.models.recipeIngredient import RecipeIngredient
+from recipes.models.recipe_document import RecipeDocument
+from recipes.serializers.recipeSerializer import RecipeSerializer
+from recipes.services.recipe_documents import find_stale_documents, get_document, rebuild_documents
+from recipes.services.recipe_loading import recipe_image_context, with_recipe_relations, with_user_annotations
+from recipes.tests.test_recipe_batch import make_recipes
+from users.services.favorites import add_favorite
+
+
+def detail_url(recipe):
+    return f'/api/recipes/recipes/{recipe.id}/'
+
+
+def serialized(recipe, user):
+    """Salida de RecipeSerializer por el camino normal, para comparar con la del documento."""
+    request = APIRequestFactory().get('/')
+    request.user = user
+    recipe = with_recipe_relations(with_user_annotations(Recipe.objects.filter(pk=recipe.pk), user)).get()
+    context = {'request': request, **recipe_image_context([recipe])}
+    return RecipeSerializer(recipe, context=context).data
+
+
+@pytest.fixture
+def recipe(test_user, test_category, test_ingredient, test_unit, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        recipe = make_recipes(test_user, 1, test_category)[0]
+        baker.make(RecipeIngredient, recipe=recipe, ingredient=test_ingredient, quantity=3, unit=test_unit)
+    return recipe
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+@pytest.mark.recipes_app
+class TestRecipeDocuments:
+    """
+    Tests for precomputed recipe detail documents.
+    """
+
+    def test_detail_matches_serializer_in_one_query(self, recipe, test_user, another_custom_user):
+        add_favorite(another_custom_user.id, recipe.id)
+        assert get_document(recipe.id) is not None
+
+        with CaptureQueriesContext(connection) as queries:
+            anonymous = APIClient().get(detail_url(recipe)).json()
+        assert len(queries.captured_queries) == 1
+        assert anonymous == serialized(recipe, AnonymousUser())
+        assert anonymous['favorites_count'] == 1 and 'is_favorited' not in anonymous
+
+        client = APIClient()
+        client.force_authenticate(another_custom_user)
+        authenticated = client.get(detail_url(recipe)).json()
+        assert authenticated == serialized(recipe, another_custom_user)
+        assert authenticated['is_favorited'] is True
+        assert len(authenticated['ingredients']) == 1 and authenticated['steps'][0]['image'] is not None
+
+    def test_changes_invalidate_and_rebuild_after_commit(self, recipe, test_user, django_capture_on_commit_callbacks):
+        step = recipe.step_set.get()
+        with django_capture_on_commit_callbacks(execute=False) as callbacks:
+            step.description = 'Batir los huevos'
+            step.save()
+        # Hasta el commit no hay documento y el detalle se sirve por el camino normal.
+        assert get_document(recipe.id) is None
+        assert APIClient().get(detail_url(recipe)).json()['steps'][0]['description'] == 'Batir los huevos'
+        for callback in callbacks:
+            callback()
+        assert get_document(recipe.id)['steps'][0]['description'] == 'Batir los huevos'
+
+        with django_capture_on_commit_callbacks(execute=True):
+            test_user.username = 'chef'
+            test_user.save()
+            recipe.categories.clear()
+            upsert_image(recipe.id, 'RECIPE', 'nueva.webp')
+        document = get_document(recipe.id)
+        assert document['user']['username'] == 'chef'
+        assert document['categories'] == []
+        assert document['image']['url'] == 'nueva.webp'
+
+    def test_author_rename_discards_documents_without_rebuilding(self, recipe, test_user, django_capture_on_commit_callbacks):
+        test_user.save()
+        assert get_document(recipe.id) is not None
+
+        with django_capture_on_commit_callbacks(execute=False) as callbacks:
+            test_user.username = 'chef'
+            test_user.save()
+        assert callbacks == []
+        assert get_document(recipe.id) is None
+        assert APIClient().get(detail_url(recipe)).json()['user']['username'] == 'chef'
+
+        call_command('rebuild_recipe_documents', '--missing-only', stdout=io.StringIO())
+        assert get_document(recipe.id)['user']['username'] == 'chef'
+
+    def test_last_login_does_not_invalidate(self, recipe, test_user):
+        test_user.save(update_fields=['last_login'])
+        assert get_document(recipe.id) is not None
+
+    def test_missing_document_is_built_on_read(self, recipe, django_capture_on_commit_callbacks):
+        RecipeDocument.objects.all().delete()
+        with django_capture_on_commit_callbacks(execute=True):
+            response = APIClient().get(detail_url(recipe))
+        assert response.json() == serialized(recipe, AnonymousUser())
+        assert get_document(recipe.id) is not None
+        assert APIClient().get('/api/recipes/recipes/999999/').status_code == 404
+
+    def test_check_command_reports_and_fixes(self, recipe, test_user, capsys):
+        other = make_recipes(test_user, 1)[0]
+        RecipeDocument.objects.filter(recipe=recipe).update(data={'id': recipe.id})
+        assert find_stale_documents() == ([other.id], [recipe.id])
+
+        call_command('rebuild_recipe_documents', '--check')
+        assert 'receta #%s' % recipe.id in capsys.readouterr().out
+        call_command('rebuild_recipe_documents', '--check', '--fix')
+        assert find_stale_documents() == ([], [])
+
+        RecipeDocument.objects.all().delete()
+        call_command('rebuild_recipe_documents', '--missing-only')
+        assert RecipeDocument.objects.count() == 2 == rebuild_documents([recipe.id, other.id, 999999])
@@ -0,0 +1,120 @@
+import json
+
+import pytest
+from django.core.management import call_command
+from model_bakery import baker
+from rest_framework.test import APIClient
+
+from recipes.models.ingredient import Ingredient
+from recipes.models.recipe import Recipe
+from recipes.models.recipeIngredient import RecipeIngredient
+from recipes.models.recipe_signature import RecipeSignature, RecipeSignatureBand
+from recipes.models.step import Step
+from recipes.services.duplicates import (
+    BANDS,
+    duplicate_clusters,
+    find_candidates,
+    index_recipes,
+    minhash,
+    recipe_shingles,
+    signature_similarity,
+)
+
+TORTILLA_STEPS = [
+    'Pelar y cortar las papas en láminas finas',
+    'Freír las papas a fuego medio con abundante aceite de oliva',
+    'Batir los huevos con sal y mezclar con las papas escurridas',
+    'Cuajar la tortilla en la sartén y darle la vuelta con un plato',
+]
+
+
+def make_recipe(user, name, steps, ingredients, unit):
+    recipe = baker.make(Recipe, name=name, user_id=user, duration_minutes=30, commensals=4)
+    for order, description in enumerate(steps, start=1):
+        baker.make(Step, recipe=recipe, order=order, description=description)
+    for ingredient in ingredients:
+        baker.make(RecipeIngredient, recipe=recipe, ingredient=ingredient, quantity=1, unit=unit)
+    return recipe
+
+
+@pytest.fixture
+def ingredients(test_user, test_unit_type):
+    return [
+        baker.make(Ingredient, name=name, user_id=test_user, unit_type_id=test_unit_type)
+        for name in ('Papa', 'Huevo', 'Aceite de oliva', 'Arroz', 'Pollo')
+    ]
+
+
+@pytest.fixture
+def catalogue(test_user, test_unit, ingredients):
+    papa, huevo, aceite, arroz, pollo = ingredients
+    original = make_recipe(test_user, 'Tortilla de papas', TORTILLA_STEPS, [papa, huevo, aceite], test_unit)
+    reworded_steps = TORTILLA_STEPS[:3] + ['Cuajar la tortilla en la sartén y darle la vuelta usando un plato']
+    copy = make_recipe(test_user, 'Tortilla de Papas!', reworded_steps, [papa, huevo, aceite], test_unit)
+    other = make_recipe(
+        test_user, 'Arroz con pollo', ['Dorar el pollo troceado', 'Añadir el arroz y el caldo caliente'], [arroz, pollo], test_unit
+    )
+    return original, copy, other
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+@pytest.mark.recipes_app
+class TestRecipeDuplicates:
+    """
+    Tests for MinHash/LSH near-duplicate recipe detection.
+    """
+
+    def test_signature_estimates_jaccard_similarity(self):
+        first = recipe_shingles('Tortilla de papas', TORTILLA_STEPS, ['Papa', 'Huevo'])
+        second = recipe_shingles('Tortilla de papas', TORTILLA_STEPS[:3], ['Papa', 'Huevo'])
+        jaccard = len(first & second) / len(first | second)
+        assert signature_similarity(minhash(first), minhash(second)) == pytest.approx(jaccard, abs=0.15)
+        assert recipe_shingles('TORTILLA  de papás', [], []) == recipe_shingles('tortilla de papas', [], [])
+        assert minhash(set()) is None
+
+    def test_near_duplicates_share_a_bucket_and_are_clustered(self, catalogue):
+        original, copy, other = catalogue
+        assert index_recipes([original.id, copy.id, other.id]) == 3
+        assert RecipeSignatureBand.objects.filter(recipe=original).count() == BANDS
+
+        assert [recipe_id for recipe_id, _ in find_candidates(copy.id)] == [original.id]
+        assert find_candidates(other.id) == []
+        clusters = duplicate_clusters()
+        assert [[recipe['id'] for recipe in cluster['recipes']] for cluster in clusters] == [[original.id, copy.id]]
+        assert clusters[0]['similarity'] >= 0.7
+
+    def test_new_recipes_are_checked_on_create(self, test_user, test_unit, ingredients, catalogue, django_capture_on_commit_callbacks):
+        original, copy, _ = catalogue
+        index_recipes([original.id, copy.id])
+        client = APIClient()
+        client.force_authenticate(test_user)
+        with django_capture_on_commit_callbacks(execute=True):
+            response = client.post('/api/recipes/recipes/', {
+                'name': 'Tortilla de papas',
+                'duration_minutes': 30,
+                'commensals': 4,
+                'steps_data': json.dumps([{'order': index, 'description': text} for index, text in enumerate(TORTILLA_STEPS, 1)]),
+                'ingredients_data': json.dumps([
+                    {'ingredient': ingredient.id, 'quantity': 1, 'unit': test_unit.id} for ingredient in ingredients[:3]
+                ]),
+            }, format='multipart')
+        assert response.status_code == 201
+        signature = RecipeSignature.objects.get(recipe_id=response.json()['id'])
+        assert signature.duplicate_candidates[0] == original.id
+        assert set(signature.duplicate_candidates) == {original.id, copy.id}
+
+    def test_admin_endpoint_and_command(self, catalogue, test_user, test_superuser, capsys):
+        original, copy, _ = catalogue
+        call_command('find_duplicate_recipes')
+        assert f'#{original.id} Tortilla de papas, #{copy.id}' in capsys.readouterr().out
+        assert RecipeSignature.objects.count() == 3
+
+        client = APIClient()
+        client.force_authenticate(test_user)
+        assert client.get('/api/recipes/recipes/duplicates/').status_code == 403
+        client.force_authenticate(test_superuser)
+        data = client.get('/api/recipes/recipes/duplicates/').json()
+        assert [recipe['id'] for recipe in data['clusters'][0]['recipes']] == [original.id, copy.id]
+        assert client.get('/api/recipes/recipes/duplicates/', {'threshold': 2}).status_code == 400
+        assert client.get('/api/recipes/recipes/duplicates/', {'threshold': 1}).json() == {'clusters': []}
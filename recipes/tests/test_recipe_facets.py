@@ -0,0 +1,77 @@
+from unittest import mock
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from recipes.filters import RecipeFilter
+from recipes.models.recipe import Recipe
+from recipes.services.facets import compute_facets, parse_facets
+
+LIST_URL = '/api/recipes/recipes/'
+
+
+def counts(facet):
+    return {item['value']: item['count'] for item in facet}
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+@pytest.mark.recipes_app
+class TestRecipeFacets:
+    """
+    Tests for facet counts on the recipe list.
+    """
+
+    def test_all_facets_in_a_single_query(self, pantry):
+        _, _, categories = pantry
+        with CaptureQueriesContext(connection) as queries:
+            facets = compute_facets(Recipe.objects.all(), ['category', 'duration', 'commensals'])
+        assert len(queries.captured_queries) == 1
+
+        assert facets['category'][0] == {'value': categories['breakfast'].id, 'label': 'Desayuno', 'count': 3}
+        assert counts(facets['category']) == {categories['breakfast'].id: 3, categories['dessert'].id: 1}
+        assert counts(facets['duration']) == {'0-15': 1, '16-30': 2, '31-60': 1, '61+': 0}
+        assert counts(facets['commensals']) == {'1': 1, '2': 1, '3-4': 1, '5-6': 0, '7+': 1}
+        assert facets['duration'][1]['min'] == 16 and facets['duration'][1]['max'] == 30
+
+    def test_list_returns_facets_of_the_filtered_set(self, pantry):
+        _, ingredients, categories = pantry
+        response = APIClient().get(LIST_URL, {'facets': 'duration,category', 'ingredients': ingredients['egg'].id, 'limit': 1})
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data['results']) == 1
+        assert list(data['facets']) == ['duration', 'category']
+        assert counts(data['facets']['duration']) == {'0-15': 1, '16-30': 1, '31-60': 1, '61+': 0}
+        assert counts(data['facets']['category'])[categories['breakfast'].id] == 3
+
+        assert isinstance(APIClient().get(LIST_URL).json(), list)
+
+    def test_facets_are_cached_per_normalized_filters(self, pantry):
+        _, _, categories = pantry
+        client = APIClient()
+        first = f"{categories['breakfast'].id},{categories['dessert'].id}"
+        second = f"{categories['dessert'].id},{categories['breakfast'].id}"
+        with mock.patch('recipes.services.facets.compute_facets', wraps=compute_facets) as compute:
+            client.get(LIST_URL, {'facets': 'category', 'category': first})
+            client.get(LIST_URL, {'facets': 'category', 'category': second, 'ordering': 'created_at'})
+            assert compute.call_count == 1
+            client.get(LIST_URL, {'facets': 'category', 'category': categories['dessert'].id})
+            assert compute.call_count == 2
+
+    def test_filters_are_validated_once(self, pantry):
+        _, _, categories = pantry
+        with mock.patch.object(RecipeFilter, 'is_valid', autospec=True, side_effect=RecipeFilter.is_valid) as is_valid:
+            response = APIClient().get(LIST_URL, {'facets': 'category', 'category': categories['dessert'].id})
+        assert response.status_code == 200
+        assert is_valid.call_count == 1
+
+    def test_unknown_facets_are_rejected(self, pantry):
+        with CaptureQueriesContext(connection) as queries:
+            assert APIClient().get(LIST_URL, {'facets': 'colour'}).status_code == 400
+        # Se rechaza antes de consultar la página.
+        assert len(queries) == 0
+        assert parse_facets('duration, duration,category') == ['duration', 'category']
+        with pytest.raises(ValueError):
+            parse_facets(',')
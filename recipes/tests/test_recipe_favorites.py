@@ -0,0 +1,65 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from recipes.models.recipe_daily_stats import RecipeDailyStats
+from recipes.models.recipe_stats import RecipeStats
+from recipes.tests.test_recipe_batch import make_recipes
+from users.models.favorite import Favorite
+from users.services.favorites import add_favorite, remove_favorite
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+@pytest.mark.recipes_app
+class TestRecipeFavoriteAnnotations:
+    """
+    Tests for is_favorited and favorites_count on the recipe endpoints.
+    """
+
+    def test_authenticated_list_has_is_favorited_without_extra_queries(self, test_user, another_custom_user):
+        recipes = make_recipes(test_user, 3)
+        add_favorite(test_user.id, recipes[0].id)
+        add_favorite(another_custom_user.id, recipes[0].id)
+        add_favorite(another_custom_user.id, recipes[1].id)
+        client = APIClient()
+        client.force_authenticate(test_user)
+
+        with CaptureQueriesContext(connection) as queries:
+            data = {recipe['id']: recipe for recipe in client.get('/api/recipes/recipes/').json()}
+        assert data[recipes[0].id]['is_favorited'] is True
+        assert data[recipes[1].id]['is_favorited'] is False
+        assert [data[recipe.id]['favorites_count'] for recipe in recipes] == [2, 1, 0]
+        assert not any('favorites' in query['sql'] and 'EXISTS' not in query['sql'] for query in queries.captured_queries)
+
+        detail = client.get(f'/api/recipes/recipes/{recipes[0].id}/').json()
+        assert detail['is_favorited'] is True and detail['favorites_count'] == 2
+
+    def test_anonymous_responses_skip_is_favorited(self, test_user):
+        make_recipes(test_user, 1)
+        data = APIClient().get('/api/recipes/recipes/').json()
+        assert 'is_favorited' not in data[0]
+        assert data[0]['favorites_count'] == 0
+
+    def test_counter_follows_favorite_changes(self, test_user, another_custom_user, test_recipe):
+        def count():
+            return RecipeStats.objects.get(recipe=test_recipe).favorites_count
+
+        add_favorite(test_user.id, test_recipe.id)
+        add_favorite(test_user.id, test_recipe.id)
+        assert count() == 1
+        Favorite.objects.create(user_id=another_custom_user, recipe_id=test_recipe)
+        assert count() == 2
+        remove_favorite(test_user.id, test_recipe.id)
+        assert count() == 1
+        another_custom_user.delete()
+        assert count() == 0
+
+    def test_deleting_a_favorited_recipe_drops_its_counters(self, test_user, another_custom_user, test_recipe):
+        add_favorite(test_user.id, test_recipe.id)
+        add_favorite(another_custom_user.id, test_recipe.id)
+        recipe_id = test_recipe.id
+        test_recipe.delete()
+        assert not RecipeStats.objects.filter(recipe_id=recipe_id).exists()
+        assert not RecipeDailyStats.objects.filter(recipe_id=recipe_id).exists()
@@ -0,0 +1,78 @@
+import re
+
+import pytest
+from django.db import connection
+from rest_framework.test import APIClient
+
+from recipes.filters import RecipeFilter
+from recipes.models.recipe import Recipe
+
+LIST_URL = '/api/recipes/recipes/'
+
+
+def plan(params):
+    """Plan de la consulta filtrada, sin y con la ordenación de la vista."""
+    queryset = RecipeFilter(params, queryset=Recipe.objects.all()).qs
+    return queryset.order_by().explain() + '\n' + queryset.order_by('-created_at').explain()
+
+
+def full_scans(explained):
+    return re.findall(r'SCAN recipes$', explained, flags=re.MULTILINE)
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+@pytest.mark.recipes_app
+class TestRecipeFilters:
+    """
+    Tests for RecipeFilter on the recipe list.
+    """
+
+    def names(self, params):
+        response = APIClient().get(LIST_URL, params)
+        assert response.status_code == 200
+        return sorted(recipe['name'] for recipe in response.json())
+
+    def test_ranges(self, pantry):
+        assert self.names({'duration_min': 10, 'duration_max': 30}) == ['patatas', 'tortilla']
+        assert self.names({'commensals_min': 4}) == ['bizcocho', 'tortilla']
+        assert self.names({'commensals_max': 1}) == ['huevo frito']
+        assert self.names({'created_after': '2000-01-01T00:00:00Z', 'created_before': '2000-01-02T00:00:00Z'}) == []
+
+    def test_categories_match_any_without_duplicates(self, pantry):
+        _, _, categories = pantry
+        ids = f"{categories['breakfast'].id},{categories['dessert'].id}"
+        assert self.names({'category': ids}) == ['bizcocho', 'huevo frito', 'tortilla']
+        assert self.names({'category': categories['dessert'].id}) == ['bizcocho']
+
+    def test_ingredient_include_all_and_exclude_any(self, pantry):
+        _, ingredients, _ = pantry
+        egg, potato, flour = ingredients['egg'].id, ingredients['potato'].id, ingredients['flour'].id
+        assert self.names({'ingredients': egg}) == ['bizcocho', 'huevo frito', 'tortilla']
+        assert self.names({'ingredients': f'{egg},{potato}'}) == ['tortilla']
+        assert self.names({'exclude_ingredients': f'{potato},{flour}'}) == ['huevo frito']
+        assert self.names({'ingredients': egg, 'exclude_ingredients': flour, 'duration_max': 10}) == ['huevo frito']
+
+    def test_invalid_values_are_rejected(self):
+        assert APIClient().get(LIST_URL, {'category': 'a,b'}).status_code == 400
+        assert APIClient().get(LIST_URL, {'created_after': 'ayer'}).status_code == 400
+
+    @pytest.mark.skipif(connection.vendor != 'sqlite', reason='Planes de EXPLAIN QUERY PLAN de SQLite')
+    @pytest.mark.parametrize('params, index', [
+        ({'duration_min': 5, 'duration_max': 30}, 'recipes_duration_idx'),
+        ({'commensals_min': 2}, 'recipes_commensals_idx'),
+        ({'created_after': '2025-01-01T00:00:00Z'}, 'recipes_created_at_idx'),
+        ({'category': '1,2'}, 'categories_recipes_category_id'),
+        ({'ingredients': '1,2'}, 'recipe_ingredients_ingredient_id'),
+        ({'category': '1', 'duration_max': 30, 'ingredients': '4', 'exclude_ingredients': '3'}, 'recipe_ing_recipe_ingr_idx'),
+    ])
+    def test_filters_are_index_driven(self, params, index):
+        explained = plan(params)
+        assert index in explained
+        assert full_scans(explained) == []
+
+    @pytest.mark.skipif(connection.vendor != 'sqlite', reason='Planes de EXPLAIN QUERY PLAN de SQLite')
+    def test_exclusion_probes_the_covering_index(self):
+        # Solo con exclusiones no hay rango que acotar: se recorre el índice de la ordenación.
+        explained = plan({'exclude_ingredients': '3'})
+        assert 'USING COVERING INDEX recipe_ing_recipe_ingr_idx' in explained
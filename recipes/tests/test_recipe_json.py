@@ -0,0 +1,109 @@
+import json
+from unittest import mock
+
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.db import connection
+from django.db.backends.postgresql.base import DatabaseWrapper
+from django.db.models import TextField, Value
+from django.test.utils import CaptureQueriesContext
+from model_bakery import baker
+from rest_framework.test import APIClient
+
+from recipes.models.recipe import Recipe
+from recipes.models.recipeIngredient import RecipeIngredient
+from recipes.services.recipe_documents import DYNAMIC_FIELDS, rebuild_documents
+from recipes.services.recipe_json import json_detail_supported, recipe_detail_json, recipe_json_rows
+from recipes.services.recipe_loading import with_user_annotations
+from recipes.tests.test_recipe_batch import BATCH_URL, make_recipes
+from recipes.tests.test_recipe_documents import serialized
+from users.services.favorites import add_favorite
+
+
+@pytest.fixture
+def recipes(test_user, test_category, test_ingredient, test_unit):
+    full, bare = make_recipes(test_user, 2, test_category)
+    baker.make(RecipeIngredient, recipe=full, ingredient=test_ingredient, quantity=3, unit=test_unit)
+    baker.make(RecipeIngredient, recipe=full, ingredient=test_ingredient, quantity=1, unit=test_unit)
+    bare.categories.clear()
+    bare.step_set.all().delete()
+    return full, bare
+
+
+def batch(client, recipes):
+    return client.get(BATCH_URL, {'ids': ','.join(str(recipe.id) for recipe in recipes)}).json()['results']
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+@pytest.mark.recipes_app
+class TestRecipeDetailSources:
+    """
+    Tests for the per-endpoint recipe detail source (document, sql, prefetch).
+    """
+
+    def test_sql_source_falls_back_to_prefetch(self, settings, recipes):
+        expected = batch(APIClient(), recipes)
+        settings.RECIPE_DETAIL_SOURCES = {'batch': 'sql', 'retrieve': 'sql'}
+        assert json_detail_supported() is (connection.vendor == 'postgresql')
+        assert batch(APIClient(), recipes) == expected
+        assert APIClient().get(f'/api/recipes/recipes/{recipes[0].id}/').json() == expected[0]
+
+    def test_sources_are_selected_per_action(self, settings, recipes, another_custom_user):
+        add_favorite(another_custom_user.id, recipes[0].id)
+        rebuild_documents([recipe.id for recipe in recipes])
+        client = APIClient()
+        client.force_authenticate(another_custom_user)
+        expected = batch(client, recipes)
+
+        settings.RECIPE_DETAIL_SOURCES = {'batch': 'document'}
+        with CaptureQueriesContext(connection) as queries:
+            assert batch(client, recipes) == expected
+        assert len(queries.captured_queries) == 1
+        assert expected[0]['is_favorited'] is True and expected[0]['favorites_count'] == 1
+
+    def test_detail_compiles_to_one_postgres_statement(self):
+        postgres = DatabaseWrapper({**connection.settings_dict, 'ENGINE': 'django.db.backends.postgresql'}, 'json-sql')
+        queryset = with_user_annotations(Recipe.objects.filter(pk=1), AnonymousUser())
+        sql, _ = queryset.annotate(detail=recipe_detail_json()).values('detail').query.get_compiler(connection=postgres).as_sql()
+        assert sql.count('JSON_AGG(') == 3 and 'JSON_BUILD_OBJECT(' in sql
+        assert '::text' in sql and '::jsonb' not in sql and 'recipe_stats' in sql
+
+    def test_rows_are_decoded_in_serializer_key_order(self, recipes, another_custom_user):
+        """El texto JSON de la consulta se decodifica sin reordenar claves y se le añaden los campos dinámicos."""
+        add_favorite(another_custom_user.id, recipes[0].id)
+        expected = serialized(recipes[0], another_custom_user)
+        text = json.dumps({key: value for key, value in expected.items() if key not in DYNAMIC_FIELDS})
+        queryset = with_user_annotations(Recipe.objects.filter(pk=recipes[0].pk), another_custom_user)
+        with mock.patch('recipes.services.recipe_json.recipe_detail_json', return_value=Value(text, output_field=TextField())):
+            [row] = recipe_json_rows(queryset)
+        assert row == expected
+        assert list(row) == list(expected)
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+@pytest.mark.recipes_app
+@pytest.mark.skipif(connection.vendor != 'postgresql', reason='Requiere PostgreSQL')
+class TestRecipeJsonPostgres:
+    """
+    The single-statement JSON detail matches RecipeSerializer output. Run against PostgreSQL.
+    """
+
+    def test_parity_with_serializer(self, recipes, another_custom_user):
+        add_favorite(another_custom_user.id, recipes[0].id)
+        for user in (AnonymousUser(), another_custom_user):
+            queryset = with_user_annotations(Recipe.objects.filter(id__in=[r.id for r in recipes]).order_by('id'), user)
+            with CaptureQueriesContext(connection) as queries:
+                rows = recipe_json_rows(queryset)
+            assert len(queries.captured_queries) == 1
+            expected = [serialized(recipe, user) for recipe in sorted(recipes, key=lambda recipe: recipe.id)]
+            assert rows == expected
+            assert [list(row) for row in rows] == [list(row) for row in expected]
+
+    def test_batch_endpoint_uses_sql(self, settings, recipes):
+        expected = batch(APIClient(), recipes)
+        settings.RECIPE_DETAIL_SOURCES = {'batch': 'sql'}
+        with CaptureQueriesContext(connection) as queries:
+            assert batch(APIClient(), recipes) == expected
+        assert len(queries.captured_queries) == 1
@@ -0,0 +1,106 @@
+import datetime
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from recipes.models.recipe_daily_stats import RecipeDailyStats
+from recipes.models.recipe_ranking import RecipeRanking
+from recipes.models.recipe_stats import RecipeStats
+from recipes.services.counters import add_daily_counts
+from recipes.services.popularity import (
+    current_scale,
+    day_weight,
+    get_ranking,
+    last_pass_started_at,
+    update_popularity,
+)
+from recipes.tests.test_recipe_batch import make_recipes
+from users.services.favorites import add_favorite, remove_favorite
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+@pytest.mark.recipes_app
+class TestRecipePopularity:
+    """
+    Tests for daily counters, trending scores and the stored ranking feeds.
+    """
+
+    def test_daily_counts_are_summed_in_one_upsert(self, test_recipe):
+        today = timezone.now().date()
+        add_daily_counts({(test_recipe.id, today): {'favorites_added': 2}})
+        add_daily_counts({(test_recipe.id, today): {'favorites_added': 1, 'favorites_removed': 1}})
+        row = RecipeDailyStats.objects.get(recipe=test_recipe, day=today)
+        assert (row.favorites_added, row.favorites_removed) == (3, 1)
+
+    def test_favorites_fill_todays_bucket(self, test_user, another_custom_user, test_recipe):
+        add_favorite(test_user.id, test_recipe.id)
+        add_favorite(another_custom_user.id, test_recipe.id)
+        remove_favorite(test_user.id, test_recipe.id)
+        row = RecipeDailyStats.objects.get(recipe=test_recipe)
+        assert (row.day, row.favorites_added, row.favorites_removed) == (timezone.now().date(), 2, 1)
+
+    def test_recent_activity_outranks_older_activity(self, test_user):
+        old, recent = make_recipes(test_user, 2)
+        today = timezone.now().date()
+        add_daily_counts({
+            (old.id, today - datetime.timedelta(days=14)): {'favorites_added': 3},
+            (recent.id, today): {'favorites_added': 1},
+        })
+        assert update_popularity() == 2
+
+        scores = dict(RecipeStats.objects.values_list('recipe_id', 'trending_score'))
+        assert scores[recent.id] / current_scale() == pytest.approx(1)
+        assert scores[old.id] / current_scale() == pytest.approx(0.75)
+        assert get_ranking('trending') == [recent.id, old.id]
+
+    def test_incremental_pass_only_touches_changed_recipes(self, test_user):
+        first, second = make_recipes(test_user, 2)
+        today = timezone.now().date()
+        add_daily_counts({(first.id, today): {'favorites_added': 1}, (second.id, today): {'favorites_added': 1}})
+        assert update_popularity() == 2
+        add_daily_counts({(second.id, today): {'favorites_added': 1}})
+        assert update_popularity() == 1
+        assert update_popularity(full=True) == 2
+        assert RecipeStats.objects.get(recipe=second).trending_score == pytest.approx(2 * day_weight(today))
+
+    def test_feeds_are_paginated_from_the_stored_ranking(self, test_user, another_custom_user):
+        recipes = make_recipes(test_user, 3)
+        add_favorite(test_user.id, recipes[2].id)
+        add_favorite(another_custom_user.id, recipes[2].id)
+        add_favorite(test_user.id, recipes[0].id)
+        call_command('update_popularity', '--top-k', '2')
+
+        client = APIClient()
+        data = client.get('/api/recipes/recipes/popular/').json()
+        assert data['count'] == 2
+        assert [recipe['id'] for recipe in data['results']] == [recipes[2].id, recipes[0].id]
+        assert data['results'][0]['favorites_count'] == 2
+
+        page = client.get('/api/recipes/recipes/trending/', {'limit': 1, 'offset': 1}).json()
+        assert [recipe['id'] for recipe in page['results']] == [recipes[0].id]
+        assert page['next'] is None and page['previous'] is not None
+
+    def test_ranking_is_computed_before_the_first_pass(self, test_user):
+        recipe = make_recipes(test_user, 1)[0]
+        add_favorite(test_user.id, recipe.id)
+        assert get_ranking('popular') == [recipe.id]
+        assert get_ranking('trending') == []
+        assert last_pass_started_at() is None
+
+    def test_pass_state_is_shared_through_the_database(self, test_user):
+        first, second = make_recipes(test_user, 2)
+        today = timezone.now().date()
+        add_daily_counts({(first.id, today): {'favorites_added': 1}})
+        assert update_popularity() == 1
+        # Otro proceso no comparte el cache local: el ranking y la última pasada salen de la tabla.
+        cache.clear()
+
+        assert RecipeRanking.objects.get(feed='trending').recipe_ids == [first.id]
+        assert get_ranking('trending') == [first.id]
+        add_daily_counts({(second.id, today): {'favorites_added': 2}})
+        assert update_popularity() == 1
+        assert get_ranking('trending') == [second.id, first.id]
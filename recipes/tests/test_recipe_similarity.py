@@ -0,0 +1,90 @@
+import os
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from model_bakery import baker
+from rest_framework.test import APIClient
+
+from recipes.models.ingredient import Ingredient
+from recipes.models.recipeIngredient import RecipeIngredient
+from recipes.services.similarity import CURRENT_LINK, build_similarity_index, similar_recipes
+from recipes.tests.test_recipe_batch import make_recipes
+from users.services.favorites import add_favorite
+
+
+@pytest.fixture
+def similarity_dir(settings, tmp_path):
+    settings.SIMILARITY_INDEX_DIR = str(tmp_path / 'similarity')
+    return settings.SIMILARITY_INDEX_DIR
+
+
+@pytest.fixture
+def catalogue(test_user, another_custom_user, test_unit, test_unit_type):
+    """Tortilla y huevos revueltos comparten favoritos; tortilla y patatas fritas, ingredientes."""
+    tortilla, scrambled, fries, salad = make_recipes(test_user, 4)
+    egg, potato, lettuce = (
+        baker.make(Ingredient, name=name, user_id=test_user, unit_type_id=test_unit_type)
+        for name in ('Huevo', 'Patata', 'Lechuga')
+    )
+    for recipe, ingredients in ((tortilla, [egg, potato]), (fries, [potato]), (salad, [lettuce])):
+        for ingredient in ingredients:
+            baker.make(RecipeIngredient, recipe=recipe, ingredient=ingredient, quantity=1, unit=test_unit)
+    for user in (test_user, another_custom_user):
+        add_favorite(user.id, tortilla.id)
+        add_favorite(user.id, scrambled.id)
+    return tortilla, scrambled, fries, salad
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+@pytest.mark.recipes_app
+class TestRecipeSimilarity:
+    """
+    Tests for the offline similar-recipes index and the similar endpoint.
+    """
+
+    def test_blends_co_favorites_and_shared_ingredients(self, similarity_dir, catalogue):
+        tortilla, scrambled, fries, salad = catalogue
+        total, _ = build_similarity_index()
+        assert total == 4
+
+        neighbors = similar_recipes(tortilla.id, 10)
+        assert [recipe_id for recipe_id, _ in neighbors] == [scrambled.id, fries.id]
+        assert neighbors[0][1] == pytest.approx(0.7)
+        assert 0 < neighbors[1][1] < 0.3
+        assert similar_recipes(salad.id, 10) == []
+        assert similar_recipes(salad.id + 1000, 10) == []
+
+    def test_endpoint_serves_from_the_index_without_sql(self, similarity_dir, catalogue):
+        tortilla, scrambled, fries, _ = catalogue
+        call_command('build_similarity', '--top-k', '5')
+        client = APIClient()
+        url = f'/api/recipes/recipes/{tortilla.id}/similar/'
+
+        with CaptureQueriesContext(connection) as queries:
+            data = client.get(url, {'limit': 1}).json()
+        assert data == {'recipe_id': tortilla.id, 'results': [{'id': scrambled.id, 'score': pytest.approx(0.7)}]}
+        assert not any('recipes' in query['sql'] for query in queries.captured_queries)
+
+        embedded = client.get(url, {'embed': 'recipe'}).json()['results']
+        assert [result['recipe']['id'] for result in embedded] == [scrambled.id, fries.id]
+
+    def test_rebuild_switches_version_and_keeps_two(self, similarity_dir, catalogue):
+        tortilla, scrambled, fries, _ = catalogue
+        first = build_similarity_index(top_k=1)[1]
+        assert [recipe_id for recipe_id, _ in similar_recipes(tortilla.id, 10)] == [scrambled.id]
+        build_similarity_index(top_k=2)
+        build_similarity_index(top_k=2)
+
+        assert [recipe_id for recipe_id, _ in similar_recipes(tortilla.id, 10)] == [scrambled.id, fries.id]
+        assert not os.path.exists(first)
+        assert len([entry for entry in os.listdir(similarity_dir) if entry != CURRENT_LINK]) == 2
+
+    def test_missing_index_and_invalid_params(self, similarity_dir, test_recipe):
+        client = APIClient()
+        url = f'/api/recipes/recipes/{test_recipe.id}/similar/'
+        assert client.get(url).json() == {'recipe_id': test_recipe.id, 'results': []}
+        assert client.get(url, {'limit': 'x'}).status_code == 400
+        assert client.get(url, {'limit': 0}).status_code == 400
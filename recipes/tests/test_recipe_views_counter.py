@@ -0,0 +1,67 @@
+import threading
+from unittest import mock
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from recipes.models.recipe_daily_stats import RecipeDailyStats
+from recipes.services.counters import BufferedCounter, recipe_views
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+@pytest.mark.recipes_app
+class TestRecipeViewCounter:
+    """
+    Tests for the buffered per-day recipe view counter.
+    """
+
+    def test_retrieve_buffers_views_without_writing(self, test_recipe):
+        client = APIClient()
+        with CaptureQueriesContext(connection) as queries:
+            client.get(f'/api/recipes/recipes/{test_recipe.id}/')
+        client.get(f'/api/recipes/recipes/{test_recipe.id}/')
+
+        assert not any('recipe_daily_stats' in query['sql'] for query in queries.captured_queries)
+        assert recipe_views.pending() == {(test_recipe.id, timezone.now().date()): 2}
+        assert not RecipeDailyStats.objects.exists()
+
+    def test_flush_merges_into_the_daily_bucket(self, test_recipe):
+        today = timezone.now().date()
+        recipe_views.add(test_recipe.id, 3)
+        assert recipe_views.flush() == 1
+        recipe_views.add(test_recipe.id)
+        recipe_views.flush()
+
+        assert RecipeDailyStats.objects.get(recipe=test_recipe, day=today).views == 4
+        assert recipe_views.pending() == {}
+        assert recipe_views.flush() == 0
+
+    def test_concurrent_adds_are_not_lost(self, test_recipe):
+        counter = BufferedCounter('views')
+        threads = [threading.Thread(target=lambda: [counter.add(test_recipe.id) for _ in range(500)]) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert sum(counter.pending().values()) == 4000
+        counter.clear()
+
+    def test_deleted_recipes_are_skipped(self, test_recipe):
+        recipe_views.add(test_recipe.id)
+        recipe_views.add(test_recipe.id + 1000)
+        assert recipe_views.flush() == 1
+        assert RecipeDailyStats.objects.get().recipe_id == test_recipe.id
+
+    def test_failed_flush_keeps_the_counts(self, test_recipe):
+        recipe_views.add(test_recipe.id, 2)
+        with mock.patch('recipes.services.counters.add_daily_counts', side_effect=RuntimeError):
+            assert recipe_views.flush() == 0
+        assert recipe_views.pending() == {(test_recipe.id, timezone.now().date()): 2}
+
+    def test_unknown_field_is_rejected(self):
+        with pytest.raises(ValueError):
+            BufferedCounter('likes')
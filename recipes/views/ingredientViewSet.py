@@ -19,7 +19,7 @@ class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
     Author:
         {Noemi Casaprima}
     """
-    queryset = Ingredient.objects.filter(is_approved=True)  # Solo ingredientes aprobado
+    queryset = Ingredient.objects.filter(is_approved=True).order_by('name')  # Solo ingredientes aprobado
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['id']
     serializer_class = IngredientSerializer
@@ -1,16 +1,42 @@
 import random
-from django_filters.rest_framework import DjangoFilterBackend
+from functools import partial
 from rest_framework import viewsets
-from rest_framework.permissions import IsAuthenticatedOrReadOnly
+from django.conf import settings
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticatedOrReadOnly
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from rest_framework import filters
+from api.throttling import ExpensiveEndpointThrottleMixin
+from recipes.filters import RecipeFilter, RecipeFilterBackend
 from recipes.models.recipe import Recipe
 from recipes.serializers.recipeSerializer import RecipeSerializer, RecipeAdminSerializer
-from media.services.image_service import update_image_for_instance
+from media.models.image import Image
+from media.services.image_service import discard_encoded_images, encode_uploaded_images, save_encoded_images
+from recipes.services.counters import recipe_views
+from recipes.services.duplicates import check_recipe, duplicate_clusters
+from recipes.services.facets import cached_facets, parse_facets
+from recipes.services.popularity import get_ranking
+from recipes.services.recipe_documents import rebuild_documents, recipe_document_rows
+from recipes.services.recipe_json import json_detail_supported, recipe_json_rows
+from recipes.services.similarity import similar_recipes
+from recipes.services.recipe_loading import (
+    parse_recipe_ids,
+    recipe_image_context,
+    with_recipe_relations,
+    with_user_annotations,
+)
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RankingPagination(LimitOffsetPagination):
+    """Paginación `limit`/`offset` de los rankings precalculados."""
+    default_limit = 20
+    max_limit = 100
+
+
+class RecipeViewSet(ExpensiveEndpointThrottleMixin, viewsets.ModelViewSet):
     """
     ViewSet para el modelo Recipe.
 
@@ -28,14 +54,19 @@ class RecipeViewSet(viewsets.ModelViewSet):
     Modifiedby:
         {Ángel Aragón}
     Mofified:
-        Agregados filtro
+        Agregados filtro (ver `RecipeFilter`)
     """
     queryset = Recipe.objects.all()
-    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
-    filterset_fields = ['user_id', 'id']
+    filter_backends = [RecipeFilterBackend, filters.OrderingFilter]
+    filterset_class = RecipeFilter
     ordering_fields = ['created_at']
     ordering = ['-created_at']
     permission_classes = [IsAuthenticatedOrReadOnly]
+    throttle_scope = 'recipe_create'
+    throttled_actions = {'create'}
+
+    def get_queryset(self):
+        return with_user_annotations(super().get_queryset(), self.request.user)
 
     def get_serializer_class(self):
         user = self.request.user
@@ -43,17 +74,183 @@ class RecipeViewSet(viewsets.ModelViewSet):
             return RecipeAdminSerializer
         return RecipeSerializer
 
-    def perform_create(self, serializer): 
-        recipe = serializer.save(user_id=self.request.user)
+    def encode_images(self, serializer, include_recipe_image=False):
+        """
+        Valida y codifica a WebP las imágenes de la petición antes de abrir la transacción de la
+        receta, que solo inserta las filas (ver `RecipeSerializer.encode_images`).
 
-        image_file = self.request.FILES.get("recipe_image")
+        Returns:
+            dict: {clave del archivo: (nombre, metadatos)} de todos los archivos escritos.
+        """
+        images = serializer.encode_images(self.request) if isinstance(serializer, RecipeSerializer) else {}
+        image_file = self.request.FILES.get('recipe_image') if include_recipe_image else None
         if image_file:
-            update_image_for_instance(
-                image_file=image_file,
-                user_id=self.request.user.id,
-                external_id=recipe.id,
-                image_type="RECIPE"
-            )
+            try:
+                written, errors = encode_uploaded_images({'recipe_image': image_file}, self.request.user.id)
+            except Exception:
+                discard_encoded_images(images.values(), self.request.user.id)
+                raise
+            if errors:
+                discard_encoded_images(images.values(), self.request.user.id)
+                raise ValidationError({'recipe_image': errors})
+            images = {**images, **written}
+        return images
+
+    def perform_create(self, serializer):
+        images = self.encode_images(serializer, include_recipe_image=True)
+        try:
+            # En una transacción: el documento de la receta se regenera una sola vez, tras el commit.
+            with transaction.atomic():
+                recipe = serializer.save(user_id=self.request.user)
+                if 'recipe_image' in images:
+                    save_encoded_images([(Image.ImageType.RECIPE, recipe.id, images['recipe_image'])], self.request.user.id)
+                # La firma de duplicados necesita los pasos e ingredientes ya guardados.
+                transaction.on_commit(partial(check_recipe, recipe.id), robust=True)
+        except Exception:
+            # Las filas se han deshecho: los archivos ya escritos no los usa nadie.
+            discard_encoded_images(images.values(), self.request.user.id)
+            raise
+
+    def perform_update(self, serializer):
+        images = self.encode_images(serializer)
+        try:
+            with transaction.atomic():
+                recipe = serializer.save()
+                transaction.on_commit(partial(check_recipe, recipe.id), robust=True)
+        except Exception:
+            discard_encoded_images(images.values(), self.request.user.id)
+            raise
+
+    def retrieve(self, request, *args, **kwargs):
+        pk = kwargs[self.lookup_field]
+        results = []
+        if self.detail_source() != 'prefetch' and str(pk).isdigit():
+            # Una sola consulta por clave primaria; si no hay receta, el camino normal responde el 404.
+            results = self.render_recipes(self.filter_queryset(self.get_queryset()).filter(pk=pk))
+        response = Response(results[0]) if results else super().retrieve(request, *args, **kwargs)
+        # Solo se acumula en memoria; el volcado a recipe_daily_stats es por lotes (ver BufferedCounter).
+        recipe_views.add(response.data['id'])
+        return response
+
+    def detail_source(self):
+        """
+        De dónde sale el detalle de las recetas en la acción actual: 'document', 'sql' o 'prefetch'
+        (ver RECIPE_DETAIL_SOURCES). El staff usa `RecipeAdminSerializer` y siempre va por 'prefetch'.
+        """
+        if self.get_serializer_class() is not RecipeSerializer:
+            return 'prefetch'
+        source = settings.RECIPE_DETAIL_SOURCES.get(self.action, 'prefetch')
+        if source == 'sql' and not json_detail_supported(self.get_queryset().db):
+            return 'prefetch'
+        return source
+
+    def render_recipes(self, queryset):
+        """
+        Detalle de las recetas de `queryset`, en su orden, según `detail_source`. Con 'document',
+        las recetas sin documento se serializan con prefetch y su documento se genera tras el commit.
+        """
+        source = self.detail_source()
+        if source == 'sql':
+            return recipe_json_rows(queryset)
+        if source == 'document':
+            rows = recipe_document_rows(queryset)
+            missing = [recipe_id for recipe_id, data in rows if data is None]
+            if not missing:
+                return [data for _, data in rows]
+            transaction.on_commit(partial(rebuild_documents, missing), robust=True)
+            fallback = {
+                data['id']: data
+                for data in self.serialize_recipes(list(with_recipe_relations(queryset.filter(id__in=missing))))
+            }
+            return [fallback[recipe_id] if data is None else data for recipe_id, data in rows]
+        return self.serialize_recipes(list(with_recipe_relations(queryset)))
+
+    def serialize_recipes(self, recipes):
+        """Serializa una lista de recetas cargadas con `with_recipe_relations`, con sus imágenes en lote."""
+        context = {**self.get_serializer_context(), **recipe_image_context(recipes)}
+        return self.get_serializer(recipes, many=True, context=context).data
+
+    @action(detail=False, methods=['get', 'post'], permission_classes=[AllowAny])
+    def batch(self, request):
+        """
+        Devuelve varias recetas por id, en el orden pedido y sin duplicados.
+        GET con `?ids=1,2,3` (o `ids` repetido); POST con `{"ids": [...]}` para listas largas.
+        Como máximo `RECIPE_BATCH_MAX_IDS` ids; los que no existen se indican en `missing`.
+        """
+        if request.method == 'POST':
+            values = request.data.get('ids', []) if hasattr(request.data, 'get') else []
+            if not isinstance(values, list):
+                values = [values]
+        else:
+            values = request.query_params.getlist('ids')
+        try:
+            ids = parse_recipe_ids(values, settings.RECIPE_BATCH_MAX_IDS)
+        except ValueError as exc:
+            raise ValidationError({'ids': str(exc)})
+
+        found = {recipe['id']: recipe for recipe in self.render_recipes(self.get_queryset().filter(id__in=ids))}
+        return Response({
+            'results': [found[recipe_id] for recipe_id in ids if recipe_id in found],
+            'missing': [recipe_id for recipe_id in ids if recipe_id not in found],
+        })
+
+    def ranked_response(self, request, feed):
+        """Pagina (`limit`/`offset`) la lista precalculada de ids del ranking y carga solo esa página."""
+        paginator = RankingPagination()
+        page_ids = paginator.paginate_queryset(get_ranking(feed), request, view=self)
+        found = {recipe['id']: recipe for recipe in self.render_recipes(self.get_queryset().filter(id__in=page_ids))}
+        return paginator.get_paginated_response([found[recipe_id] for recipe_id in page_ids if recipe_id in found])
+
+    @action(detail=False, methods=['get'], permission_classes=[AllowAny])
+    def trending(self, request):
+        """Recetas en tendencia: favoritos recientes con decaimiento exponencial (ver update_popularity)."""
+        return self.ranked_response(request, 'trending')
+
+    @action(detail=False, methods=['get'], permission_classes=[AllowAny])
+    def popular(self, request):
+        """Recetas con más favoritos."""
+        return self.ranked_response(request, 'popular')
+
+    @action(detail=True, methods=['get'], permission_classes=[AllowAny])
+    def similar(self, request, pk=None):
+        """
+        Recetas más parecidas según el índice precalculado por `build_similarity` (sin SQL).
+        `?limit=` (por defecto 10, máximo SIMILARITY_TOP_K); `?embed=recipe` añade las recetas serializadas.
+        """
+        try:
+            recipe_id = int(pk)
+            limit = int(request.query_params.get('limit', 10))
+        except (TypeError, ValueError):
+            raise ValidationError({'detail': 'El id y `limit` deben ser números enteros.'})
+        if limit < 1:
+            raise ValidationError({'limit': 'Debe ser mayor que 0.'})
+        neighbors = similar_recipes(recipe_id, min(limit, settings.SIMILARITY_TOP_K))
+        results = [{'id': neighbor_id, 'score': score} for neighbor_id, score in neighbors]
+
+        if request.query_params.get('embed') == 'recipe' and results:
+            ids = [result['id'] for result in results]
+            found = {recipe['id']: recipe for recipe in self.render_recipes(self.get_queryset().filter(id__in=ids))}
+            # Las recetas borradas desde que se construyó el índice se omiten.
+            results = [result for result in results if result['id'] in found]
+            for result in results:
+                result['recipe'] = found[result['id']]
+        return Response({'recipe_id': recipe_id, 'results': results})
+
+    @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
+    def duplicates(self, request):
+        """
+        Grupos de recetas casi duplicadas (MinHash + LSH sobre las firmas guardadas), para moderación.
+        `?threshold=` entre 0 y 1 (por defecto DUPLICATE_THRESHOLD).
+        """
+        threshold = request.query_params.get('threshold')
+        if threshold is not None:
+            try:
+                threshold = float(threshold)
+            except ValueError:
+                threshold = -1
+            if not 0 < threshold <= 1:
+                raise ValidationError({'threshold': 'Debe ser un número entre 0 y 1.'})
+        return Response({'clusters': duplicate_clusters(threshold)})
 
     @action(detail=False, methods=['get'])
     def random(self, request):
@@ -75,18 +272,34 @@ class RecipeViewSet(viewsets.ModelViewSet):
         else:
             random_ids = random.sample(all_recipe_ids, count)
 
-        random_recipes = self.get_queryset().filter(id__in=random_ids)
-
-        serializer = self.get_serializer(random_recipes, many=True)
-        return Response(serializer.data)
+        return Response(self.render_recipes(self.get_queryset().filter(id__in=random_ids)))
 
     def list(self, request, *args, **kwargs):
-        queryset = self.filter_queryset(self.get_queryset())
+        """
+        Lista de recetas filtrada (ver `RecipeFilter`). Con `?facets=category,duration,commensals`
+        la respuesta pasa a ser `{"results": [...], "facets": {...}}`, con los recuentos de toda la
+        lista filtrada (sin `limit`).
+        """
+        # `?facets=` se valida antes de consultar y serializar la página.
+        facets = request.query_params.get('facets')
+        try:
+            names = parse_facets(facets) if facets is not None else None
+        except ValueError as exc:
+            raise ValidationError({'facets': str(exc)})
+
+        filtered = self.filter_queryset(self.get_queryset())
+        queryset = with_recipe_relations(filtered)
 
         # Limitar resultados si se pasa el parámetro 'limit'
         limit = request.query_params.get('limit')
         if limit is not None and limit.isdigit():
             queryset = queryset[:int(limit)]
 
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        results = self.serialize_recipes(list(queryset))
+        if names is None:
+            return Response(results)
+        # El filterset con el que ha filtrado RecipeFilterBackend, ya validado: normaliza la clave de cache.
+        return Response({
+            'results': results,
+            'facets': cached_facets(filtered, self.filterset.form.cleaned_data, names),
+        })
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.3 on 2026-10-19 05:22
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('measurements', '0003_alter_unit_unit_type'),
+        ('shopping', '0003_alter_shoppinglistitem_is_purchased_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='shoppinglistitem',
+            index=models.Index(fields=['user_id', 'is_purchased'], name='shop_items_user_purch_idx'),
+        ),
+        migrations.AlterField(
+            model_name='shoppinglistitem',
+            name='user_id',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+    ]
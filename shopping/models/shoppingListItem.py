@@ -24,7 +24,8 @@ class ShoppingListItem(models.Model):
         {Lorena Martínez}
     """
 
-    user_id = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    # Sin índice propio: lo cubre shop_items_user_purch_idx (user_id, is_purchased).
+    user_id = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, db_index=False)
     ingredient_id = models.ForeignKey(Ingredient, on_delete=models.CASCADE)
     quantity_needed = models.IntegerField()
     unit = models.ForeignKey(Unit, on_delete=models.CASCADE)
@@ -39,9 +40,13 @@ class ShoppingListItem(models.Model):
         Esta clase define el nombre de la tabla en la base de datos.  
         Args:  
             db_table (str): Nombre de la tabla en la base de datos, en este caso 'shopping_list_items'.
+            indexes (list): Ítems de un usuario, separados por estado de compra.
         """
         
         db_table = 'shopping_list_items'
+        indexes = [
+            models.Index(fields=['user_id', 'is_purchased'], name='shop_items_user_purch_idx'),
+        ]
 
     def __str__(self):
         """
@@ -0,0 +1,111 @@
+"""
+Autenticación JWT sin consulta a la tabla 'users' en cada petición.
+
+`JWTAuthentication` carga la fila completa del usuario en cada llamada autenticada. Aquí el
+usuario se construye a partir del `user_id` del token y de una instantánea mínima
+(`is_active`, `is_staff`, `is_superuser`, `username`) guardada en una caché local del proceso
+con un TTL corto (`AUTH_USER_SNAPSHOT_TTL`). Las señales de `users.signals` invalidan la entrada
+al guardar o borrar el usuario; en otros procesos el cambio se aplica, como tarde, al caducar el TTL.
+
+El objeto resultante es un `CustomUser` con el resto de campos diferidos: las vistas que solo
+usan `request.user.id`, `is_staff` o lo asignan como clave foránea no tocan la base de datos.
+Las que necesitan el perfil completo deben recargarlo (ver `UserProfileView`).
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import router
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+SNAPSHOT_FIELDS = ('id', 'username', 'is_active', 'is_staff', 'is_superuser')
+
+
+class UserSnapshotCache:
+    """
+    Caché local del proceso {user_id: (caduca_en, valores)} con TTL y tamaño máximo.
+
+    Args:
+        max_entries (int): Al superarlo se descartan primero las entradas caducadas y, si no
+            basta, la mitad más antigua.
+    """
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        entry = self._entries.get(user_id)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        return entry[1]
+
+    def set(self, user_id, values, ttl):
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._evict()
+            self._entries[user_id] = (time.monotonic() + ttl, values)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _evict(self):
+        now = time.monotonic()
+        self._entries = {key: entry for key, entry in self._entries.items() if entry[0] >= now}
+        if len(self._entries) >= self.max_entries:
+            newest = sorted(self._entries.items(), key=lambda item: item[1][0])[len(self._entries) // 2:]
+            self._entries = dict(newest)
+
+
+user_snapshots = UserSnapshotCache()
+
+
+def get_user_snapshot(user_id):
+    """
+    Devuelve la instantánea del usuario (dict con `SNAPSHOT_FIELDS`) o None si no existe.
+    Solo consulta la base de datos si no está en caché o ha caducado.
+    """
+    snapshot = user_snapshots.get(user_id)
+    if snapshot is None:
+        snapshot = get_user_model().objects.filter(pk=user_id).values(*SNAPSHOT_FIELDS).first()
+        if snapshot is not None:
+            user_snapshots.set(user_id, snapshot, getattr(settings, 'AUTH_USER_SNAPSHOT_TTL', 30))
+    return snapshot
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    Igual que `JWTAuthentication`, pero sin cargar la fila del usuario en cada petición.
+    """
+
+    def get_user(self, validated_token):
+        if api_settings.CHECK_REVOKE_TOKEN:
+            # La comprobación de revocación necesita el hash de la contraseña: camino normal.
+            return super().get_user(validated_token)
+        try:
+            user_id = self.user_model._meta.pk.to_python(validated_token[api_settings.USER_ID_CLAIM])
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        snapshot = get_user_snapshot(user_id)
+        if snapshot is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        if api_settings.CHECK_USER_IS_ACTIVE and not snapshot['is_active']:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        # from_db deja diferidos los campos no incluidos: se cargan solo si alguien los lee.
+        # Los valores deben ir en el orden de los campos del modelo.
+        field_names = [field.attname for field in self.user_model._meta.concrete_fields if field.attname in snapshot]
+        return self.user_model.from_db(
+            router.db_for_read(self.user_model), field_names, [snapshot[name] for name in field_names]
+        )
@@ -0,0 +1,70 @@
+"""
+Hasher Argon2 con parámetros calibrados para la máquina.
+
+El `Argon2PasswordHasher` de Django usa parámetros fijos en la clase e ignora `ARGON2_DEFAULTS`.
+Este hasher toma `time_cost`, `memory_cost` y `parallelism`, por orden de prioridad, de:
+
+    1. El archivo JSON `ARGON2_CALIBRATION_FILE`, generado por `manage.py calibrate_hasher`
+       para alcanzar una latencia objetivo en el hardware de producción.
+    2. `ARGON2_DEFAULTS` en settings.
+    3. Los valores por defecto de Django.
+
+`time_cost` y `memory_cost` nunca bajan de los de Django (`ARGON2_MINIMUM`): un valor menor en
+settings o en la calibración se eleva al mínimo, para que el rehash al hacer login no debilite los
+hashes existentes.
+
+Mantiene el algoritmo `argon2`, así que verifica los hashes existentes. Cuando un hash se creó con
+otros parámetros (o con otro hasher de `PASSWORD_HASHERS`), `check_password` lo regenera con los
+actuales tras un login correcto, sin intervención del usuario.
+"""
+import json
+from functools import lru_cache
+
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+ARGON2_PARAMETERS = ('time_cost', 'memory_cost', 'parallelism')
+ARGON2_MINIMUM = {
+    'time_cost': Argon2PasswordHasher.time_cost,
+    'memory_cost': Argon2PasswordHasher.memory_cost,
+    'parallelism': 1,
+}
+
+
+@lru_cache(maxsize=1)
+def get_argon2_parameters():
+    """Devuelve los parámetros vigentes como dict, leyendo el archivo de calibración una vez por proceso."""
+    parameters = {name: getattr(Argon2PasswordHasher, name) for name in ARGON2_PARAMETERS}
+    parameters.update(getattr(settings, 'ARGON2_DEFAULTS', None) or {})
+    calibration_file = getattr(settings, 'ARGON2_CALIBRATION_FILE', None)
+    if calibration_file:
+        try:
+            with open(calibration_file, encoding='utf-8') as calibration:
+                parameters.update(json.load(calibration))
+        except FileNotFoundError:
+            pass
+    return {name: max(int(parameters[name]), ARGON2_MINIMUM[name]) for name in ARGON2_PARAMETERS}
+
+
+@receiver(setting_changed)
+def _reset_argon2_parameters(*, setting, **kwargs):
+    if setting in ('ARGON2_DEFAULTS', 'ARGON2_CALIBRATION_FILE'):
+        get_argon2_parameters.cache_clear()
+
+
+class CalibratedArgon2PasswordHasher(Argon2PasswordHasher):
+    """Argon2 con los parámetros de `get_argon2_parameters()`."""
+
+    @property
+    def time_cost(self):
+        return get_argon2_parameters()['time_cost']
+
+    @property
+    def memory_cost(self):
+        return get_argon2_parameters()['memory_cost']
+
+    @property
+    def parallelism(self):
+        return get_argon2_parameters()['parallelism']
@@ -0,0 +1,85 @@
+# CF-backend/users/management/commands/calibrate_hasher.py
+import json
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from users.hashers import ARGON2_MINIMUM, ARGON2_PARAMETERS, CalibratedArgon2PasswordHasher, get_argon2_parameters
+
+
+class Command(BaseCommand):
+    help = (
+        "Calibra los parámetros de Argon2 para que un hash tarde aproximadamente --target-ms en esta "
+        "máquina y los guarda en ARGON2_CALIBRATION_FILE. Los hashes existentes se regeneran con los "
+        "nuevos parámetros en el siguiente login correcto de cada usuario. time_cost y memory_cost "
+        "no bajan de los valores por defecto de Django."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target-ms', type=float, default=100.0, help='Latencia objetivo de un hash en milisegundos.')
+        parser.add_argument('--memory-cost', type=int, default=None, help='Memoria en KiB (por defecto, la actual).')
+        parser.add_argument('--parallelism', type=int, default=None, help='Hilos (por defecto, los actuales).')
+        parser.add_argument('--max-time-cost', type=int, default=64, help='Límite de iteraciones a probar.')
+        parser.add_argument('--samples', type=int, default=5, help='Hashes medidos por combinación.')
+        parser.add_argument('--output', default=None, help='Archivo de salida (por defecto ARGON2_CALIBRATION_FILE).')
+        parser.add_argument('--dry-run', action='store_true', help='Solo muestra el resultado, no escribe el archivo.')
+
+    def handle(self, *args, **options):
+        if options['target_ms'] <= 0:
+            raise CommandError("--target-ms debe ser mayor que 0.")
+        for name in ('memory_cost', 'parallelism'):
+            if options[name] is not None and options[name] < ARGON2_MINIMUM[name]:
+                raise CommandError(f"--{name.replace('_', '-')} no puede ser menor que {ARGON2_MINIMUM[name]}.")
+        current = get_argon2_parameters()
+        parameters = {
+            'time_cost': ARGON2_MINIMUM['time_cost'],
+            'memory_cost': options['memory_cost'] or current['memory_cost'],
+            'parallelism': options['parallelism'] or current['parallelism'],
+        }
+        self.samples = options['samples']
+        target = options['target_ms']
+
+        # Con las iteraciones mínimas ya por encima del objetivo, se reduce la memoria hasta el mínimo.
+        elapsed = self.measure(parameters)
+        while elapsed > target and parameters['memory_cost'] > ARGON2_MINIMUM['memory_cost']:
+            parameters['memory_cost'] = max(parameters['memory_cost'] // 2, ARGON2_MINIMUM['memory_cost'])
+            elapsed = self.measure(parameters)
+        # Si no, se suben las iteraciones hasta alcanzar el objetivo.
+        while elapsed < target and parameters['time_cost'] < options['max_time_cost']:
+            parameters['time_cost'] += 1
+            elapsed = self.measure(parameters)
+
+        self.stdout.write(
+            f"Parámetros: time_cost={parameters['time_cost']} memory_cost={parameters['memory_cost']} KiB "
+            f"parallelism={parameters['parallelism']} -> {elapsed:.1f} ms por hash "
+            f"(~{1000 / elapsed:.1f} logins/s por núcleo)."
+        )
+        if options['dry_run']:
+            return
+        output = options['output'] or settings.ARGON2_CALIBRATION_FILE
+        if not output:
+            raise CommandError("Indica --output o define ARGON2_CALIBRATION_FILE.")
+        with open(output, 'w', encoding='utf-8') as calibration:
+            json.dump({name: parameters[name] for name in ARGON2_PARAMETERS}, calibration, indent=2)
+        get_argon2_parameters.cache_clear()
+        self.stdout.write(self.style.SUCCESS(f"✅ Calibración guardada en {output}."))
+
+    def measure(self, parameters):
+        """Mediana en milisegundos de `samples` hashes con los parámetros dados."""
+        hasher = CalibratedArgon2PasswordHasher()
+        argon2 = hasher._load_library()
+        salt = hasher.salt()
+        timings = []
+        for _ in range(self.samples):
+            started = time.perf_counter()
+            argon2.low_level.hash_secret(
+                b'calibration-password', salt.encode(),
+                time_cost=parameters['time_cost'],
+                memory_cost=parameters['memory_cost'],
+                parallelism=parameters['parallelism'],
+                hash_len=argon2.DEFAULT_HASH_LENGTH,
+                type=argon2.low_level.Type.ID,
+            )
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
@@ -0,0 +1,57 @@
+# CF-backend/users/management/commands/import_users.py
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+from users.services.user_import import UserImporter, iter_records, open_records
+
+
+class Command(BaseCommand):
+    help = (
+        "Importa usuarios desde un archivo CSV (con cabecera) o NDJSON. Columnas: username, email, name, "
+        "surname y, opcionales, second_surname, biography, is_active, is_staff y password (en claro) o "
+        "password_hash (ya hasheada). Los registros duplicados o incompletos se informan sin detener la importación."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Archivo a importar.')
+        parser.add_argument('--format', choices=['csv', 'ndjson'], default=None,
+                            help='Formato del archivo (por defecto, según la extensión).')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Usuarios validados e insertados por lote.')
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Procesos para hashear contraseñas (por defecto, uno por CPU; 0 para no usar pool).')
+        parser.add_argument('--report', default=None, help='CSV donde escribir los registros descartados.')
+        parser.add_argument('--dry-run', action='store_true', help='Solo valida, no hashea ni inserta.')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] <= 0:
+            raise CommandError("--batch-size debe ser mayor que 0.")
+        if options['workers'] is not None and options['workers'] < 0:
+            raise CommandError("--workers no puede ser negativo.")
+        try:
+            stream, file_format = open_records(options['path'], options['format'])
+        except OSError as exc:
+            raise CommandError(f"No se puede abrir {options['path']}: {exc}")
+
+        with stream, UserImporter(options['batch_size'], options['workers'], options['dry_run']) as importer:
+            importer.run(iter_records(stream, file_format))
+        importer.conflicts.sort(key=lambda conflict: conflict.line)
+
+        for conflict in importer.conflicts[:20]:
+            self.stdout.write(self.style.WARNING(
+                f"Línea {conflict.line}: {conflict.username or '-'} <{conflict.email or '-'}>: {conflict.reason}"
+            ))
+        if len(importer.conflicts) > 20:
+            self.stdout.write(self.style.WARNING(f"... y {len(importer.conflicts) - 20} registros descartados más."))
+        if options['report']:
+            with open(options['report'], 'w', encoding='utf-8', newline='') as report:
+                writer = csv.writer(report)
+                writer.writerow(['line', 'username', 'email', 'reason'])
+                writer.writerows(importer.conflicts)
+
+        if options['dry_run']:
+            summary = f"{importer.validated} usuarios válidos"
+        else:
+            summary = f"{importer.created} usuarios creados"
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Importación completada: {summary}, {len(importer.conflicts)} descartados."
+        ))
@@ -0,0 +1,52 @@
+# CF-backend/users/management/commands/prune_tokens.py
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+
+class Command(BaseCommand):
+    help = (
+        "Borra por lotes los refresh tokens caducados de token_blacklist (outstanding y blacklisted). "
+        "A diferencia de flushexpiredtokens, no lanza un único DELETE sobre toda la tabla."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Solo cuenta los tokens que se borrarían.')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Tokens borrados por transacción.')
+        parser.add_argument('--sleep', type=float, default=0.0, help='Segundos de pausa entre lotes (throttling).')
+        parser.add_argument('--max-batches', type=int, default=None, help='Lotes por ejecución (modo incremental).')
+        parser.add_argument(
+            '--grace', type=int, default=0,
+            help='Conserva los tokens caducados hace menos de N segundos (por si hay desfase de reloj).',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size <= 0:
+            raise CommandError("--batch-size debe ser mayor que 0.")
+        cutoff = timezone.now() - timedelta(seconds=options['grace'])
+        expired = OutstandingToken.objects.filter(expires_at__lt=cutoff)
+
+        if options['dry_run']:
+            self.stdout.write(f"Tokens caducados: {expired.count()} (dry-run, no se borra nada).")
+            return
+
+        batches = deleted = 0
+        while options['max_batches'] is None or batches < options['max_batches']:
+            ids = list(expired.order_by('expires_at').values_list('id', flat=True)[:batch_size])
+            if not ids:
+                break
+            with transaction.atomic():
+                BlacklistedToken.objects.filter(token_id__in=ids).delete()
+                OutstandingToken.objects.filter(id__in=ids).delete()
+            deleted += len(ids)
+            batches += 1
+            self.stdout.write(f"Lote {batches}: {len(ids)} tokens borrados.")
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        self.stdout.write(self.style.SUCCESS(f"✅ prune_tokens completado: {deleted} tokens borrados en {batches} lotes."))
@@ -0,0 +1,24 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Índice sobre token_blacklist_outstandingtoken.expires_at para que prune_tokens seleccione
+    cada lote de tokens caducados sin recorrer la tabla. La tabla pertenece a simplejwt, por eso
+    el índice se crea con SQL desde esta app.
+    """
+
+    dependencies = [
+        ('users', '0003_alter_customuser_biography'),
+        ('token_blacklist', '0012_alter_outstandingtoken_user'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql=(
+                "CREATE INDEX IF NOT EXISTS token_blacklist_outstandingtoken_expires_at_idx "
+                "ON token_blacklist_outstandingtoken (expires_at)"
+            ),
+            reverse_sql="DROP INDEX IF EXISTS token_blacklist_outstandingtoken_expires_at_idx",
+        ),
+    ]
@@ -0,0 +1,35 @@
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def deduplicate_favorites(apps, schema_editor):
+    """
+    Elimina los favoritos duplicados por (user_id, recipe_id) antes de crear el índice único.
+    Se conserva la fila más antigua (id menor), que mantiene la fecha en que se marcó el favorito.
+    """
+    Favorite = apps.get_model('users', 'Favorite')
+    duplicated = (
+        Favorite.objects.values('user_id', 'recipe_id')
+        .annotate(keep_id=Min('id'), total=Count('id'))
+        .filter(total__gt=1)
+    )
+    for group in duplicated.iterator():
+        Favorite.objects.filter(
+            user_id=group['user_id'], recipe_id=group['recipe_id']
+        ).exclude(id=group['keep_id']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0004_alter_recipe_description'),
+        ('users', '0004_outstandingtoken_expires_at_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(deduplicate_favorites, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='favorite',
+            constraint=models.UniqueConstraint(fields=('user_id', 'recipe_id'), name='favorites_user_recipe_uniq'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.3 on 2026-10-19 05:22
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0010_hot_query_indexes'),
+        ('users', '0005_favorite_user_recipe_uniq'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='favorite',
+            index=models.Index(fields=['user_id', '-created_at', '-id'], name='favorites_user_created_idx'),
+        ),
+        migrations.AlterField(
+            model_name='favorite',
+            name='user_id',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+    ]
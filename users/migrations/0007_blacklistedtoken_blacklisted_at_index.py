@@ -0,0 +1,24 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Índice sobre token_blacklist_blacklistedtoken.blacklisted_at para que la sincronización
+    incremental del filtro de Bloom (users/token_blacklist.py) lea solo las entradas recientes.
+    La tabla pertenece a simplejwt, por eso el índice se crea con SQL desde esta app.
+    """
+
+    dependencies = [
+        ('users', '0006_hot_query_indexes'),
+        ('token_blacklist', '0012_alter_outstandingtoken_user'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql=(
+                "CREATE INDEX IF NOT EXISTS token_blacklist_blacklistedtoken_blacklisted_at_idx "
+                "ON token_blacklist_blacklistedtoken (blacklisted_at)"
+            ),
+            reverse_sql="DROP INDEX IF EXISTS token_blacklist_blacklistedtoken_blacklisted_at_idx",
+        ),
+    ]
@@ -16,17 +16,25 @@ class Favorite(models.Model):
     {Ana Castro}
     """
 
-    user_id = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    # Sin índice propio: lo cubren favorites_user_recipe_uniq y favorites_user_created_idx.
+    user_id = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, db_index=False)
     recipe_id = models.ForeignKey(settings.AUTH_RECIPE_MODEL, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
-        db_table = 'favorites'
-
-    """
+        """
         Meta clase para definir metadatos del modelo Favorite.
         Esta clase define el nombre de la tabla en la base de datos.  
         Args:  
             db_table (str): Nombre de la tabla en la base de datos, en este caso 'favorites'.  
+            constraints (list): Un usuario solo puede marcar cada receta como favorita una vez.
+            indexes (list): Favoritos de un usuario del más reciente al más antiguo (paginación por cursor).
         """
+        db_table = 'favorites'
+        indexes = [
+            models.Index(fields=['user_id', '-created_at', '-id'], name='favorites_user_created_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['user_id', 'recipe_id'], name='favorites_user_recipe_uniq'),
+        ]
@@ -1,3 +1,3 @@
 from .userSerializer import CustomUserSerializer, CustomUserAdminUpdateSerializer, CustomUserUpdateSerializer, \
     CustomUserLoginSerializer, CustomUserAdminSerializer, CustomUserCreateSerializer
-from .favoriteSerializer import FavoriteSerializer, FavoriteAdminSerializer
+from .favoriteSerializer import FavoriteSerializer, FavoriteAdminSerializer, FavoriteCardSerializer
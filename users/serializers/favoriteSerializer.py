@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from users.models.favorite import Favorite
+from media.serializers.image_serializer import ImageListSerializer
 
 
 class FavoriteSerializer(serializers.ModelSerializer):
@@ -28,6 +29,33 @@ class FavoriteSerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
 
 
+class FavoriteCardSerializer(serializers.ModelSerializer):
+    """
+    Favorito con una tarjeta compacta de su receta, para la pantalla de favoritos.
+
+    La receta debe venir con `select_related('recipe_id')` y sus imágenes en el contexto como
+    `recipe_images` ({recipe_id: Image}), de modo que la lista no hace consultas por fila.
+    """
+    recipe = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Favorite
+        fields = ['id', 'recipe_id', 'created_at', 'recipe']
+        read_only_fields = fields
+
+    def get_recipe(self, obj):
+        recipe = obj.recipe_id
+        image = self.context.get('recipe_images', {}).get(recipe.id)
+        return {
+            'id': recipe.id,
+            'name': recipe.name,
+            'description': recipe.description,
+            'duration_minutes': recipe.duration_minutes,
+            'commensals': recipe.commensals,
+            'image': ImageListSerializer(image).data if image else None,
+        }
+
+
 class FavoriteAdminSerializer(serializers.ModelSerializer):
     """
     Serializer de Favorite de admin, representa las diferentes categorías asociadas a recetas e ingredientes.
@@ -1,4 +1,12 @@
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import (
+    TokenBlacklistSerializer,
+    TokenObtainPairSerializer,
+    TokenRefreshSerializer,
+)
+from rest_framework_simplejwt.settings import api_settings
+from users.authentication import get_user_snapshot
+from users.token_blacklist import BloomRefreshToken
 
 class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
     @classmethod
@@ -7,4 +15,36 @@ class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
         token['is_staff'] = user.is_staff
         token['is_superuser'] = user.is_superuser
         token['role'] = 'admin' if user.is_staff or user.is_superuser else 'user'
-        return token
\ No newline at end of file
+        return token
+
+
+class BloomTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Refresh que comprueba la blacklist con el filtro de Bloom y valida que el usuario siga
+    activo con la instantánea cacheada de `users.authentication`, sin cargar la fila completa.
+    """
+    token_class = BloomRefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs["refresh"])
+        user_id = refresh.payload.get(api_settings.USER_ID_CLAIM, None)
+        if user_id:
+            snapshot = get_user_snapshot(user_id)
+            if snapshot is None or not snapshot['is_active']:
+                raise AuthenticationFailed(self.error_messages["no_active_account"], "no_active_account")
+
+        data = {"access": str(refresh.access_token)}
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                refresh.blacklist()
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            refresh.outstand()
+            data["refresh"] = str(refresh)
+        return data
+
+
+class BloomTokenBlacklistSerializer(TokenBlacklistSerializer):
+    """Logout que además añade el token al filtro de Bloom del proceso."""
+    token_class = BloomRefreshToken
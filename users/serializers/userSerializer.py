@@ -2,6 +2,7 @@ from rest_framework import serializers
 from ..models.user import CustomUser
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from media.models.image import Image
 from media.serializers.image_serializer import ImageListSerializer
@@ -47,7 +48,11 @@ class CustomUserSerializer(serializers.ModelSerializer):
         read_only_fields = fields
 
     def get_image(self, obj):
-        image = Image.objects.filter(external_id=obj.id, type='USER').first()
+        # Quien serializa varios usuarios (o ya tiene la imagen) pasa {user_id: Image} en el contexto.
+        if 'user_images' in self.context:
+            image = self.context['user_images'].get(obj.id)
+        else:
+            image = Image.objects.filter(external_id=obj.id, type='USER').first()
         return ImageListSerializer(image).data if image else None
 
 
@@ -161,10 +166,16 @@ class CustomUserLoginSerializer(serializers.Serializer):
         user_input = data.get("username")
         password = data.get("password")
 
-        user_obj = CustomUser.objects.filter(email=user_input).first() or CustomUser.objects.filter(
-            username=user_input).first()
+        # Una sola consulta sobre los dos índices únicos; si el valor coincide con el email de un
+        # usuario y el username de otro, tiene prioridad el email, como antes.
+        candidates = list(CustomUser.objects.filter(Q(email=user_input) | Q(username=user_input))[:2])
+        user_obj = next((user for user in candidates if user.email == user_input), None) or (
+            candidates[0] if candidates else None)
 
-        if user_obj and user_obj.check_password(password):
+        if user_obj is None:
+            # Se calcula un hash igualmente para que el tiempo de respuesta no revele si el usuario existe.
+            CustomUser().set_password(password)
+        elif user_obj.check_password(password):
             if not user_obj.is_active:
                 raise serializers.ValidationError("Usuario inactivo.")
             data["user"] = user_obj
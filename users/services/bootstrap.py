@@ -0,0 +1,93 @@
+"""
+Datos de arranque de la app del usuario autenticado en un número fijo de consultas.
+
+    1. `load_bootstrap_state`: la fila del usuario con subconsultas escalares que resumen sus
+       favoritos, las recetas de esos favoritos, su lista de la compra y su avatar. Basta para
+       calcular el ETag, así que una sesión sin cambios responde 304 con esta única consulta.
+    2. El avatar, con `images_by_external_id`.
+    3. Los favoritos con el resumen de su receta (un JOIN).
+
+El ETag combina los `updated_at` máximos de cada tabla con los recuentos (para detectar
+borrados) y la URL y el estado del avatar (la tabla 'images' no tiene `updated_at`).
+"""
+import hashlib
+
+from django.db.models import Count, IntegerField, Max, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from media.models.image import Image
+from media.services.image_service import images_by_external_id
+from shopping.models.shoppingListItem import ShoppingListItem
+from users.models.favorite import Favorite
+from users.models.user import CustomUser
+from users.serializers.userSerializer import CustomUserSerializer
+
+FAVORITE_SUMMARY_FIELDS = ('id', 'name', 'description', 'duration_minutes', 'commensals', 'updated_at')
+ETAG_FIELDS = (
+    'updated_at',
+    'favorites_count',
+    'favorites_updated_at',
+    'favorite_recipes_updated_at',
+    'shopping_items_count',
+    'shopping_purchased_count',
+    'shopping_updated_at',
+    'avatar_url',
+    'avatar_status',
+)
+
+
+def _aggregate(queryset, expression):
+    """Subconsulta escalar con el agregado de `queryset` (filtrado por el usuario externo)."""
+    return Subquery(queryset.order_by().values('user_id').annotate(value=expression).values('value')[:1])
+
+
+def load_bootstrap_state(user_id):
+    """Devuelve el usuario anotado con los resúmenes de `ETAG_FIELDS`, o None si no existe."""
+    favorites = Favorite.objects.filter(user_id=OuterRef('pk'))
+    shopping_items = ShoppingListItem.objects.filter(user_id=OuterRef('pk'))
+    avatar = Image.objects.filter(type=Image.ImageType.USER, external_id=OuterRef('pk'))
+    return CustomUser.objects.filter(pk=user_id).annotate(
+        favorites_count=Coalesce(_aggregate(favorites, Count('id')), 0, output_field=IntegerField()),
+        favorites_updated_at=_aggregate(favorites, Max('updated_at')),
+        favorite_recipes_updated_at=_aggregate(favorites, Max('recipe_id__updated_at')),
+        shopping_items_count=Coalesce(_aggregate(shopping_items, Count('id')), 0, output_field=IntegerField()),
+        shopping_purchased_count=Coalesce(
+            _aggregate(shopping_items, Count('id', filter=Q(is_purchased=True))), 0, output_field=IntegerField()
+        ),
+        shopping_updated_at=_aggregate(shopping_items, Max('updated_at')),
+        avatar_url=Subquery(avatar.values('url')[:1]),
+        avatar_status=Subquery(avatar.values('processing_status')[:1]),
+    ).first()
+
+
+def bootstrap_etag(user):
+    """ETag débil calculado a partir de los campos anotados por `load_bootstrap_state`."""
+    state = '|'.join(str(getattr(user, field)) for field in ETAG_FIELDS)
+    return 'W/"%s"' % hashlib.blake2b(f'{user.pk}|{state}'.encode(), digest_size=16).hexdigest()
+
+
+def build_bootstrap_payload(user):
+    """Perfil, avatar, favoritos y resumen de la lista de la compra del usuario anotado."""
+    user_images = images_by_external_id(Image.ImageType.USER, [user.pk])
+    profile = CustomUserSerializer(user, context={'user_images': user_images}).data
+    favorites = [
+        {
+            'id': favorite['id'],
+            'recipe_id': favorite['recipe_id'],
+            'recipe': {name: favorite[f'recipe_id__{name}'] for name in FAVORITE_SUMMARY_FIELDS},
+        }
+        for favorite in Favorite.objects.filter(user_id=user.pk).order_by('-created_at').values(
+            'id', 'recipe_id', *(f'recipe_id__{name}' for name in FAVORITE_SUMMARY_FIELDS)
+        )
+    ]
+    return {
+        'profile': profile,
+        'image': profile['image'],
+        'favorite_recipe_ids': [favorite['recipe_id'] for favorite in favorites],
+        'favorites': favorites,
+        'shopping_list': {
+            'total': user.shopping_items_count,
+            'purchased': user.shopping_purchased_count,
+            'pending': user.shopping_items_count - user.shopping_purchased_count,
+        },
+    }
@@ -0,0 +1,53 @@
+"""
+Alta y baja idempotentes de favoritos.
+
+El índice único (user_id, recipe_id) garantiza una fila por par. El alta es un único
+`INSERT ... ON CONFLICT DO NOTHING RETURNING id`, así que un doble toque no crea duplicados ni
+falla, y solo se incrementa `RecipeStats.favorites_count` si la fila se ha insertado de verdad.
+"""
+from django.db import connection, transaction
+from django.utils import timezone
+
+from recipes.services.counters import record_favorite
+from users.models.favorite import Favorite
+
+
+def add_favorite(user_id, recipe_id):
+    """
+    Marca la receta como favorita del usuario.
+
+    Returns:
+        tuple: (Favorite, bool) el favorito y si se ha creado en esta llamada.
+    """
+    meta = Favorite._meta
+    columns = [meta.get_field(name).column for name in ('user_id', 'recipe_id', 'created_at', 'updated_at')]
+    now = timezone.now()
+    sql = (
+        f"INSERT INTO {connection.ops.quote_name(meta.db_table)} "
+        f"({', '.join(connection.ops.quote_name(column) for column in columns)}) "
+        f"VALUES (%s, %s, %s, %s) "
+        f"ON CONFLICT ({', '.join(connection.ops.quote_name(column) for column in columns[:2])}) DO NOTHING "
+        f"RETURNING {connection.ops.quote_name(meta.pk.column)}"
+    )
+    timestamp = meta.get_field('created_at').get_db_prep_value(now, connection)
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [user_id, recipe_id, timestamp, timestamp])
+            row = cursor.fetchone()
+        # El INSERT directo no emite post_save: el contador se actualiza aquí, solo si se insertó.
+        if row is not None:
+            record_favorite(recipe_id, 1)
+    if row is None:
+        return Favorite.objects.get(user_id=user_id, recipe_id=recipe_id), False
+    favorite = Favorite(pk=row[0], created_at=now, updated_at=now)
+    favorite.user_id_id, favorite.recipe_id_id = user_id, recipe_id
+    return favorite, True
+
+
+def remove_favorite(user_id, recipe_id):
+    """
+    Quita la receta de los favoritos del usuario. Devuelve True si existía.
+    El contador de la receta lo descuenta la señal post_delete.
+    """
+    deleted, _ = Favorite.objects.filter(user_id=user_id, recipe_id=recipe_id).delete()
+    return bool(deleted)
@@ -0,0 +1,232 @@
+"""
+Importación masiva de usuarios desde la plataforma anterior.
+
+`CustomUserManager.create_user` hashea e inserta los usuarios de uno en uno. Aquí se procesan
+por lotes:
+
+    1. Se leen los registros en streaming (CSV con cabecera o NDJSON, un objeto por línea).
+    2. Se validan los campos obligatorios y la unicidad de `username` y `email`, tanto dentro
+       del archivo como contra la tabla 'users' (dos consultas `IN` por lote).
+    3. Las contraseñas en claro se hashean en un pool de procesos; las que llegan ya hasheadas
+       (`password_hash`, en un formato que reconozca `PASSWORD_HASHERS`) se usan tal cual.
+    4. Se insertan con `bulk_create`. Si el lote choca con una fila insertada entre la validación
+       y la inserción, se reintenta fila a fila y solo se descartan las conflictivas.
+
+Los registros descartados se devuelven como `ImportConflict` y no interrumpen la importación.
+"""
+import csv
+import json
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.contrib.auth.hashers import identify_hasher, make_password
+from django.contrib.auth.models import BaseUserManager
+from django.db import IntegrityError, transaction
+
+from users.models.user import CustomUser
+
+REQUIRED_FIELDS = ('username', 'email', 'name', 'surname')
+LIMITED_FIELDS = ('username', 'email', 'name', 'surname', 'second_surname', 'biography')
+
+ImportConflict = namedtuple('ImportConflict', ['line', 'username', 'email', 'reason'])
+
+
+def iter_records(stream, file_format):
+    """
+    Genera (número de línea, dict) desde un stream de texto. `file_format` es 'csv' o 'ndjson'.
+    Las líneas NDJSON mal formadas se devuelven como dict vacío para que se informen como conflicto.
+    """
+    if file_format == 'csv':
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, record
+        return
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            record = {}
+        yield line_number, record if isinstance(record, dict) else {}
+
+
+def open_records(path, file_format=None):
+    """Abre el archivo y devuelve (stream, formato), deduciendo el formato por la extensión."""
+    if file_format is None:
+        file_format = 'csv' if path.lower().endswith('.csv') else 'ndjson'
+    return open(path, encoding='utf-8', newline=''), file_format
+
+
+def _parse_bool(value, default):
+    if value in (None, ''):
+        return default
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ('1', 'true', 'yes', 'si', 'sí')
+
+
+def _init_hash_worker(settings_module):
+    """Inicializador del pool: los procesos hijos necesitan Django configurado para hashear."""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    django.setup()
+
+
+class UserImporter:
+    """
+    Importa usuarios por lotes.
+
+    Args:
+        batch_size (int): Registros validados, hasheados e insertados por lote.
+        workers (int): Procesos para hashear. Con 0 se hashea en el proceso actual.
+        dry_run (bool): Valida y cuenta sin hashear ni insertar.
+    """
+
+    def __init__(self, batch_size=1000, workers=None, dry_run=False):
+        self.batch_size = batch_size
+        self.workers = os.cpu_count() if workers is None else workers
+        self.dry_run = dry_run
+        self.validated = 0
+        self.created = 0
+        self.conflicts = []
+        self._seen_usernames = set()
+        self._seen_emails = set()
+        self._executor = None
+
+    def __enter__(self):
+        if self.workers and not self.dry_run:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_hash_worker,
+                initargs=(os.environ.get('DJANGO_SETTINGS_MODULE', 'config.settings'),),
+            )
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def run(self, records):
+        """Procesa un iterable de (línea, dict). Devuelve el número de usuarios creados."""
+        batch = []
+        for line, record in records:
+            batch.append((line, record))
+            if len(batch) >= self.batch_size:
+                self.import_batch(batch)
+                batch = []
+        if batch:
+            self.import_batch(batch)
+        return self.created
+
+    def conflict(self, line, record, reason):
+        self.conflicts.append(ImportConflict(line, record.get('username') or '', record.get('email') or '', reason))
+
+    def import_batch(self, batch):
+        valid = self.validate(batch)
+        self.validated += len(valid)
+        if not valid or self.dry_run:
+            return
+        users = self.build_users(valid)
+        self.insert(list(zip([line for line, _ in valid], users)))
+
+    def validate(self, batch):
+        """Descarta los registros incompletos o duplicados y devuelve [(línea, datos normalizados)]."""
+        candidates = []
+        for line, record in batch:
+            if not record:
+                self.conflict(line, {}, 'registro ilegible')
+                continue
+            data = {name: str(record.get(name) or '').strip() for name in REQUIRED_FIELDS}
+            missing = [name for name in REQUIRED_FIELDS if not data[name]]
+            if missing:
+                self.conflict(line, record, f"faltan campos: {', '.join(missing)}")
+                continue
+            data['email'] = BaseUserManager.normalize_email(data['email'])
+            data['second_surname'] = str(record.get('second_surname') or '').strip()
+            data['biography'] = record.get('biography') or None
+            too_long = [
+                name for name in LIMITED_FIELDS
+                if data[name] and len(data[name]) > CustomUser._meta.get_field(name).max_length
+            ]
+            if too_long:
+                self.conflict(line, record, f"campos demasiado largos: {', '.join(too_long)}")
+                continue
+            data['is_active'] = _parse_bool(record.get('is_active'), True)
+            data['is_staff'] = _parse_bool(record.get('is_staff'), False)
+            password_hash = record.get('password_hash')
+            if password_hash:
+                try:
+                    identify_hasher(password_hash)
+                except ValueError:
+                    self.conflict(line, record, 'password_hash con formato desconocido')
+                    continue
+            data['password_hash'] = password_hash or None
+            data['password'] = record.get('password') or None
+            candidates.append((line, data))
+
+        usernames = {data['username'] for _, data in candidates}
+        emails = {data['email'] for _, data in candidates}
+        taken_usernames = set(CustomUser.objects.filter(username__in=usernames).values_list('username', flat=True))
+        taken_emails = set(CustomUser.objects.filter(email__in=emails).values_list('email', flat=True))
+
+        valid = []
+        for line, data in candidates:
+            if data['username'] in taken_usernames:
+                self.conflict(line, data, 'username ya existe')
+            elif data['email'] in taken_emails:
+                self.conflict(line, data, 'email ya existe')
+            elif data['username'] in self._seen_usernames:
+                self.conflict(line, data, 'username duplicado en el archivo')
+            elif data['email'] in self._seen_emails:
+                self.conflict(line, data, 'email duplicado en el archivo')
+            else:
+                self._seen_usernames.add(data['username'])
+                self._seen_emails.add(data['email'])
+                valid.append((line, data))
+        return valid
+
+    def hash_passwords(self, passwords):
+        """Hashea la lista en el pool (o en el proceso si no hay). `None` da una contraseña inutilizable."""
+        if self._executor is None or len(passwords) < 2:
+            return [make_password(password) for password in passwords]
+        chunksize = max(1, len(passwords) // (self.workers * 4))
+        return list(self._executor.map(make_password, passwords, chunksize=chunksize))
+
+    def build_users(self, valid):
+        to_hash = [data['password'] for _, data in valid if not data['password_hash']]
+        hashed = iter(self.hash_passwords(to_hash))
+        users = []
+        for _, data in valid:
+            users.append(CustomUser(
+                username=data['username'],
+                email=data['email'],
+                name=data['name'],
+                surname=data['surname'],
+                second_surname=data['second_surname'],
+                biography=data['biography'],
+                is_active=data['is_active'],
+                is_staff=data['is_staff'],
+                password=data['password_hash'] or next(hashed),
+            ))
+        return users
+
+    def insert(self, rows):
+        """Inserta el lote entero; si otra escritura se adelantó, repite fila a fila con savepoints."""
+        try:
+            with transaction.atomic():
+                CustomUser.objects.bulk_create([user for _, user in rows])
+            self.created += len(rows)
+            return
+        except IntegrityError:
+            pass
+        for line, user in rows:
+            try:
+                with transaction.atomic():
+                    user.save(force_insert=True)
+                self.created += 1
+            except IntegrityError:
+                user.pk = None
+                self.conflict(line, {'username': user.username, 'email': user.email}, 'username o email ya existe')
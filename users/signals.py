@@ -0,0 +1,47 @@
+import threading
+
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from users.authentication import user_snapshots
+from users.models.favorite import Favorite
+from recipes.models.recipe import Recipe
+from recipes.services.counters import record_favorite
+
+# Recetas que se están borrando en este hilo: sus favoritos caen en cascada y no deben contarse
+# (los contadores se borran con la receta y recrearlos rompería la clave foránea).
+_deleting_recipes = threading.local()
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def invalidate_user_snapshot(sender, instance, **kwargs):
+    """Descarta la instantánea cacheada del usuario para que la siguiente petición la relea."""
+    user_snapshots.invalidate(instance.pk)
+
+
+@receiver(post_save, sender=Favorite)
+def count_created_favorite(sender, instance, created, **kwargs):
+    """Mantiene `RecipeStats.favorites_count` al crear favoritos con el ORM (add_favorite lo hace él mismo)."""
+    if created:
+        record_favorite(instance.recipe_id_id, 1)
+
+
+@receiver(post_delete, sender=Favorite)
+def count_deleted_favorite(sender, instance, **kwargs):
+    if instance.recipe_id_id in getattr(_deleting_recipes, 'ids', ()):
+        return
+    record_favorite(instance.recipe_id_id, -1)
+
+
+@receiver(pre_delete, sender=Recipe)
+def mark_recipe_deleting(sender, instance, **kwargs):
+    # El Collector envía pre_delete de la receta antes de borrar sus favoritos y post_delete después.
+    if not hasattr(_deleting_recipes, 'ids'):
+        _deleting_recipes.ids = set()
+    _deleting_recipes.ids.add(instance.pk)
+
+
+@receiver(post_delete, sender=Recipe)
+def unmark_recipe_deleting(sender, instance, **kwargs):
+    getattr(_deleting_recipes, 'ids', set()).discard(instance.pk)
@@ -0,0 +1,64 @@
+import pytest
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import AccessToken
+
+from users.authentication import CachedJWTAuthentication, user_snapshots
+
+
+@pytest.fixture(autouse=True)
+def clear_snapshots():
+    user_snapshots.clear()
+    yield
+    user_snapshots.clear()
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+@pytest.mark.users_app
+class TestCachedJWTAuthentication:
+    """
+    Tests for the JWT authentication class backed by cached user snapshots.
+    """
+
+    def test_second_request_skips_users_table(self, test_user, django_assert_num_queries):
+        token = AccessToken.for_user(test_user)
+        authentication = CachedJWTAuthentication()
+
+        with django_assert_num_queries(1):
+            authentication.get_user(token)
+        with django_assert_num_queries(0):
+            user = authentication.get_user(token)
+
+        assert user.pk == test_user.pk
+        assert user.username == test_user.username
+        assert user.is_staff is False
+
+    def test_deferred_fields_load_on_access(self, test_user, django_assert_num_queries):
+        user = CachedJWTAuthentication().get_user(AccessToken.for_user(test_user))
+
+        with django_assert_num_queries(1):
+            assert user.email == test_user.email
+
+    def test_user_save_invalidates_snapshot(self, test_user):
+        token = AccessToken.for_user(test_user)
+        authentication = CachedJWTAuthentication()
+        authentication.get_user(token)
+
+        test_user.is_staff = True
+        test_user.save()
+        assert authentication.get_user(token).is_staff is True
+
+        test_user.is_active = False
+        test_user.save()
+        with pytest.raises(AuthenticationFailed):
+            authentication.get_user(token)
+
+    def test_profile_me_returns_full_profile(self, test_user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(test_user)}')
+
+        response = client.get('/api/users/me/')
+
+        assert response.status_code == 200
+        assert response.data['email'] == test_user.email
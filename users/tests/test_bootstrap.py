@@ -0,0 +1,98 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from model_bakery import baker
+from rest_framework.test import APIClient
+
+from media.models.image import Image
+from recipes.models.recipe import Recipe
+from shopping.models.shoppingListItem import ShoppingListItem
+from users.models.favorite import Favorite
+
+BOOTSTRAP_URL = '/api/me/bootstrap/'
+
+
+@pytest.fixture
+def client(test_user):
+    client = APIClient()
+    client.force_authenticate(test_user)
+    return client
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+@pytest.mark.users_app
+class TestUserBootstrap:
+    """
+    Tests for the aggregated /api/me/bootstrap/ endpoint.
+    """
+
+    def make_state(self, user, favorites=2, items=3, avatar=True):
+        for index in range(favorites):
+            recipe = baker.make(Recipe, name=f'Recipe {index}', user_id=user, duration_minutes=10, commensals=2)
+            Favorite.objects.create(user_id=user, recipe_id=recipe)
+        for index in range(items):
+            baker.make(ShoppingListItem, user_id=user, is_purchased=index == 0)
+        if avatar:
+            baker.make(Image, type='USER', external_id=user.id, url='avatar.webp', processing_status='COMPLETED')
+
+    def test_returns_profile_avatar_favorites_and_shopping_counts(self, client, test_user):
+        self.make_state(test_user)
+        response = client.get(BOOTSTRAP_URL)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data['profile']['username'] == test_user.username
+        assert data['image']['url'] == 'avatar.webp'
+        assert data['profile']['image'] == data['image']
+        assert len(data['favorite_recipe_ids']) == 2
+        assert {favorite['recipe']['name'] for favorite in data['favorites']} == {'Recipe 0', 'Recipe 1'}
+        assert data['shopping_list'] == {'total': 3, 'purchased': 1, 'pending': 2}
+        assert response['ETag'].startswith('W/"')
+
+    def test_query_count_does_not_grow_with_data(self, client, test_user):
+        self.make_state(test_user, favorites=1, items=2)
+        with CaptureQueriesContext(connection) as few:
+            client.get(BOOTSTRAP_URL)
+        self.make_state(test_user, favorites=10, items=10, avatar=False)
+        with CaptureQueriesContext(connection) as many:
+            client.get(BOOTSTRAP_URL)
+        assert len(few.captured_queries) == len(many.captured_queries) == 3
+
+    def test_unchanged_session_gets_304_with_one_query(self, client, test_user):
+        self.make_state(test_user)
+        etag = client.get(BOOTSTRAP_URL)['ETag']
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(BOOTSTRAP_URL, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+        assert response['ETag'] == etag
+        assert len(queries.captured_queries) == 1
+
+    def test_etag_changes_when_any_section_changes(self, client, test_user):
+        self.make_state(test_user)
+        etags = [client.get(BOOTSTRAP_URL)['ETag']]
+
+        Favorite.objects.filter(user_id=test_user).first().delete()
+        etags.append(client.get(BOOTSTRAP_URL)['ETag'])
+        item = ShoppingListItem.objects.filter(user_id=test_user, is_purchased=False).first()
+        item.is_purchased = True
+        item.save()
+        etags.append(client.get(BOOTSTRAP_URL)['ETag'])
+        Image.objects.filter(type='USER', external_id=test_user.id).update(url='new-avatar.webp')
+        etags.append(client.get(BOOTSTRAP_URL)['ETag'])
+        test_user.biography = 'Nueva biografía'
+        test_user.save()
+        etags.append(client.get(BOOTSTRAP_URL)['ETag'])
+
+        assert len(set(etags)) == len(etags)
+        response = client.get(BOOTSTRAP_URL, HTTP_IF_NONE_MATCH=etags[0])
+        assert response.status_code == 200
+
+    def test_user_without_data(self, client):
+        data = client.get(BOOTSTRAP_URL).json()
+        assert data['image'] is None
+        assert data['favorites'] == [] and data['favorite_recipe_ids'] == []
+        assert data['shopping_list'] == {'total': 0, 'purchased': 0, 'pending': 0}
+
+    def test_requires_authentication(self):
+        assert APIClient().get(BOOTSTRAP_URL).status_code == 401
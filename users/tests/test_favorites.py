@@ -0,0 +1,96 @@
+import pytest
+from django.db import IntegrityError, connection, transaction
+from django.test.utils import CaptureQueriesContext
+from model_bakery import baker
+from rest_framework.test import APIClient
+
+from media.models.image import Image
+from recipes.models.recipe import Recipe
+from users.models.favorite import Favorite
+from users.services.favorites import add_favorite, remove_favorite
+
+
+@pytest.fixture
+def client(test_user):
+    client = APIClient()
+    client.force_authenticate(test_user)
+    return client
+
+
+def make_recipes(user, count):
+    recipes = baker.make(Recipe, user_id=user, duration_minutes=10, commensals=2, _quantity=count)
+    for recipe in recipes:
+        baker.make(Image, type='RECIPE', external_id=recipe.id, url=f'recipe-{recipe.id}.webp')
+    return recipes
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+@pytest.mark.users_app
+class TestFavorites:
+    """
+    Tests for the unique favorites constraint, idempotent toggling and embedded recipe cards.
+    """
+
+    def test_constraint_rejects_duplicates(self, test_user, test_recipe):
+        Favorite.objects.create(user_id=test_user, recipe_id=test_recipe)
+        with pytest.raises(IntegrityError), transaction.atomic():
+            Favorite.objects.create(user_id=test_user, recipe_id=test_recipe)
+
+    def test_add_favorite_is_idempotent(self, test_user, test_recipe):
+        first, created = add_favorite(test_user.id, test_recipe.id)
+        again, created_again = add_favorite(test_user.id, test_recipe.id)
+        assert created and not created_again
+        assert first.pk == again.pk
+        assert Favorite.objects.filter(user_id=test_user).count() == 1
+        assert remove_favorite(test_user.id, test_recipe.id)
+        assert not remove_favorite(test_user.id, test_recipe.id)
+
+    def test_put_and_delete_toggle(self, client, test_user, test_recipe):
+        url = f'/api/favorites/recipes/{test_recipe.id}/'
+        assert client.put(url).status_code == 201
+        response = client.put(url)
+        assert response.status_code == 200 and response.json()['is_favorited']
+        assert Favorite.objects.filter(user_id=test_user).count() == 1
+        assert client.delete(url).status_code == 204
+        assert client.delete(url).status_code == 204
+        assert not Favorite.objects.exists()
+
+    def test_put_unknown_recipe_returns_404(self, client):
+        assert client.put('/api/favorites/recipes/999999/').status_code == 404
+
+    def test_create_does_not_duplicate(self, client, test_user, test_recipe, another_custom_user):
+        payload = {'recipe_id': test_recipe.id, 'user_id': another_custom_user.id}
+        assert client.post('/api/favorites/', payload, format='json').status_code == 201
+        assert client.post('/api/favorites/', payload, format='json').status_code == 200
+        favorite = Favorite.objects.get()
+        assert favorite.user_id == test_user
+
+    def test_plain_list_is_unchanged(self, client, test_user, test_recipe):
+        add_favorite(test_user.id, test_recipe.id)
+        data = client.get('/api/favorites/').json()
+        assert data == [{'id': data[0]['id'], 'user_id': test_user.id, 'recipe_id': test_recipe.id}]
+
+    def test_embedded_cards_are_paginated_by_cursor(self, client, test_user):
+        recipes = make_recipes(test_user, 5)
+        for recipe in recipes:
+            add_favorite(test_user.id, recipe.id)
+
+        page = client.get('/api/favorites/', {'embed': 'recipe', 'page_size': 3}).json()
+        assert len(page['results']) == 3
+        assert page['results'][0]['recipe']['image']['url'] == f"recipe-{page['results'][0]['recipe_id']}.webp"
+        rest = client.get(page['next']).json()
+        assert rest['next'] is None
+        ids = [card['recipe_id'] for card in page['results'] + rest['results']]
+        assert ids == [recipe.id for recipe in reversed(recipes)]
+
+    def test_embedded_cards_query_count_is_constant(self, client, test_user):
+        for recipe in make_recipes(test_user, 2):
+            add_favorite(test_user.id, recipe.id)
+        with CaptureQueriesContext(connection) as few:
+            client.get('/api/favorites/', {'embed': 'recipe'})
+        for recipe in make_recipes(test_user, 8):
+            add_favorite(test_user.id, recipe.id)
+        with CaptureQueriesContext(connection) as many:
+            client.get('/api/favorites/', {'embed': 'recipe'})
+        assert len(few.captured_queries) == len(many.captured_queries)
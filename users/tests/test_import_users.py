@@ -0,0 +1,108 @@
+import csv
+import io
+import json
+
+import pytest
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+
+from users.models.user import CustomUser
+from users.services.user_import import UserImporter
+
+
+def write_ndjson(path, records):
+    path.write_text('\n'.join(json.dumps(record) for record in records) + '\n', encoding='utf-8')
+    return str(path)
+
+
+def record(index, **overrides):
+    return {
+        'username': f'legacy{index}',
+        'email': f'legacy{index}@example.com',
+        'name': 'Legacy',
+        'surname': 'User',
+        'password': f'LegacyPassword{index}!',
+        **overrides,
+    }
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+@pytest.mark.users_app
+class TestImportUsers:
+    """
+    Tests for the bulk import_users command and the UserImporter service.
+    """
+
+    def test_imports_csv_with_usable_passwords(self, tmp_path):
+        path = tmp_path / 'users.csv'
+        with open(path, 'w', newline='', encoding='utf-8') as handle:
+            writer = csv.DictWriter(handle, fieldnames=['username', 'email', 'name', 'surname', 'password', 'is_staff'])
+            writer.writeheader()
+            writer.writerow({**record(1), 'is_staff': 'true'})
+            writer.writerow({**record(2), 'is_staff': ''})
+        out = io.StringIO()
+        call_command('import_users', str(path), '--workers', '0', stdout=out)
+
+        assert '2 usuarios creados' in out.getvalue()
+        first = CustomUser.objects.get(username='legacy1')
+        assert first.is_staff and first.check_password('LegacyPassword1!')
+        assert not CustomUser.objects.get(username='legacy2').is_staff
+
+    def test_accepts_prehashed_passwords(self, tmp_path):
+        hashed = make_password('AlreadyHashed1!')
+        path = write_ndjson(tmp_path / 'users.ndjson', [record(1, password=None, password_hash=hashed)])
+        call_command('import_users', path, '--workers', '0', stdout=io.StringIO())
+
+        user = CustomUser.objects.get(username='legacy1')
+        assert user.password == hashed
+        assert user.check_password('AlreadyHashed1!')
+
+    def test_reports_conflicts_without_aborting(self, tmp_path, test_user):
+        records = [
+            record(1),
+            record(2, username=test_user.username),
+            record(3, email=test_user.email),
+            record(4, username='legacy1'),
+            record(5, name=''),
+            record(6, password_hash='not-a-hash'),
+            record(7),
+            record(8, username='legacy7'),
+        ]
+        path = write_ndjson(tmp_path / 'users.ndjson', records)
+        report = tmp_path / 'report.csv'
+        call_command('import_users', path, '--workers', '0', '--batch-size', '3', '--report', str(report), stdout=io.StringIO())
+
+        assert set(CustomUser.objects.filter(username__startswith='legacy').values_list('username', flat=True)) == {'legacy1', 'legacy7'}
+        rows = list(csv.DictReader(report.open(encoding='utf-8')))
+        assert [(row['line'], row['reason']) for row in rows] == [
+            ('2', 'username ya existe'),
+            ('3', 'email ya existe'),
+            ('4', 'username ya existe'),
+            ('5', 'faltan campos: name'),
+            ('6', 'password_hash con formato desconocido'),
+            ('8', 'username duplicado en el archivo'),
+        ]
+
+    def test_dry_run_does_not_insert(self, tmp_path):
+        path = write_ndjson(tmp_path / 'users.ndjson', [record(1), record(2)])
+        out = io.StringIO()
+        call_command('import_users', path, '--dry-run', stdout=out)
+        assert '2 usuarios válidos' in out.getvalue()
+        assert not CustomUser.objects.filter(username__startswith='legacy').exists()
+
+    def test_batch_falls_back_to_row_inserts_on_race(self, test_user):
+        """Una fila insertada tras la validación solo descarta ese usuario, no el lote."""
+        importer = UserImporter(batch_size=10, workers=0)
+        valid = importer.validate([(1, record(1)), (2, record(2))])
+        CustomUser.objects.create_user('legacy2', 'other@example.com', 'x', name='A', surname='B')
+        importer.insert(list(zip([1, 2], importer.build_users(valid))))
+
+        assert importer.created == 1
+        assert [conflict.line for conflict in importer.conflicts] == [2]
+        assert CustomUser.objects.filter(username='legacy1').exists()
+
+    def test_hashes_on_process_pool(self):
+        with UserImporter(workers=2) as importer:
+            hashed = importer.hash_passwords(['first-password', 'second-password'])
+        assert hashed[0].startswith('argon2$') and hashed[0] != hashed[1]
@@ -0,0 +1,109 @@
+import io
+import json
+import time
+
+import pytest
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from users.hashers import ARGON2_MINIMUM, get_argon2_parameters
+from users.models.user import CustomUser
+from users.serializers.userSerializer import CustomUserLoginSerializer
+
+
+def login(username, password):
+    serializer = CustomUserLoginSerializer(data={'username': username, 'password': password})
+    return serializer.is_valid(), serializer
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+@pytest.mark.users_app
+class TestLoginPath:
+    """
+    Tests for the single-query login lookup, the calibrated Argon2 hasher and rehash on login.
+    """
+
+    def test_email_or_username_in_one_query(self, test_user, django_assert_num_queries):
+        for identifier in (test_user.email, test_user.username):
+            with django_assert_num_queries(1):
+                valid, serializer = login(identifier, test_user.plain_password)
+            assert valid
+            assert serializer.validated_data['user'].pk == test_user.pk
+
+    def test_email_takes_priority_over_username(self, test_user, another_custom_user):
+        CustomUser.objects.filter(pk=another_custom_user.pk).update(username=test_user.email)
+
+        valid, serializer = login(test_user.email, test_user.plain_password)
+
+        assert valid
+        assert serializer.validated_data['user'].pk == test_user.pk
+
+    def test_unknown_user_is_rejected(self, db):
+        valid, serializer = login('nobody', 'whatever')
+        assert not valid
+
+    def test_hasher_uses_argon2_defaults(self, test_user, settings):
+        settings.ARGON2_CALIBRATION_FILE = None
+        params = get_argon2_parameters()
+
+        assert params == settings.ARGON2_DEFAULTS
+        assert f"m={params['memory_cost']},t={params['time_cost']},p={params['parallelism']}" in test_user.password
+
+    def test_legacy_hash_is_rehashed_on_login(self, test_user):
+        test_user.password = make_password(test_user.plain_password, hasher='pbkdf2_sha256')
+        test_user.save(update_fields=['password'])
+
+        assert login(test_user.username, test_user.plain_password)[0]
+
+        test_user.refresh_from_db()
+        assert test_user.password.startswith('argon2$')
+
+    def test_calibration_file_changes_parameters_and_rehashes(self, test_user, settings, tmp_path):
+        calibration = tmp_path / 'argon2.json'
+        call_command('calibrate_hasher', '--target-ms', '1', '--samples', '1', '--parallelism', '2',
+                     '--output', str(calibration), stdout=io.StringIO())
+        settings.ARGON2_CALIBRATION_FILE = str(calibration)
+        params = json.loads(calibration.read_text())
+
+        assert login(test_user.username, test_user.plain_password)[0]
+
+        test_user.refresh_from_db()
+        assert get_argon2_parameters() == params
+        assert f"m={params['memory_cost']},t={params['time_cost']},p=2" in test_user.password
+        assert params['memory_cost'] == ARGON2_MINIMUM['memory_cost']
+        assert params['time_cost'] >= ARGON2_MINIMUM['time_cost']
+
+    def test_parameters_below_the_minimum_are_raised(self, settings, tmp_path):
+        calibration = tmp_path / 'argon2.json'
+        calibration.write_text(json.dumps({'time_cost': 1, 'memory_cost': 1024, 'parallelism': 2}))
+        settings.ARGON2_DEFAULTS = {'time_cost': 1, 'memory_cost': 4096, 'parallelism': 2}
+
+        settings.ARGON2_CALIBRATION_FILE = None
+        assert get_argon2_parameters() == {**ARGON2_MINIMUM, 'parallelism': 2}
+        settings.ARGON2_CALIBRATION_FILE = str(calibration)
+        assert get_argon2_parameters() == {**ARGON2_MINIMUM, 'parallelism': 2}
+
+    def test_calibration_rejects_memory_below_the_minimum(self):
+        with pytest.raises(CommandError):
+            call_command('calibrate_hasher', '--memory-cost', '1024', '--dry-run', stdout=io.StringIO())
+
+
+@pytest.mark.django_db
+@pytest.mark.slow
+@pytest.mark.users_app
+class TestLoginBenchmark:
+    """
+    Login throughput per core with the current hasher parameters.
+    Run with `pytest -m slow users/tests/test_login.py -s`.
+    """
+
+    def test_login_throughput(self, test_user):
+        rounds = 50
+        started = time.perf_counter()
+        for _ in range(rounds):
+            assert login(test_user.username, test_user.plain_password)[0]
+        elapsed = time.perf_counter() - started
+
+        print(f"\nlogin: {rounds / elapsed:.1f} logins/s por núcleo ({elapsed / rounds * 1000:.1f} ms por login)")
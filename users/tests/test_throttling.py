@@ -0,0 +1,171 @@
+import pytest
+from django.core.cache import cache
+from rest_framework.parsers import MultiPartParser
+from rest_framework.test import APIClient
+
+from api.throttling import LocalTokenBucket, local_buckets
+
+
+@pytest.fixture
+def throttle_rates(settings):
+    """Sustituye las tasas de throttling por unas pequeñas para los tests."""
+    def apply(**rates):
+        settings.REST_FRAMEWORK = {**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': rates}
+    return apply
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+@pytest.mark.users_app
+class TestExpensiveEndpointThrottling:
+    """
+    Tests for the per-user, per-IP and per-scope throttles on login, registration and uploads.
+    """
+
+    def login(self, client, user, password=None):
+        return client.post('/api/login/', {'username': user.username, 'password': password or user.plain_password}, format='json')
+
+    def test_login_is_limited_per_ip(self, test_user, throttle_rates):
+        throttle_rates(login_ip='3/min')
+        client = APIClient()
+        assert [self.login(client, test_user).status_code for _ in range(3)] == [200, 200, 200]
+        response = self.login(client, test_user)
+        assert response.status_code == 429
+        assert int(response['Retry-After']) > 0
+
+    def test_other_ips_are_not_affected(self, test_user, throttle_rates):
+        throttle_rates(login_ip='1/min')
+        assert self.login(APIClient(REMOTE_ADDR='10.0.0.1'), test_user).status_code == 200
+        assert self.login(APIClient(REMOTE_ADDR='10.0.0.1'), test_user).status_code == 429
+        assert self.login(APIClient(REMOTE_ADDR='10.0.0.2'), test_user).status_code == 200
+
+    def test_scope_limit_is_shared_by_all_clients(self, test_user, throttle_rates):
+        throttle_rates(login_global='2/min')
+        assert self.login(APIClient(REMOTE_ADDR='10.0.0.1'), test_user).status_code == 200
+        assert self.login(APIClient(REMOTE_ADDR='10.0.0.2'), test_user).status_code == 200
+        assert self.login(APIClient(REMOTE_ADDR='10.0.0.3'), test_user).status_code == 429
+
+    def test_requests_rejected_per_ip_do_not_use_the_scope_limit(self, test_user, throttle_rates):
+        throttle_rates(login_ip='1/min', login_global='3/min')
+        abuser = APIClient(REMOTE_ADDR='10.0.0.1')
+        assert [self.login(abuser, test_user).status_code for _ in range(3)] == [200, 429, 429]
+        assert self.login(APIClient(REMOTE_ADDR='10.0.0.2'), test_user).status_code == 200
+        assert self.login(APIClient(REMOTE_ADDR='10.0.0.3'), test_user).status_code == 200
+        assert self.login(APIClient(REMOTE_ADDR='10.0.0.4'), test_user).status_code == 429
+
+    def test_forwarded_for_header_cannot_change_the_ip(self, test_user, throttle_rates):
+        throttle_rates(login_ip='1/min')
+        assert self.login(APIClient(HTTP_X_FORWARDED_FOR='1.1.1.1'), test_user).status_code == 200
+        assert self.login(APIClient(HTTP_X_FORWARDED_FOR='2.2.2.2'), test_user).status_code == 429
+
+    def test_scopes_without_rate_are_not_limited(self, test_user, throttle_rates):
+        throttle_rates()
+        client = APIClient()
+        assert all(self.login(client, test_user).status_code == 200 for _ in range(5))
+
+    def test_registration_is_limited(self, test_user_data, throttle_rates):
+        throttle_rates(register_ip='1/hour')
+        client = APIClient()
+        assert client.post('/api/register/', test_user_data, format='json').status_code == 201
+        other = {**test_user_data, 'username': 'second', 'email': 'second@example.com'}
+        assert client.post('/api/register/', other, format='json').status_code == 429
+
+    def test_shared_counter_rejects_when_local_bucket_has_tokens(self, test_user, throttle_rates):
+        """Otro proceso ya consumió el cupo: el bucket local deja pasar, el contador compartido no."""
+        throttle_rates(login_ip='2/min')
+        client = APIClient()
+        assert self.login(client, test_user).status_code == 200
+        local_buckets.clear()
+        assert self.login(client, test_user).status_code == 200
+        local_buckets.clear()
+        assert self.login(client, test_user).status_code == 429
+
+    def test_token_endpoint_shares_the_login_limit(self, test_user, throttle_rates):
+        throttle_rates(login_ip='2/min')
+        client = APIClient()
+        credentials = {'username': test_user.username, 'password': test_user.plain_password}
+        assert self.login(client, test_user).status_code == 200
+        assert client.post('/api/token/', credentials, format='json').status_code == 200
+        assert client.post('/api/token/', credentials, format='json').status_code == 429
+
+    def test_window_lost_by_the_cache_starts_a_new_one(self, test_user, throttle_rates, monkeypatch):
+        throttle_rates(login_ip='1/min')
+        client = APIClient()
+        original_incr, original_decr = cache.incr, cache.decr
+
+        def incr_after_eviction(key, *args, **kwargs):
+            monkeypatch.setattr(cache, 'incr', original_incr)
+            cache.delete(key)
+            return original_incr(key, *args, **kwargs)
+
+        def decr_after_eviction(key, *args, **kwargs):
+            cache.delete(key)
+            return original_decr(key, *args, **kwargs)
+
+        monkeypatch.setattr(cache, 'incr', incr_after_eviction)
+        assert self.login(client, test_user).status_code == 200
+        local_buckets.clear()
+        monkeypatch.setattr(cache, 'decr', decr_after_eviction)
+        assert self.login(client, test_user).status_code == 429
+
+    def test_local_fast_path_rejects_without_cache(self, test_user, throttle_rates, monkeypatch):
+        throttle_rates(login_ip='1/min')
+        client = APIClient()
+        assert self.login(client, test_user).status_code == 200
+
+        def fail(*args, **kwargs):
+            raise AssertionError("El rechazo local no debe consultar el cache compartido.")
+        monkeypatch.setattr(cache, 'incr', fail)
+        assert self.login(client, test_user).status_code == 429
+
+    def test_upload_is_rejected_before_parsing_multipart(self, test_user, throttle_rates, monkeypatch):
+        throttle_rates(upload_user='1/min')
+        client = APIClient()
+        client.force_authenticate(test_user)
+        # La primera petición llega a la vista: sin archivo responde 400.
+        assert client.put('/api/users/me/image/', {}, format='multipart').status_code == 400
+
+        def fail(*args, **kwargs):
+            raise AssertionError("Una petición limitada no debe parsear el cuerpo.")
+        monkeypatch.setattr(MultiPartParser, 'parse', fail)
+        assert client.put('/api/users/me/image/', {}, format='multipart').status_code == 429
+
+    def test_upload_limit_is_per_user(self, test_user, another_custom_user, throttle_rates):
+        throttle_rates(upload_user='1/min')
+        first, second = APIClient(), APIClient()
+        first.force_authenticate(test_user)
+        second.force_authenticate(another_custom_user)
+        assert first.put('/api/users/me/image/', {}, format='multipart').status_code == 400
+        assert first.put('/api/users/me/image/', {}, format='multipart').status_code == 429
+        assert second.put('/api/users/me/image/', {}, format='multipart').status_code == 400
+
+    def test_only_expensive_actions_are_limited(self, test_user, throttle_rates):
+        throttle_rates(upload_user='1/min', recipe_create_user='1/min')
+        client = APIClient()
+        client.force_authenticate(test_user)
+        client.put('/api/users/me/image/', {}, format='multipart')
+        # DELETE no decodifica imágenes: no comparte el límite de la subida.
+        assert client.delete('/api/users/me/image/').status_code == 404
+        assert all(client.get('/api/recipes/recipes/').status_code == 200 for _ in range(3))
+
+
+@pytest.mark.unit
+@pytest.mark.users_app
+class TestLocalTokenBucket:
+
+    def test_refills_over_time(self):
+        bucket = LocalTokenBucket()
+        assert bucket.consume('key', 2, 1.0, now=0) == 0
+        assert bucket.consume('key', 2, 1.0, now=0) == 0
+        assert bucket.consume('key', 2, 1.0, now=0) == pytest.approx(1.0)
+        assert bucket.consume('key', 2, 1.0, now=1.5) == 0
+
+    def test_full_buckets_are_evicted(self):
+        bucket = LocalTokenBucket(purge_interval=0)
+        for key in ('a', 'b'):
+            bucket.consume(key, 2, 1.0, now=0)
+        bucket.consume('c', 2, 1.0, now=0.5)
+        assert len(bucket) == 3
+        # 'a' y 'b' se recargaron del todo en t=1; 'c' todavía no.
+        bucket.consume('d', 2, 1.0, now=1.2)
+        assert len(bucket) == 2
@@ -0,0 +1,141 @@
+import io
+import os
+import statistics
+import time
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from users.authentication import user_snapshots
+from users.token_blacklist import BloomFilter, blacklist_filter
+
+
+@pytest.fixture(autouse=True)
+def reset_filters():
+    blacklist_filter.reset()
+    user_snapshots.clear()
+    yield
+    blacklist_filter.reset()
+    user_snapshots.clear()
+
+
+def refresh(client, token):
+    return client.post('/api/token/refresh/', {'refresh': str(token)}, format='json')
+
+
+@pytest.mark.unit
+@pytest.mark.users_app
+class TestBloomFilter:
+    """
+    Tests for the Bloom filter used by the refresh-token blacklist.
+    """
+
+    def test_no_false_negatives_and_bounded_false_positives(self):
+        bloom = BloomFilter(1000, error_rate=0.01)
+        for i in range(1000):
+            bloom.add(f"jti-{i}")
+
+        assert all(f"jti-{i}" in bloom for i in range(1000))
+        false_positives = sum(f"other-{i}" in bloom for i in range(10000))
+        assert false_positives < 300
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+@pytest.mark.users_app
+class TestRefreshBlacklist:
+    """
+    Tests for the refresh and logout endpoints backed by the Bloom-filter blacklist.
+    """
+
+    def test_refresh_skips_database_once_warm(self, test_user, django_assert_num_queries):
+        client = APIClient()
+        token = RefreshToken.for_user(test_user)
+        assert refresh(client, token).status_code == 200
+
+        with django_assert_num_queries(0):
+            response = refresh(client, token)
+        assert 'access' in response.data
+
+    def test_logout_blacklists_token(self, test_user):
+        client = APIClient()
+        token = RefreshToken.for_user(test_user)
+
+        assert client.post('/api/logout/', {'refresh': str(token)}, format='json').status_code == 200
+        assert refresh(client, token).status_code == 401
+
+    def test_blacklist_from_other_process_is_synced(self, test_user, settings):
+        settings.JWT_BLACKLIST_SYNC_INTERVAL = 0
+        client = APIClient()
+        token = RefreshToken.for_user(test_user)
+        assert refresh(client, token).status_code == 200
+
+        BlacklistedToken.objects.create(token=OutstandingToken.objects.get(jti=token['jti']))
+
+        assert refresh(client, token).status_code == 401
+
+    def test_sync_sees_rows_committed_out_of_order(self, test_user, settings):
+        settings.JWT_BLACKLIST_SYNC_INTERVAL = 0
+        client = APIClient()
+        first, late = RefreshToken.for_user(test_user), RefreshToken.for_user(test_user)
+        BlacklistedToken.objects.create(id=100, token=OutstandingToken.objects.get(jti=first['jti']))
+        assert refresh(client, late).status_code == 200
+
+        # Transacción que reservó id y blacklisted_at antes de la última sincronización y confirma después.
+        BlacklistedToken.objects.create(id=50, token=OutstandingToken.objects.get(jti=late['jti']))
+        BlacklistedToken.objects.filter(id=50).update(blacklisted_at=timezone.now() - timedelta(seconds=10))
+
+        assert refresh(client, late).status_code == 401
+
+    def test_prune_tokens_deletes_only_expired(self, test_user):
+        live = RefreshToken.for_user(test_user)
+        expired = RefreshToken.for_user(test_user)
+        expired.blacklist()
+        OutstandingToken.objects.filter(jti=expired['jti']).update(expires_at=timezone.now() - timedelta(days=1))
+
+        call_command('prune_tokens', '--batch-size', '1', stdout=io.StringIO())
+
+        assert list(OutstandingToken.objects.values_list('jti', flat=True)) == [live['jti']]
+        assert not BlacklistedToken.objects.exists()
+
+
+@pytest.mark.django_db
+@pytest.mark.slow
+@pytest.mark.users_app
+class TestRefreshBenchmark:
+    """
+    Refresh-endpoint latency with a large token history. The history size comes from
+    TOKEN_BENCH_COUNT (10M by default); run with `pytest -m slow users/tests/test_token_blacklist.py -s`.
+    """
+
+    def test_refresh_latency_with_large_history(self, test_user):
+        count = int(os.environ.get('TOKEN_BENCH_COUNT', 10_000_000))
+        expires_at = timezone.now() + timedelta(days=1)
+        chunk = 50_000
+        for start in range(0, count, chunk):
+            outstanding = OutstandingToken.objects.bulk_create(
+                OutstandingToken(user=test_user, jti=f"bench{start + i:027d}", token='', expires_at=expires_at)
+                for i in range(min(chunk, count - start))
+            )
+            # Uno de cada diez tokens históricos está en la blacklist.
+            BlacklistedToken.objects.bulk_create(BlacklistedToken(token=token) for token in outstanding[::10])
+
+        client = APIClient()
+        token = RefreshToken.for_user(test_user)
+        refresh(client, token)
+        samples = []
+        for _ in range(200):
+            started = time.perf_counter()
+            assert refresh(client, token).status_code == 200
+            samples.append((time.perf_counter() - started) * 1000)
+
+        samples.sort()
+        print(
+            f"\nrefresh con {count} tokens: p50={statistics.median(samples):.2f} ms "
+            f"p95={samples[int(len(samples) * 0.95)]:.2f} ms"
+        )
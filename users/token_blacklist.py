@@ -0,0 +1,145 @@
+"""
+Comprobación de la blacklist de refresh tokens con un filtro de Bloom en memoria.
+
+`token_blacklist` de simplejwt consulta la base de datos en cada refresh para saber si el token
+está en la blacklist. Aquí cada proceso mantiene un filtro de Bloom con los JTI de los tokens
+en la blacklist que aún no han caducado:
+
+    - Si el JTI no está en el filtro, el token no está en la blacklist y no se consulta la BD
+      (el caso de casi todos los refresh).
+    - Si puede estar, se confirma con la consulta exacta (los falsos positivos solo cuestan esa consulta).
+
+El filtro se sincroniza cada `JWT_BLACKLIST_SYNC_INTERVAL` segundos leyendo solo las entradas
+recientes (rango de `blacklisted_at`, con índice) y se reconstruye entero cada
+`JWT_BLACKLIST_REBUILD_INTERVAL` para olvidar las caducadas. Un token añadido a la blacklist desde otro proceso puede tardar como mucho el
+intervalo de sincronización en verse; en el propio proceso se ve al instante.
+"""
+import hashlib
+import math
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+
+class BloomFilter:
+    """
+    Filtro de Bloom sobre un bytearray con doble hashing (Kirsch-Mitzenmacher).
+
+    Args:
+        capacity (int): Elementos previstos.
+        error_rate (float): Tasa de falsos positivos objetivo con `capacity` elementos.
+    """
+
+    def __init__(self, capacity, error_rate=0.001):
+        capacity = max(int(capacity), 1)
+        self.size = max(int(-capacity * math.log(error_rate) / math.log(2) ** 2), 8)
+        self.hash_count = max(int(round(self.size / capacity * math.log(2))), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, value):
+        digest = hashlib.blake2b(value.encode('utf-8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.size for i in range(self.hash_count)]
+
+    def add(self, value):
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, value):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+
+class BlacklistFilter:
+    """
+    Filtro de Bloom de los JTI en la blacklist, compartido por los hilos del proceso.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._bloom = None
+        self._synced_since = None
+        self._synced_at = 0.0
+        self._built_at = 0.0
+
+    def might_contain(self, jti):
+        self._refresh()
+        return jti in self._bloom
+
+    def add(self, jti):
+        """Añade un JTI recién puesto en la blacklist por este proceso."""
+        self._refresh()
+        with self._lock:
+            self._bloom.add(jti)
+
+    def reset(self):
+        with self._lock:
+            self._bloom = None
+
+    def _refresh(self):
+        now = time.monotonic()
+        if self._bloom is not None and now - self._synced_at < settings.JWT_BLACKLIST_SYNC_INTERVAL:
+            return
+        with self._lock:
+            if self._bloom is None or now - self._built_at >= settings.JWT_BLACKLIST_REBUILD_INTERVAL:
+                self._rebuild(now)
+            elif now - self._synced_at >= settings.JWT_BLACKLIST_SYNC_INTERVAL:
+                self._sync(now)
+
+    def _rebuild(self, now):
+        """Carga en streaming los JTI de la blacklist que aún no han caducado."""
+        started = timezone.now()
+        live = BlacklistedToken.objects.filter(token__expires_at__gt=started)
+        # Se dimensiona con margen para los que se añadan hasta la siguiente reconstrucción.
+        bloom = BloomFilter(max(settings.JWT_BLACKLIST_BLOOM_CAPACITY, int(live.count() * 1.5)),
+                            settings.JWT_BLACKLIST_BLOOM_ERROR_RATE)
+        for jti in live.values_list('token__jti', flat=True).iterator(chunk_size=10000):
+            bloom.add(jti)
+        self._bloom, self._synced_since = bloom, started
+        self._built_at = self._synced_at = now
+
+    def _sync(self, now):
+        """
+        Añade las entradas con `blacklisted_at` desde la última lectura menos
+        `JWT_BLACKLIST_SYNC_MARGIN`. Ni el id ni `blacklisted_at` siguen el orden de commit: una
+        transacción que confirma tarde aparece con valores anteriores a la última lectura, y el
+        margen las vuelve a cubrir. Releer un JTI ya presente no cambia el filtro.
+        """
+        started = timezone.now()
+        since = self._synced_since - timedelta(seconds=settings.JWT_BLACKLIST_SYNC_MARGIN)
+        for jti in BlacklistedToken.objects.filter(blacklisted_at__gte=since).values_list('token__jti', flat=True):
+            if jti not in self._bloom:
+                self._bloom.add(jti)
+        self._synced_since = started
+        self._synced_at = now
+
+
+blacklist_filter = BlacklistFilter()
+
+
+class BloomRefreshToken(RefreshToken):
+    """
+    Refresh token cuya comprobación de blacklist pasa primero por `blacklist_filter`.
+    """
+
+    def check_blacklist(self):
+        jti = self.payload[api_settings.JTI_CLAIM]
+        if not blacklist_filter.might_contain(jti):
+            return
+        if BlacklistedToken.objects.filter(token__jti=jti).exists():
+            raise TokenError(_("Token is blacklisted"))
+
+    def blacklist(self):
+        result = super().blacklist()
+        blacklist_filter.add(self.payload[api_settings.JTI_CLAIM])
+        return result
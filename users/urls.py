@@ -12,7 +12,9 @@ from .views.userView import (
     UserFavoriteListCreateView,
     UserFavoriteDestroyView,
     AdminFavoriteViewSet,
-    UserImageUpdateView
+    UserImageUpdateView,
+    UserBootstrapView,
+    UserFavoriteRecipeView
 )
 from users.views.tokenView import MyTokenObtainPairView
 """
@@ -51,6 +53,7 @@ urlpatterns = [
     # path('users/me/', UserProfileView.as_view(), name='user-profile-me'),
     path('users/<str:pk>/', UserProfileView.as_view(), name='user-profile-detail'),
     path('users/me/image/', UserImageUpdateView.as_view(), name='user-image-update'),
+    path('me/bootstrap/', UserBootstrapView.as_view(), name='user-bootstrap'),
 
     # User administration routes
     path('admin/users/', AdminUserViewSet.as_view(), name='admin-user-list-create'),
@@ -59,6 +62,7 @@ urlpatterns = [
     # Favorite routes for auth user
     path('favorites/', UserFavoriteListCreateView.as_view(), name='user-favorite-list-create'),
     path('favorites/<int:pk>/', UserFavoriteDestroyView.as_view(), name='user-favorite-destroy'),
+    path('favorites/recipes/<int:recipe_id>/', UserFavoriteRecipeView.as_view(), name='user-favorite-recipe'),
 
     # Routes for favorites administration
     path('admin/favorites', AdminFavoriteViewSet.as_view(), name='admin-favorite-list-create'),
@@ -1,5 +1,8 @@
 from rest_framework_simplejwt.views import TokenObtainPairView
+from api.throttling import ExpensiveEndpointThrottleMixin
 from users.serializers.tokenSerializer import MyTokenObtainPairSerializer
 
-class MyTokenObtainPairView(TokenObtainPairView):
-    serializer_class = MyTokenObtainPairSerializer
\ No newline at end of file
+class MyTokenObtainPairView(ExpensiveEndpointThrottleMixin, TokenObtainPairView):
+    serializer_class = MyTokenObtainPairSerializer
+    # Comprueba la contraseña como /login/: comparte su límite.
+    throttle_scope = 'login'
\ No newline at end of file
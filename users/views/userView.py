@@ -19,15 +19,22 @@ from ..serializers.userSerializer import (
 from ..models.favorite import Favorite
 from ..serializers.favoriteSerializer import (
     FavoriteSerializer,
-    FavoriteAdminSerializer
+    FavoriteAdminSerializer,
+    FavoriteCardSerializer
 )
+from ..services.favorites import add_favorite, remove_favorite
+from rest_framework.pagination import CursorPagination
+from recipes.models.recipe import Recipe
 from rest_framework.parsers import MultiPartParser, FormParser
-from media.services.image_service import remove_image_file, update_image_for_instance
+from media.services.image_service import delete_image, images_by_external_id, update_image_for_instance
 from media.serializers.image_serializer import ImageAdminSerializer
 from media.models.image import Image
+from api.throttling import ExpensiveEndpointThrottleMixin
+from django.utils.http import parse_etags
+from ..services.bootstrap import bootstrap_etag, build_bootstrap_payload, load_bootstrap_state
 
 
-class UserRegistrationView(generics.CreateAPIView):
+class UserRegistrationView(ExpensiveEndpointThrottleMixin, generics.CreateAPIView):
     """
     View para el registro de nuevos usuarios.
     Permite a cualquier usuario crear una nueva cuenta.
@@ -55,6 +62,7 @@ class UserRegistrationView(generics.CreateAPIView):
     queryset = CustomUser.objects.all()
     serializer_class = CustomUserCreateSerializer
     permission_classes = [AllowAny]
+    throttle_scope = 'register'
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -67,13 +75,14 @@ class UserRegistrationView(generics.CreateAPIView):
         return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
 
 
-class UserLoginView(APIView):
+class UserLoginView(ExpensiveEndpointThrottleMixin, APIView):
     """
     View para el inicio de sesión de usuarios.
     Permite a los usuarios autenticarse y obtener tokens JWT (Access y Refresh).
     Utiliza CustomUserLoginSerializer para la validación de credenciales.
     """
     permission_classes = [AllowAny]  # Access without auth
+    throttle_scope = 'login'
 
     def post(self, request, *_args, **_kwargs):
         serializer = CustomUserLoginSerializer(data=request.data)
@@ -110,7 +119,8 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
         if pk == 'me':
             if not self.request.user.is_authenticated:
                 raise AuthenticationFailed("Autenticación requerida para acceder a 'me'.")
-            return self.request.user
+            # request.user solo trae los campos de autenticación; el perfil se lee completo.
+            return get_object_or_404(self.get_queryset(), pk=self.request.user.pk)
         pk = int(pk) if pk else None
         if 'pk' in self.kwargs:
             obj = get_object_or_404(self.get_queryset(), pk=self.kwargs['pk'])
@@ -134,6 +144,31 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
         return CustomUserUpdateSerializer  # To update the profile.
 
 
+class UserBootstrapView(APIView):
+    """
+    Datos de arranque de la app en una sola llamada: perfil (como `CustomUserSerializer`), avatar,
+    favoritos con el resumen de su receta y recuentos de la lista de la compra.
+
+    Responde con un ETag; si coincide con `If-None-Match` devuelve 304 tras una única consulta.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        user = load_bootstrap_state(request.user.pk)
+        if user is None:
+            raise AuthenticationFailed("Usuario no encontrado.")
+        etag = bootstrap_etag(user)
+        client_etags = parse_etags(request.headers.get('If-None-Match', ''))
+        # Comparación débil: se ignora el prefijo W/ de ambos lados.
+        if '*' in client_etags or etag.removeprefix('W/') in [tag.removeprefix('W/') for tag in client_etags]:
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response(build_bootstrap_payload(user), status=status.HTTP_200_OK)
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+
 class AdminUserViewSet(generics.ListCreateAPIView, generics.RetrieveUpdateDestroyAPIView):
     """
     Conjunto de Views para la gestión completa de usuarios por parte de un administrador.
@@ -187,22 +222,92 @@ class UserFavoriteListCreateView(generics.ListCreateAPIView):
 
         Notas:
             Al crear un favorito, el usuario asociado se asigna automáticamente al usuario de la petición.
+            Crear un favorito que ya existe no lo duplica: responde 200 con el existente.
             La lista solo mostrará los favoritos del usuario actual.
+            Con `?embed=recipe` cada favorito incluye una tarjeta de su receta y la lista se pagina
+            por cursor sobre `created_at` (más recientes primero).
         """
     permission_classes = [IsAuthenticated]
     serializer_class = FavoriteSerializer
 
+    def embeds_recipe(self):
+        return self.request.query_params.get('embed') == 'recipe'
+
+    @property
+    def paginator(self):
+        # La lista simple se mantiene sin paginar; solo la de tarjetas usa cursor.
+        if not hasattr(self, '_paginator'):
+            self._paginator = FavoriteCursorPagination() if self.embeds_recipe() else None
+        return self._paginator
+
+    def get_serializer_class(self):
+        if self.request.method == 'GET' and self.embeds_recipe():
+            return FavoriteCardSerializer
+        return FavoriteSerializer
+
     def get_queryset(self):
         """
         Devuelve el queryset de favoritos, filtrado para mostrar solo los del usuario autenticado.
         """
-        return Favorite.objects.filter(user_id=self.request.user)
+        queryset = Favorite.objects.filter(user_id=self.request.user)
+        if self.embeds_recipe():
+            queryset = queryset.select_related('recipe_id')
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        favorites = list(page if page is not None else queryset)
+        context = self.get_serializer_context()
+        if self.embeds_recipe():
+            context['recipe_images'] = images_by_external_id(
+                Image.ImageType.RECIPE, [favorite.recipe_id_id for favorite in favorites]
+            )
+        data = self.get_serializer(favorites, many=True, context=context).data
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
 
-    def perform_create(self, serializer):
+    def create(self, request, *args, **kwargs):
         """
-        Asigna automáticamente el usuario autenticado al campo `user_id` del nuevo favorito al crearlo.
+        Asigna automáticamente el usuario autenticado al nuevo favorito. Si ya existía, lo devuelve sin duplicarlo.
         """
-        serializer.save(user_id=self.request.user)
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        favorite, created = add_favorite(request.user.pk, serializer.validated_data['recipe_id'].pk)
+        return Response(
+            FavoriteSerializer(favorite).data,
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
+        )
+
+
+class FavoriteCursorPagination(CursorPagination):
+    """Paginación por cursor de los favoritos, del más reciente al más antiguo."""
+    ordering = ('-created_at', '-id')
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class UserFavoriteRecipeView(APIView):
+    """
+    Marca (PUT) o desmarca (DELETE) una receta como favorita del usuario autenticado.
+
+    Ambas operaciones son idempotentes: repetirlas no duplica ni falla, así que el cliente puede
+    reenviar el estado deseado tras un doble toque o un reintento.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def put(self, request, recipe_id, *args, **kwargs):
+        if not Recipe.objects.filter(pk=recipe_id).exists():
+            return Response({'detail': 'Receta no encontrada.'}, status=status.HTTP_404_NOT_FOUND)
+        favorite, created = add_favorite(request.user.pk, recipe_id)
+        data = {**FavoriteSerializer(favorite).data, 'is_favorited': True}
+        return Response(data, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+
+    def delete(self, request, recipe_id, *args, **kwargs):
+        remove_favorite(request.user.pk, recipe_id)
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
 
 class UserFavoriteDestroyView(generics.DestroyAPIView):
@@ -252,13 +357,15 @@ class AdminFavoriteViewSet(generics.ListCreateAPIView, generics.RetrieveUpdateDe
     serializer_class = FavoriteAdminSerializer
 
 
-class UserImageUpdateView(APIView):
+class UserImageUpdateView(ExpensiveEndpointThrottleMixin, APIView):
     """
     Permite a un usuario autenticado actualizar su imagen de perfil.
     Utiliza la función update_image_for_instance del servicio de imágenes.
     """
     permission_classes = [IsAuthenticated]
     parser_classes = [MultiPartParser, FormParser]
+    throttle_scope = 'upload'
+    throttled_actions = {'put'}
 
     def put(self, request, *args, **kwargs):
         image_file = request.FILES.get('image')
@@ -281,8 +388,7 @@ class UserImageUpdateView(APIView):
         if not image_obj:
             return Response({'detail': 'No hay imagen para eliminar.'}, status=status.HTTP_404_NOT_FOUND)
 
-        remove_image_file(user.id, image_obj.url)
-        image_obj.delete()
+        delete_image(image_obj, user.id)
         return Response({'detail': 'Imagen eliminada correctamente.'}, status=status.HTTP_204_NO_CONTENT)
 
 